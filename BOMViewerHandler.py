@@ -14,6 +14,7 @@ from reportlab.lib.styles   import (ParagraphStyle, getSampleStyleSheet)
 
 # Other files I've written that this file relies on
 import errorLogging
+import variableNames
 import BOM_MouserAPI, BOM_DigikeyAPI, BOM_ComponentClass
 
 
@@ -390,30 +391,40 @@ class BGWindow(QtWidgets.QMainWindow):
         if self.__expr is None:
             errorLogging.raiseGenericFatalError(57)
         
-        # 2 inputs per OR, so we just need to get the number of ORs and divide by 2
-        OR_GATE_COUNT  = math.ceil(self.__expr.count("+")/2)
+        # the terms of every output, each is a list of (variable name, is inverted) (see variableNames.py). a table with
+        # several outputs has them all in one expression (see variableNames.joinOutputs). a product of sums has clauses
+        # instead, which are built the same way with the ANDs and ORs swapped round
+        termsOf = [variableNames.literalGroups(expr) for _, expr in variableNames.splitOutputs(self.__expr)]
+        isProductOfSums = variableNames.isProductOfSums(self.__expr)
+        # a term used by more than one output is only built once, its output goes to each of their OR gates
+        terms = list(dict.fromkeys(tuple(term) for outputTerms in termsOf for term in outputTerms))
+        
+        # 2 inputs per OR (AND for a POS) joining the terms, so we just need to get the number of ORs and divide by 2
+        JOINING_GATE_COUNT = math.ceil(sum(max(len(outputTerms) - 1, 0) for outputTerms in termsOf)/2)
         # 1 input per NOT, 6 per chip so just divide by 6
-        NOT_GATE_COUNT = math.ceil(self.__expr.count("#")/6)
+        NOT_GATE_COUNT = math.ceil(sum(isInverted for term in terms for _, isInverted in term)/6)
         # And is more complicated because:
         #    A AND B needs 1 AND gate
         #    A AND B AND C needs 2
         #    A AND B AND C AND D needs 4 <= this isn't linear
-        AND_GATE_COUNT = 0
+        TERM_GATE_COUNT = 0
 
         # iterate over the terms
-        for term in self.__expr.split("+"):
+        for term in terms:
             # if we need an and gate in this term
-            if len(term) > 1:
-                # remove the nots because we dont need those
-                # then add the number of ands in that term
-                AND_GATE_COUNT += math.ceil(len(term.replace("#",""))/2)
+            if len(term) > 1 or term[0][1]:
+                # the nots don't need one, so add the number of ands for the variables in that term
+                TERM_GATE_COUNT += math.ceil(len(term)/2)
         
-        # now we have the number needed once we divide by 4 (4 ANDs per chip)
-        noNeeded = [NOT_GATE_COUNT, math.ceil(AND_GATE_COUNT/4), OR_GATE_COUNT]
+        # now we have the number needed once we divide by 4 (4 ANDs per chip, the term gates are ORs for a POS)
+        if isProductOfSums:
+            noNeeded = [NOT_GATE_COUNT, JOINING_GATE_COUNT, math.ceil(TERM_GATE_COUNT/4)]
+        else:
+            noNeeded = [NOT_GATE_COUNT, math.ceil(TERM_GATE_COUNT/4), JOINING_GATE_COUNT]
         
         # if no components are needed at all
         if any(noNeeded) == False:
-            errorLogging.raiseInfoDlg("BOM Generation Error", f"The expression you have generated (Q={self.__expr}) requires no logic to implement.")
+            errorLogging.raiseInfoDlg("BOM Generation Error", f"The expression you have generated ({self.__expr if variableNames.isMultiOutput(self.__expr) else "Q=" + self.__expr}) requires no logic to implement.")
             return
         
         # need to search and sort components
@@ -4,13 +4,18 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import *
 import os
 import errorLogging
+import variableNames
 
 class ProgrammingLanguageExport:
     def __init__(self, 
             languageID:int, languageName:str,                                               # id and name
             functionDef:str, functionVariable:str, functionEndCode:str,                     # packaging code
             andCode:str, trailingAndCode:str, orCode:str, trailingOrCode:str, notCode:str,  # logical syntax
-            bracketCode:bool, popLastComma:bool, remSingleLenBracket:bool=True              # settings
+            bracketCode:bool, popLastComma:bool, remSingleLenBracket:bool=True,             # settings
+            # packaging code for tables with several outputs, where terms used by more than one output are worked out
+            # once (see prettyPrintFunction)
+            multiFunctionDef:str="", outputVariable:str="", outputSeparator:str=", ", sharedDeclCode:str="",
+            sharedTermCode:str="", outputCode:str="", multiFunctionEnd:str=""
         ):
         
         self.languageID = languageID
@@ -26,6 +31,13 @@ class ProgrammingLanguageExport:
         self.addBrackets = bracketCode
         self.popComment = popLastComma
         self.removeSingle = remSingleLenBracket
+        self.multiFuncDef = multiFunctionDef
+        self.outVar = outputVariable
+        self.outSeparator = outputSeparator
+        self.sharedDecl = sharedDeclCode
+        self.sharedTerm = sharedTermCode
+        self.outCode = outputCode
+        self.multiFuncEnd = multiFunctionEnd
     
     # NOT A
     def NOT(self, variable : str) -> str:
@@ -57,70 +69,48 @@ class ProgrammingLanguageExport:
             return self.NOT(token)
         return token
             
-    # turn logical expression into code
-    def computeExpression(self, exprIn : str):
+    # turn one term (a list of (variable name, is inverted), see variableNames.py) into code
+    def computeTerm(self, term) -> str:
+        # only 1 variable e.g. A or NOT A
+        if len(term) == 1:
+            return self.negate(*term[0])
+        
+        # only one and for the first 2 variables
+        termOut = self.AND(self.negate(*term[0]), self.negate(*term[1]))
+        for name, isNegated in term[2:]:
+            # trail the ands for more than 2 variables in a term
+            termOut += self.ANDTrail(self.negate(name, isNegated))
+        return termOut
+    
+    # turn logical expression into code. sharedTerms maps terms (as tuples) that have already been worked out to the
+    # name they were stored in
+    def computeExpression(self, exprIn : str, sharedTerms : dict = None):
         exprIn = exprIn.replace(" ", "")    # remove whitespace 
-        exprList = []
-        
-        # single term, simplify down
-        if "+" not in exprIn:
-            exprList = [exprIn] 
-        else:
-            # do this term by term
-            exprList = exprIn.split("+")
+        exprOutput = ""                     # entire expression
+        sharedTerms = sharedTerms or {}
         
-        termsOut = []
+        # constant output (Q=0 or Q=1), nothing to translate
+        if exprIn in ("0", "1"):
+            return exprIn
         
-        for term in exprList:
-            varsFound = 0                   # no of vairables in ter,
-            tmpTermOut = ""                 # current term 
-            isNegated = False               # makes dealing with # much easier
-            exprOutput = ""                 # entire expression
-            
-            # only 1 variable and a not e.g. NOT A 
-            if "#" in term and len(term.replace("#","")) == 1: # just need to negate this term and then add it to the list
-                termsOut.append(self.NOT(term.replace("#","")))       
-                # skip to next term   
-                continue
+        # product of sums, e.g. (A+B#)(C)
+        if variableNames.isProductOfSums(exprIn):
+            return self.computeProductOfSums(exprIn)
         
-            # only 1 variable and nothing else e.g. A
-            elif len(term) == 1:
-                termsOut.append(term)
-                # skip to next term
+        termsOut = []
+        isPlainVariable = []                # whether each term is just a variable, e.g. A (these never need brackets)
+        
+        # do this term by term, each term is a list of (variable name, is inverted) (see variableNames.py)
+        for term in variableNames.splitTerms(exprIn):
+            if tuple(term) in sharedTerms:
+                # already worked out, so it's just a variable here
+                isPlainVariable.append(True)
+                termsOut.append(sharedTerms[tuple(term)])
                 continue
             
-            for i in range(len(term)):
-                isNegated = False               
-                
-                if term[i] == "#":          # don't need to deal with this character directly, so skip it
-                    continue
-                else:
-                    varsFound += 1          # otherwise, increment the number of variables found
-                    
-                if i + 1 != len(term):      # to validate input, this checks if there is another char before the end of the term 
-                    if term[i+1] == "#":
-                        isNegated = True   # if the next char is #, this char is inverted to add a not to the output
-                        
-                if i > 0:
-                    # 2nd index and onwards to the 2nd to last (stops index errors)
-                    prevVar = ""            
-                    # previous index was a not (this term should be negated)
-                    if term[i-1] == "#":
-                        prevVar = self.NOT(term[i-2])
-                        
-                    else:
-                        # this is the previous variable
-                        prevVar = term[i-1]
-                     
-                    # only one and
-                    if varsFound <= 2:
-                        tmpTermOut += self.AND(prevVar, self.negate(term[i], isNegated))
-                    else:
-                        # trail the ands for more than 2 variables in a term
-                        tmpTermOut += self.ANDTrail(self.negate(term[i], isNegated))
-            
+            isPlainVariable.append(len(term) == 1 and not term[0][1])
             # add to the list of terms
-            termsOut.append(tmpTermOut)
+            termsOut.append(self.computeTerm(term))
                     
         # This if statment is used if we have an expression like Q=A. Here, there is only 1 term so there's no point
         # trying to add stuff to the front or the end since there won't be anything.
@@ -137,12 +127,12 @@ class ProgrammingLanguageExport:
                 # need to add brackets for operator precedence
                 if self.addBrackets:
                     t1 = t2 = ""
-                    if (len(termsOut[count-1]) == 1 and self.removeSingle) or not self.addBrackets:
+                    if (isPlainVariable[count-1] and self.removeSingle) or not self.addBrackets:
                         t1 = termsOut[count-1]
                     else:
                         t1 = f"({termsOut[count-1]})"
                     
-                    if (len(term) == 1 and self.removeSingle) or not self.addBrackets:
+                    if (isPlainVariable[count] and self.removeSingle) or not self.addBrackets:
                         t2 = term
                     else:
                         t2 = f"({term})"
@@ -153,7 +143,7 @@ class ProgrammingLanguageExport:
             else:
                 # add the OR operator in trailing mode
                 if self.addBrackets:
-                    if not self.removeSingle or len(term) > 1:
+                    if not self.removeSingle or not isPlainVariable[count]:
                         exprOutput += self.ORTrail(f"({term})")
                     else:
                         exprOutput += self.ORTrail(term)
@@ -163,24 +153,56 @@ class ProgrammingLanguageExport:
         
         return exprOutput
 
+    # turn a product of sums into code, the same as computeExpression with AND and OR swapped
+    def computeProductOfSums(self, exprIn : str):
+        clausesOut = []
+        for clause in variableNames.splitClauses(exprIn):
+            # only 1 variable e.g. A or NOT A
+            if len(clause) == 1:
+                clauseOut = self.negate(*clause[0])
+                # a plain variable never needs brackets
+                if clause[0][1] or not self.removeSingle:
+                    clauseOut = f"({clauseOut})" if self.addBrackets else clauseOut
+                clausesOut.append(clauseOut)
+                continue
+            
+            # only one or for the first 2 variables, then trail the rest
+            clauseOut = self.OR(self.negate(*clause[0]), self.negate(*clause[1]))
+            for name, isNegated in clause[2:]:
+                clauseOut += self.ORTrail(self.negate(name, isNegated))
+            # the ORs always need brackets since AND comes first
+            clausesOut.append(f"({clauseOut})")
+        
+        # Q=(A+B) is just the one clause
+        if len(clausesOut) == 1:
+            return clausesOut[0]
+        
+        exprOutput = self.AND(clausesOut[0], clausesOut[1])
+        for clauseOut in clausesOut[2:]:
+            exprOutput += self.ANDTrail(clauseOut)
+        return exprOutput
+
     def prettyPrintFunction(self, functionName, booleanLogic):
-        ALPHABET = "QWERTYUIOPASDFGHJKLZXCVBNM"
+        # several outputs (e.g. "Q0 = AB+C; Q1 = AB+D") are packaged differently, see variableNames.joinOutputs
+        if variableNames.isMultiOutput(booleanLogic):
+            return self.prettyPrintMultiFunction(functionName, variableNames.splitOutputs(booleanLogic))
+        
         # varaibles we've alrady used
         variablesUsed = ""
+        namesUsed = set()
         # pretty printed output
         ppOutput = ""
         
         # get the expression we are working with 
         programCode = self.computeExpression(booleanLogic)
         
-        # iterate over the logic
-        for char in booleanLogic:
-            if char in ALPHABET:
-                # this is a variable
-                # add to variables used the formatted variable
-                # remove this variable to prevent duplicates
-                variablesUsed += self.funcVar.replace("{V1}", char) # add the variable definition for this character
-                ALPHABET = ALPHABET.replace(char,"")               # stop duplicate entries
+        # iterate over the variables in the logic, in the order they first appear
+        for term in variableNames.literalGroups(booleanLogic):
+            for name, _ in term:
+                if name not in namesUsed:
+                    # add to variables used the formatted variable
+                    variablesUsed += self.funcVar.replace("{V1}", name) # add the variable definition for this variable
+                    namesUsed.add(name)                                # stop duplicate entries
         
         # no whitepsace / trailing comments allowed            
         variablesUsed = variablesUsed.rstrip()            
@@ -193,6 +215,53 @@ class ProgrammingLanguageExport:
         # finish and return
         return ppOutput
     
+    def prettyPrintMultiFunction(self, functionName, outputs):
+        # outputs is [(output name, expression)]. a term with more than 1 variable that is in more than one output is
+        # worked out once and stored, so the generated code (or circuit, for the HDLs) only has one AND gate for it
+        termsOf = [variableNames.splitTerms(expr) if expr.replace(" ", "") not in ("0", "1") else [] for _, expr in outputs]
+        
+        # inputs in the order they first appear, the same as prettyPrintFunction
+        variablesUsed = ""
+        namesUsed = []
+        for terms in termsOf:
+            for term in terms:
+                for name, _ in term:
+                    if name not in namesUsed:
+                        variablesUsed += self.funcVar.replace("{V1}", name)
+                        namesUsed.append(name)
+        variablesUsed = variablesUsed.rstrip()
+        if self.popComment:
+            variablesUsed = variablesUsed[:-1]
+        
+        # count the outputs each term is in
+        outputsUsing = {}
+        for terms in termsOf:
+            for term in dict.fromkeys(map(tuple, terms)):
+                outputsUsing[term] = outputsUsing.get(term, 0) + 1
+        
+        # name the shared terms t0, t1... skipping any name that's already an input or output
+        sharedTerms = {}
+        takenNames = set(namesUsed) | {name for name, _ in outputs}
+        nameIndex = 0
+        for term, count in outputsUsing.items():
+            if count > 1 and len(term) > 1:
+                while f"t{nameIndex}" in takenNames:
+                    nameIndex += 1
+                sharedTerms[term] = f"t{nameIndex}"
+                nameIndex += 1
+        
+        outputNames = [name for name, _ in outputs]
+        ppLines = [self.multiFuncDef.replace("{NAME}", functionName).replace("{VARS}", variablesUsed)
+                   .replace("{OUTS}", self.outSeparator.join(self.outVar.replace("{V1}", name) for name in outputNames))
+                   .replace("{DECLS}", "".join(self.sharedDecl.replace("{V1}", name) for name in sharedTerms.values()))]
+        # the shared terms first, then every output using them
+        for term, name in sharedTerms.items():
+            ppLines.append(self.sharedTerm.replace("{V1}", name).replace("{RESULT}", self.computeTerm(term)))
+        for name, expr in outputs:
+            ppLines.append(self.outCode.replace("{V1}", name).replace("{RESULT}", self.computeExpression(expr, sharedTerms)))
+        ppLines.append(self.multiFuncEnd.replace("{NAME}", functionName).replace("{RESULTS}", ", ".join(outputNames)))
+        return "\n".join(ppLines)
+    
 class EXWindow(QtWidgets.QMainWindow):
     def __init__(self):
         # load the UI
@@ -251,7 +320,12 @@ class EXWindow(QtWidgets.QMainWindow):
                     " or {V1}",
                     "(not {V1})",
                     bracketCode = True,
-                    popLastComma = True
+                    popLastComma = True,
+                    multiFunctionDef = "def {NAME}({VARS}) -> tuple[{OUTS}]: ",
+                    outputVariable = "bool",
+                    sharedTermCode = "\t{V1} = {RESULT}",
+                    outputCode = "\t{V1} = {RESULT}",
+                    multiFunctionEnd = "\treturn ({RESULTS})"
                 ),
                 ProgrammingLanguageExport(                                  # C++
                     1, "C++",
@@ -264,7 +338,12 @@ class EXWindow(QtWidgets.QMainWindow):
                     " || {V1}",
                     "(!{V1})",
                     bracketCode = True,
-                    popLastComma = True
+                    popLastComma = True,
+                    multiFunctionDef = "void {NAME}({VARS}, {OUTS}){",     # the outputs are passed by reference
+                    outputVariable = "bool& {V1}",
+                    sharedTermCode = "\tbool {V1} = {RESULT};",
+                    outputCode = "\t{V1} = {RESULT};",
+                    multiFunctionEnd = "}"
                 ),
                 ProgrammingLanguageExport(                                  # Javascript
                     2, "Javascript",
@@ -277,7 +356,11 @@ class EXWindow(QtWidgets.QMainWindow):
                     " || {V1}",
                     "(!{V1})",
                     bracketCode = True,
-                    popLastComma = True
+                    popLastComma = True,
+                    multiFunctionDef = "function {NAME}({VARS}){",
+                    sharedTermCode = "\tconst {V1} = {RESULT};",
+                    outputCode = "\tconst {V1} = {RESULT};",
+                    multiFunctionEnd = "\treturn [{RESULTS}];\n}"
                 )
             ],
             "HDL":[
@@ -292,7 +375,14 @@ class EXWindow(QtWidgets.QMainWindow):
                     " OR {V1}",
                     "(NOT {V1})",
                     bracketCode=True,
-                    popLastComma=False
+                    popLastComma=False,
+                    multiFunctionDef="library IEEE;\nuse IEEE.std_logic_1164.all;\n\nentity {NAME} is\n\tport (\n{VARS}\n{OUTS}\n\t);\nend {NAME};\narchitecture logic of {NAME} is\n{DECLS}begin",
+                    outputVariable="\t\t{V1} : out std_logic",
+                    outputSeparator=";\n",
+                    sharedDeclCode="\tsignal {V1} : std_logic;\n",
+                    sharedTermCode="\t{V1} <= {RESULT};",
+                    outputCode="\t{V1} <= {RESULT};",
+                    multiFunctionEnd="end logic;"
                 ),
                 ProgrammingLanguageExport(                                  # Verilog export option
                     4, "Verilog",
@@ -305,7 +395,12 @@ class EXWindow(QtWidgets.QMainWindow):
                     " | {V1}",
                     " ~{V1}",
                     bracketCode=True,
-                    popLastComma=False
+                    popLastComma=False,
+                    multiFunctionDef="module {NAME} (input {VARS} output {OUTS});",
+                    outputVariable="{V1}",
+                    sharedTermCode="\twire {V1} = {RESULT};",
+                    outputCode="\tassign {V1} = {RESULT};",
+                    multiFunctionEnd="endmodule"
                 )
             ]
         }
@@ -1,12 +1,17 @@
 import re
 from PyQt5 import QtWidgets, uic
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThreadPool
 from PyQt5.QtGui import *
-import sys
+from functools import partial
+import sys, os
 
 import dllWrapper
 import errorLogging
+import truthTableFiles
+import variableNames
+from SOP_QuineMcCluskey import parseSOPExpression
+from simplifyWorker import SimplifyWorker
 
 class EVWindow(QtWidgets.QMainWindow):
     def __init__(self):
@@ -36,10 +41,53 @@ class EVWindow(QtWidgets.QMainWindow):
         self.actionCopyDbg.triggered.connect(self.copyDebugToClipboard)
         self.actionCopyAll.triggered.connect(self.copyAllToClipboard)
         
+        # File -> Export as PLA, writes the simplified expression as a cover for espresso/ABC/yosys
+        self.actionExportPLA = QAction("Export as PLA file...", self)
+        self.findChild(QMenu, "menuFile").insertAction(self.findChild(QAction, "actionSave"), self.actionExportPLA)
+        self.actionExportPLA.triggered.connect(self.exportPLAFile)
+        
         self.actionAutoOpenExport   = self.findChild(QAction, "actionAutoOpenExport")
         self.actionAutoOpenBOM      = self.findChild(QAction, "actionAutoOpenBOM")
         self.actionAutoClose        = self.findChild(QAction, "actionAutoClose")  
         
+        # Options -> Simplification Engine, lets the user pick which engine in dllWrapper simplifies the expression
+        self.engineMenu         = self.findChild(QMenu, "menuOptions").addMenu("Simplification Engine")
+        self.engineActionGroup  = QActionGroup(self)    # only one engine can be ticked at a time
+        self.engineActions      = {}
+        for engine, engineName in dllWrapper.ENGINE_NAMES.items():
+            engineAction = QAction(engineName, self)
+            engineAction.setCheckable(True)
+            engineAction.triggered.connect(partial(self.setSimplifyEngine, engine))
+            self.engineActionGroup.addAction(engineAction)
+            self.engineMenu.addAction(engineAction)
+            self.engineActions[engine] = engineAction
+        self.engineActions[dllWrapper.getSimplifyEngine()].setChecked(True)
+        # the Espresso and exact engines stop and return their best answer once this many seconds have passed
+        self.engineMenu.addSeparator()
+        self.actionTimeLimit    = self.engineMenu.addAction("Set time limit...")
+        self.actionTimeLimit.triggered.connect(self.askForTimeLimit)
+        # previous results are reused from simplifyCache.db, this throws them away (e.g. after changing the time limit)
+        self.actionClearCache   = self.engineMenu.addAction("Clear result cache")
+        self.actionClearCache.triggered.connect(self.clearResultCache)
+        # every simplified expression is checked against the truth table, this can turn that off for huge tables
+        self.actionVerify       = self.engineMenu.addAction("Verify simplified expressions")
+        self.actionVerify.setCheckable(True)
+        self.actionVerify.setChecked(dllWrapper.getVerifyResults())
+        self.actionVerify.toggled.connect(dllWrapper.setVerifyResults)
+        
+        # Options -> Expression Form, sum of products, product of sums or whichever of the two needs fewer gates
+        self.formMenu           = self.findChild(QMenu, "menuOptions").addMenu("Expression Form")
+        self.formActionGroup    = QActionGroup(self)
+        self.formActions        = {}
+        for form, formName in dllWrapper.FORM_NAMES.items():
+            formAction = QAction(formName, self)
+            formAction.setCheckable(True)
+            formAction.triggered.connect(partial(self.setExpressionForm, form))
+            self.formActionGroup.addAction(formAction)
+            self.formMenu.addAction(formAction)
+            self.formActions[form] = formAction
+        self.formActions[dllWrapper.getExpressionForm()].setChecked(True)
+        
         # Setup the scrollbar so we can see big pieces of text
         sA = self.findChild(QScrollArea, "scrollArea")
         sA.takeWidget()
@@ -51,9 +99,14 @@ class EVWindow(QtWidgets.QMainWindow):
         # use rich text for labels
         self.outputLabel.setTextFormat(Qt.TextFormat.RichText)
         
-        self.saveData = []
+        self.saveData = [False, None, None, None, None]    # same layout as setExpressionText so the save data indices always line up
         self.isGenerated = False
         self.outputExpr = ""
+        self.noVars = 0     # width of the truth table the expression came from
+        self.inputNames = None  # names of the truth table's inputs, None for A, B, C... (see variableNames.py)
+        self.outputNames = None # names of the outputs of a table with several, None for Q0, Q1, Q2...
+        self.simplifyWorker = None      # worker for the truth table currently being simplified (see simplifyWorker.py)
+        self.progressDialog = None
 
         # setup our dll
         dllWrapper.dllInit()
@@ -84,25 +137,153 @@ class EVWindow(QtWidgets.QMainWindow):
     def copyDebugToClipboard(self):
         self.clipboardHandler.setText(self._copyDebugToClipboard())
     
+    # change the engine used to simplify expressions and tick it in the menu
+    def setSimplifyEngine(self, engine):
+        dllWrapper.setSimplifyEngine(engine)
+        self.engineActions[engine].setChecked(True)
+
+    # change the form of the generated expression and tick it in the menu
+    def setExpressionForm(self, form):
+        dllWrapper.setExpressionForm(form)
+        self.formActions[form].setChecked(True)
+
+    def clearResultCache(self):
+        if not dllWrapper.clearResultCache():
+            errorLogging.raiseInfoDlg("Result Cache", "The result cache couldn't be cleared, it may be open in another window. Try again once that window has finished generating.")
+
+    # ask the user how long the time limited engines are allowed to run for
+    def askForTimeLimit(self):
+        seconds, accepted = QInputDialog.getDouble(self, "Simplification Time Limit", "Maximum time (seconds) to spend improving an expression:", dllWrapper.getSimplifyTimeLimit(), 0.1, 600, 1)
+        if accepted:
+            dllWrapper.setSimplifyTimeLimit(seconds)
+
+    def exportPLAFile(self):
+        if not self.saveData[0]:
+            errorLogging.raiseInfoDlg("Nothing to export", "Generate an expression from the Truth Table Editor first.")
+            return
+        
+        noVars = self.noVars
+        rawSOPs = [SOP for _, SOP in variableNames.splitOutputs(self.saveData[3]) if SOP not in ("0", "1")]
+        if not noVars and rawSOPs:
+            # loaded from a save, every term of the raw SOP (or clause of the raw POS) has every variable in it so the
+            # first one gives the width
+            firstTerm = variableNames.literalGroups(rawSOPs[0])[0]
+            noVars, _ = parseSOPExpression("*".join(name for name, _ in firstTerm))
+        noVars = max(noVars, 1)
+        
+        # a product of sums is written as the cover of the rows that are 0 (.type r), which is the SOP of NOT Q
+        plaType = None
+        expressions = variableNames.splitOutputs(self.outputExpr)
+        if variableNames.isProductOfSums(self.outputExpr):
+            plaType = "r"
+            expressions = [(variableNames.OUTPUT_NAME, variableNames.complementOfProductOfSums(self.outputExpr))]
+        
+        # one cover per output, terms that are in more than one are only written once (see truthTableFiles.writePLACovers)
+        outputNames, covers = [], []
+        for outputName, expr in expressions:
+            if expr == "0":
+                cover = []
+            elif expr == "1":
+                cover = [((1 << noVars) - 1, 0)]    # one cube with every input as -
+            else:
+                noVars, cover = parseSOPExpression(expr, noVars, self.inputNames)
+            outputNames.append(outputName)
+            covers.append(cover)
+        
+        downloadsFolder = os.path.expanduser("~") + "\\Downloads"
+        fileName, _ = QFileDialog.getSaveFileName(self, "Export PLA file...", downloadsFolder, "PLA Files (*.pla);;All Files (*)", options=QFileDialog.DontUseNativeDialog)
+        if not fileName:
+            return
+        if not fileName.lower().endswith(".pla"):
+            fileName += ".pla"
+        try:
+            truthTableFiles.writePLACovers(fileName, covers, noVars, self.inputNames, outputNames, plaType)
+        except Exception as e:
+            errorLogging.raiseError("Error! (Code 73)", f"Couldn't write this file. Please try again later.\nException: {e}")
+
     # register whether this section has been generated
     def registerGenerated(self, isGenerated):
         self.isGenerated = isGenerated
 
     # This is the function that recieves the truth table and processes it
-    def sendDataToWindow(self, data):
-        # convert the truth table to sum of products form
-        SOP = dllWrapper.sumOfProducts(data[0], data[1])
+    def sendDataToWindow(self, table):
+        self.noVars = table.noVars
+        self.inputNames = table.names
+        self.outputNames = table.getOutputNames() if hasattr(table, "getOutputNames") else None
+        # convert the truth table to sum of products form and simplify it (or fetch it from the result cache) on a
+        # worker thread, the result is put in the window by applyResult when it's done
+        if self.simplifyWorker:
+            self.simplifyWorker.cancel()    # a new table replaces whatever was still being simplified
+        worker = SimplifyWorker(table)
+        worker.signals.progress.connect(partial(self.showProgress, worker))
+        worker.signals.finished.connect(partial(self.applyResult, worker))
+        worker.signals.failed.connect(partial(self.simplifyFailed, worker))
+        worker.signals.cancelled.connect(partial(self.simplifyCancelled, worker))
+        self.simplifyWorker = worker
+        
+        # non modal so the rest of the program can still be used, only shown if it takes more than half a second
+        if self.progressDialog:
+            self.progressDialog.close()
+        self.progressDialog = QProgressDialog("Simplifying expression...", "Cancel", 0, 0, self)
+        self.progressDialog.setWindowTitle("Expression Viewer")
+        self.progressDialog.setWindowModality(Qt.NonModal)
+        self.progressDialog.setMinimumDuration(500)
+        self.progressDialog.canceled.connect(worker.cancel)
+        
+        QThreadPool.globalInstance().start(worker)
+    
+    def showProgress(self, worker, passes):
+        if worker is self.simplifyWorker and self.progressDialog:
+            self.progressDialog.setLabelText(f"Simplifying expression... (pass {passes})")
+    
+    def finishWorker(self, worker) -> bool:
+        # results from a worker that has been replaced by a newer table are ignored
+        if worker is not self.simplifyWorker:
+            return False
+        self.simplifyWorker = None
+        if self.progressDialog:
+            self.progressDialog.close()
+            self.progressDialog = None
+        return True
+    
+    def simplifyFailed(self, worker, error):
+        if not self.finishWorker(worker):
+            return
+        if isinstance(error, dllWrapper.SOPVerificationError):
+            # the simplifier got it wrong, the raw SOP is still right so show that rather than closing the program
+            errorLogging.writeErrorLog(error.code, additionalInfo=error.dbgInfo)
+            self.setExpressionText(exprOut=self.nameExpression(error.rawSOP), SOP_RAW=error.rawSOP, passes=error.passes, identites="Simplified expression failed verification, showing the raw SOP")
+            errorLogging.raiseError(f"Error! (Code {error.code})", f"The simplified expression didn't match the truth table, so the unsimplified expression is shown instead. A file containing debug info has been written to your Downloads folder.\n\n{error.mismatch.report()}")
+            return
+        errorLogging.raiseGenericFatalError(error.code, additionalDbgInfo=error.dbgInfo)
+    
+    def simplifyCancelled(self, worker):
+        # the previous expression (if any) is left in the window
+        self.finishWorker(worker)
+    
+    def applyResult(self, worker, result):
+        if not self.finishWorker(worker):
+            return
+        SOP, exprOut, identities, passes = result
         
         if SOP == "0" or SOP == "1":   # Constant output, no need to simplify
             self.setExpressionText(exprOut=SOP, SOP_RAW=SOP, passes=0, identites="Predefined constant result")
             errorLogging.raiseInfoDlg("Boolean Expression Warning!", f"The Truth Table you entered had a constant output of {SOP}. This is likely not intended, you may wish to check your data before proceeding.")
         else:
-            # we can potentially simplify this expression
-            BOOL = dllWrapper.simplifyBooleanExpr(SOP)
-            # this is the simplified expression
-            self.outputExpr = BOOL[0]
+            # this is the simplified expression, written with the table's input names
+            exprOut = self.nameExpression(exprOut)
+            self.outputExpr = exprOut
             # set the output text label in the GUI 
-            self.setExpressionText(exprOut=BOOL[0], SOP_RAW=SOP, passes=BOOL[2], identites=BOOL[1])
+            self.setExpressionText(exprOut=exprOut, SOP_RAW=SOP, passes=passes, identites=identities)
+
+    def nameExpression(self, exprIn: str) -> str:
+        # the simplifiers always use the default names, the raw SOP in the debug text is left that way because it can
+        # be hundreds of thousands of terms long. the outputs of a table with several are renamed in order
+        if not variableNames.isMultiOutput(exprIn):
+            return variableNames.renameExpression(exprIn, self.inputNames)
+        outputs = variableNames.splitOutputs(exprIn)
+        outputNames = self.outputNames or [name for name, _ in outputs]
+        return variableNames.joinOutputs(outputNames, [variableNames.renameExpression(expr, self.inputNames) for _, expr in outputs])
 
     def setExpressionText(self, exprOut, SOP_RAW, passes, identites):
         # get the expression's data
@@ -121,7 +302,7 @@ class EVWindow(QtWidgets.QMainWindow):
     
     def getSaveData(self) -> str:
         # return all the data in the system needed to save
-        return (self.saveData + [self.actionAutoClose.isChecked(), self.actionAutoOpenBOM.isChecked(), self.actionAutoOpenExport.isChecked()])
+        return (self.saveData + [self.actionAutoClose.isChecked(), self.actionAutoOpenBOM.isChecked(), self.actionAutoOpenExport.isChecked(), dllWrapper.getSimplifyEngine(), dllWrapper.getSimplifyTimeLimit(), dllWrapper.getVerifyResults(), self.inputNames, dllWrapper.getExpressionForm()])
         
 if __name__ == '__main__':
     _exprEditorApp = QtWidgets.QApplication(sys.argv)
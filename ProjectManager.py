@@ -35,7 +35,7 @@ def reactivateMainWindow(window:QMainWindow):
         window.setWindowState(window.windowState() & ~ Qt.WindowState.WindowMinimized | Qt.WindowState.WindowActive)
         window.activateWindow()
 
-    # make sure we reopen the database to stop SQL from breaking everything
+    # make sure the database is open to stop SQL from breaking everything (does nothing if it already is)
     window.databaseRef.connectToMain() # ensure the SQL database is reopened properly
 
 class DeleteWarningDialog(QDialog): # This class is a pop-up dialog that warns the user they are about to delete an item forever
@@ -118,8 +118,8 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
     def projMenuSelected(self):
         # Called when the user switches to project mode
         self.isProjectMode = True
-        # get all project data from the Projects Table in the SQL database
-        projectsData = self.databaseRef.readSQLQuery("SELECT * FROM Projects")
+        # get all project data from the Projects Table in the SQL database, with the expressions linked to each one
+        projectsData = self.databaseRef.getProjectListing()
         
         # project button can't be clicked because we're in project mode and vice-versa
         self.projBtn.setEnabled(False)
@@ -141,12 +141,11 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
         
         # iterate over the projects we fetched from the database 
         for count, project in enumerate(projectsData):
-            # This SQL query gets the information of each expression linked to the Project that we are currently working on
-            expressionsUsed = self.databaseRef.readSQLQuery(
-                f"SELECT Expressions.* FROM Expressions INNER JOIN ProjHandler ON Expressions.expressionID = ProjHandler.expressionID WHERE ProjHandler.projectID = {project[0]}"
-            )
+            # the ID and name of every expression linked to this project came with it (see databaseHandler.getProjectListing)
+            expressionsUsed = project[3]
             
-            _project = list(project)                            # convert from tuple to list so it can be modified  
+            _project = list(project[:3])                        # convert from tuple to list so it can be modified  
+            _project[2] = databaseHandler.formatTimeStamp(_project[2])  # the date is stored to sort by, format it to show
             referencedExpr = ""                        
             for link in expressionsUsed:                
                 referencedExpr += f"{link[0]}: {link[1]}, "     # add the expression ID and name if the expression is linked to this project
@@ -184,8 +183,8 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
     def exprMenuSelected(self):
         # projectMode is now false
         self.isProjectMode = False
-        # SQL to retrive the expressions from the database
-        expressionData = self.databaseRef.readSQLQuery("SELECT * FROM Expressions")
+        # SQL to retrive the expressions from the database, with the projects each one is part of
+        expressionData = self.databaseRef.getExpressionListing()
         
         # we can't click the expressions btn because we're in expressions mode and vice versa
         self.projBtn.setEnabled(True)
@@ -207,12 +206,10 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
         
         # do this for every expression in the database
         for count, expression in enumerate(expressionData):
-            # SQL to select all expressions where there is a link defined between the current project and the expression
-            projectsUsed = self.databaseRef.readSQLQuery(
-                f"SELECT Projects.* FROM Projects INNER JOIN ProjHandler ON Projects.ProjectID = ProjHandler.projectID WHERE ProjHandler.expressionID = {expression[0]}"
-            )
+            # the ID and name of every project this expression is linked to (see databaseHandler.getExpressionListing)
+            projectsUsed = expression[3]
             
-            _expression = [expression[0], expression[1], expression[3]]  # convert from tuple to list so it can be modified  
+            _expression = [expression[0], expression[1], databaseHandler.formatTimeStamp(expression[2])]  # convert from tuple to list so it can be modified  
             
             referencedProj = ""                                 # Projects this expression is in
             for link in projectsUsed:                
@@ -242,7 +239,7 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
         
         # all the projects used by this Expression
         _projectsUsed = self.databaseRef.readSQLQuery(
-            f"SELECT Projects.projectName FROM Projects INNER JOIN ProjHandler ON Projects.projectID = ProjHandler.projectID WHERE ProjHandler.expressionID = {exprID}"
+            "SELECT Projects.projectName FROM Projects INNER JOIN ProjHandler ON Projects.projectID = ProjHandler.projectID WHERE ProjHandler.expressionID = ?", (exprID,)
         )
         projectsUsed = [proj[0] for proj in _projectsUsed] # get rid of stupid Sqlite formatting and just make this a normal python list
         projectsUsed = str(projectsUsed) 
@@ -250,18 +247,16 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
         projectsUsed = projectsUsed[1:-1] # remove brackets from SQL query
         
         # now get the expression's data
-        data = self.databaseRef.readSQLQuery(f"SELECT ExpressionData FROM Expressions WHERE expressionID = {exprID}")[0][0]
+        data = self.databaseRef.readSQLQuery("SELECT ExpressionData FROM Expressions WHERE expressionID = ?", (exprID,))[0][0]
         data = data.replace("\\\"", "\"") # replace \" with " to stop triple quotes causing an error
         data = data.replace("\"", "\\\"") # replace " with \" so that the double quotes don't cause an error
         if DEV: # If working on the source code, open using python
             subprocess.Popen(f"python main.py \"{data}\" {exprID} \"{projectsUsed}\"", shell=True)
-            # we aren't the active window, release control of db
-            self.databaseRef.closeConnection()
+            # the database stays open, the editor can still write to it (see databaseHandler.CONNECTION_PRAGMAS)
             # hide this window
             self.hide()
         else:   # Otherwise, call the executable (active build mode)
             if os.path.exists("main.exe"):
-                self.databaseRef.closeConnection()
                 self.hide()
 
                 path = os.getcwd() + "\\main.exe"
@@ -273,12 +268,12 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
     def openPrevious(self):
         if not self.databaseRef.isConnectionOpen():
             self.databaseRef.connectToMain()
-        # This SQL query gets the expressions data sorted by when they were last updated. The most recent expression is the first.
-        data = self.databaseRef.readSQLQuery("SELECT ExpressionID, lastUpdated FROM Expressions ORDER BY lastUpdated DESC")
-        if len(data) == 0:
+        # This gets the expression that was updated last
+        exprID = self.databaseRef.getMostRecentExpression()
+        if exprID is None:
             # no projects exist so cannot open the most recent one
             return
-        self.openExpressionByID(data[0][0])
+        self.openExpressionByID(exprID)
 
     def importJSONFile(self):
         try:
@@ -310,11 +305,11 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
                 if importDict["importInfo"]["importType"] == "Expression":
                     # get the expression's name
                     importedName = importDict["data"]["exprName"]
-                    # get the expresison's data and format it for the sql db
+                    # get the expresison's data as a string for the sql db (it's a parameter so the quotes don't need escaping)
                     importedData = json.dumps(importDict["data"]["exprData"])
-                    importedData = importedData.replace("\"","\\\"")  
                     # insert into the database and refresh expressions
-                    self.databaseRef.executeSQLQuery(f"INSERT INTO Expressions (expressionName, expressionData, lastUpdated) VALUES ('{importedName}','{importedData}', '{databaseHandler.generateTimeStamp()}')")         
+                    self.databaseRef.execute("INSERT INTO Expressions (expressionName, expressionData, lastUpdated) VALUES (?, ?, ?)",
+                                             (importedName, importedData, databaseHandler.generateTimeStamp()))
                     if not self.isProjectMode:
                         self.exprMenuSelected()
                 
@@ -333,7 +328,7 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
                         importedProjectID = nextProjID[0][0] + 1
                         
                     sqlToExecute.append(
-                        f"INSERT INTO Projects (projectName, lastUpdated) VALUES (\"{projectName}\",\"{databaseHandler.generateTimeStamp()}\")"
+                        ("INSERT INTO Projects (projectName, lastUpdated) VALUES (?, ?)", (projectName, databaseHandler.generateTimeStamp()))
                     )
 
                     for expression in importDict["data"]["projectExpressions"]:
@@ -341,12 +336,10 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
                         importedExprData = expression["exprData"]
                         # convert to string so it can be put in a db
                         importedExprData = json.dumps(importedExprData)
-                        # stop special characters messing things up                        
-                        importedExprData = importedExprData.replace("\"", "\\\"")
                         
                         # create new expression
-                        sqlToExecute.append(f"""INSERT INTO Expressions (expressionName, expressionData, lastUpdated)
-                        VALUES (\"{expression["exprName"]}\", \'{importedExprData}\', \"{databaseHandler.generateTimeStamp()}\")""")
+                        sqlToExecute.append(("INSERT INTO Expressions (expressionName, expressionData, lastUpdated) VALUES (?, ?, ?)",
+                                             (expression["exprName"], importedExprData, databaseHandler.generateTimeStamp())))
                         
                     # Get the next available ExpressionID as this is where we will begin importing    
                     nextID = self.databaseRef.readSQLQuery("SELECT seq FROM sqlite_sequence WHERE name = 'Expressions'")
@@ -362,7 +355,7 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
                     # for each one of them add a link to the imported project
                     for exprID in importedExpressionIDs:
                         sqlToExecute.append(
-                            f"INSERT INTO ProjHandler (ProjectID, ExpressionID) VALUES ({importedProjectID}, {exprID})"
+                            ("INSERT OR IGNORE INTO ProjHandler (ProjectID, ExpressionID) VALUES (?, ?)", (importedProjectID, exprID))
                         )
                         
                     # run these queries on the SQL database
@@ -407,7 +400,7 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
             
             # get all the expressions in this project
             linkedExpr = self.databaseRef.readSQLQuery(
-                f"SELECT Expressions.* FROM Expressions INNER JOIN ProjHandler ON Expressions.expressionID = ProjHandler.expressionID WHERE ProjHandler.projectID = {exportProjID}"
+                "SELECT Expressions.* FROM Expressions INNER JOIN ProjHandler ON Expressions.expressionID = ProjHandler.expressionID WHERE ProjHandler.projectID = ?", (exportProjID,)
             )
             for link in linkedExpr:
                 # for each one, add the relevant fields to the project export
@@ -431,7 +424,7 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
             # get the expression's id, name and data
             exportID = self.mainTable.item(self.mainTable.currentRow(), 0).text()
             exprName = self.mainTable.item(self.mainTable.currentRow(), 1).text()
-            exprData = self.databaseRef.readSQLQuery(f"SELECT expressionData FROM Expressions WHERE expressionID = {exportID}")[0][0]
+            exprData = self.databaseRef.readSQLQuery("SELECT expressionData FROM Expressions WHERE expressionID = ?", (exportID,))[0][0]
             
             # turn this data into a dictionary so we can work with it
             exprData = dict(json.loads(exprData))
@@ -514,13 +507,13 @@ class MainProjectEditorWindow(QtWidgets.QMainWindow):
     
         if self.isProjectMode:
             self.databaseRef.executeMultipleQueries([
-                f"DELETE FROM Projects WHERE projectID = {deleteID}",
-                f"DELETE FROM ProjHandler WHERE projectID = {deleteID}"
+                ("DELETE FROM Projects WHERE projectID = ?", (deleteID,)),
+                ("DELETE FROM ProjHandler WHERE projectID = ?", (deleteID,))
             ])
         else:
             self.databaseRef.executeMultipleQueries([
-                f"DELETE FROM Expressions WHERE expressionID = {deleteID}",
-                f"DELETE FROM ProjHandler WHERE expressionID = {deleteID}",
+                ("DELETE FROM Expressions WHERE expressionID = ?", (deleteID,)),
+                ("DELETE FROM ProjHandler WHERE expressionID = ?", (deleteID,)),
             ])
 
     def deleteDB(self):
@@ -622,7 +615,7 @@ class NewExprEditorWindow(QtWidgets.QMainWindow):
             cloneID = int(cloneID) # turn the string into an integer
             
             # get the data of the cloned expression for this new expression
-            defaultData = self.databaseRef.readSQLQuery(f"SELECT ExpressionData FROM Expressions WHERE expressionID = {cloneID}")
+            defaultData = self.databaseRef.readSQLQuery("SELECT ExpressionData FROM Expressions WHERE expressionID = ?", (cloneID,))
             defaultData = defaultData[0][0] # retrive the data from the tuple and list SQL returns it in (god i hate sqlite)
             
             defaultData = json.loads(defaultData)
@@ -645,10 +638,10 @@ class NewExprEditorWindow(QtWidgets.QMainWindow):
               # that can be placed in the SQL database without any additional processing needed (saves time and my brain cells)
         
         timeStamp = databaseHandler.generateTimeStamp() # Get the current time to update the lastUpdated field
-        self.databaseRef.executeSQLQuery(f"""
-        INSERT INTO Expressions (expressionName, expressionData, lastUpdated)
-        VALUES (\"{self.exprNameEdit.text()}\", \'{defaultData}\', \"{timeStamp}\")
-        """) # commit the new data to the SQL database
+        self.databaseRef.execute(
+            "INSERT INTO Expressions (expressionName, expressionData, lastUpdated) VALUES (?, ?, ?)",
+            (self.exprNameEdit.text(), defaultData, timeStamp)
+        ) # commit the new data to the SQL database
         
         self.close() # close the create pop-up window
     
@@ -676,9 +669,9 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
         self.databaseRef = databaseRef              
         
         # formatted strings for cloning expressions, linking expressions and creating the new project
-        self.cloneExprSQL   = "INSERT INTO Expressions (expressionName, expressionData) SELECT expressionName, expressionData FROM Expressions WHERE expressionID = {ID}"
-        self.linkExprSQL    = "INSERT INTO ProjHandler (projectID, expressionID) VALUES (PROJ_ID, EXPR_ID)"
-        self.newProjectSQL  = "INSERT INTO Projects (projectName, lastUpdated) VALUES ('PROJ_NAME','DATE')"
+        self.cloneExprSQL   = "INSERT INTO Expressions (expressionName, expressionData) SELECT expressionName, expressionData FROM Expressions WHERE expressionID = ?"
+        self.linkExprSQL    = "INSERT OR IGNORE INTO ProjHandler (projectID, expressionID) VALUES (?, ?)"
+        self.newProjectSQL  = "INSERT INTO Projects (projectName, lastUpdated) VALUES (?, ?)"
         
         # references to the UI components we need to control
         self.outputTable    = self.findChild(QTableWidget, "outputTable")
@@ -743,8 +736,8 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
             self.titeLbl.setText("<p align=\"center\"><span style=\" font-size:11pt; font-weight:600;\">Project Editor</span></p></body></html>")
 
             self.existingProjectData = []
-            self.existingProjectData.append(self.databaseRef.readSQLQuery(f"SELECT ProjectName FROM Projects WHERE projectID = {self.projectID}")[0][0]) # add the project name (only iece of project data that can change, ID is fixed and lastupdated not managed from here) 
-            self.existingProjectData.append(self.databaseRef.readSQLQuery(f"SELECT expressionID FROM ProjHandler WHERE projectID = {self.projectID}")) # add the project expression links
+            self.existingProjectData.append(self.databaseRef.readSQLQuery("SELECT ProjectName FROM Projects WHERE projectID = ?", (self.projectID,))[0][0]) # add the project name (only iece of project data that can change, ID is fixed and lastupdated not managed from here) 
+            self.existingProjectData.append(self.databaseRef.readSQLQuery("SELECT expressionID FROM ProjHandler WHERE projectID = ?", (self.projectID,))) # add the project expression links
 
             self.projectNameBox.setText(self.existingProjectData[0])
             formattedProjects = []
@@ -752,7 +745,7 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
             # This loop does 2 things: it gets the names of the connected expressions so they can be added to the table
             # and it also fancies up the formatting of the linked expression's IDs because SQL itself formats them badly (I can't control that) 
             for existingExpression in self.existingProjectData[1]:          # iterate over linked expression 
-                name = self.databaseRef.readSQLQuery(f"SELECT expressionName from Expressions WHERE expressionID = {existingExpression[0]}") # get the name of the expression
+                name = self.databaseRef.readSQLQuery("SELECT expressionName from Expressions WHERE expressionID = ?", (existingExpression[0],)) # get the name of the expression
                 self.addExpression(existingExpression[0], name[0][0])       # add the expression to the table (existingExpression[0] is the ID and name[0][0] will be the name)
                 formattedProjects.append(existingExpression[0])
             
@@ -812,7 +805,7 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
 
         # get all the projects this expression is linked to
         partOfProjects = self.databaseRef.readSQLQuery(
-            f"SELECT Projects.* FROM Projects INNER JOIN ProjHandler ON Projects.ProjectID = ProjHandler.projectID WHERE ProjHandler.expressionID = {exprID}"
+            "SELECT Projects.* FROM Projects INNER JOIN ProjHandler ON Projects.ProjectID = ProjHandler.projectID WHERE ProjHandler.expressionID = ?", (exprID,)
         )
         
         # neatly format this SQL query
@@ -842,7 +835,7 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
     
     def addExpression(self, exprID, exprName):
         partOfProjects = self.databaseRef.readSQLQuery(
-            f"SELECT Projects.* FROM Projects INNER JOIN ProjHandler ON Projects.ProjectID = ProjHandler.projectID WHERE ProjHandler.expressionID = {exprID}"
+            "SELECT Projects.* FROM Projects INNER JOIN ProjHandler ON Projects.ProjectID = ProjHandler.projectID WHERE ProjHandler.expressionID = ?", (exprID,)
         )
         
         projectUsedString = ""          # initialise new empty output string
@@ -864,18 +857,17 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
     def onCreated(self):
         if self.mode == 1:
             projectName = self.projectNameBox.text() # ValidateText has already been working to ensure this is valid, no need to check again
-            SQLLinkQueries = [self.newProjectSQL.replace("PROJ_NAME",projectName).replace("DATE", databaseHandler.generateTimeStamp())]
+            self.databaseRef.execute(self.newProjectSQL, (projectName, databaseHandler.generateTimeStamp()), dontCommit=True)
 
             # For each expression used, add a new link in the ProjHandler table to link this new project with the expression
-            for i in range(self.outputTable.rowCount()):
-                SQLLinkQueries.append(self.linkExprSQL.replace("PROJ_ID", str(self.projectID)).replace("EXPR_ID",self.outputTable.item(i,0).text()))
+            links = [(self.projectID, int(self.outputTable.item(i,0).text())) for i in range(self.outputTable.rowCount())]
                 
-            # with all SQL queries now ready, run them in sequence. This works better becasue it means we cannot make half a project and then
+            # the project and its links are committed together. This works better becasue it means we cannot make half a project and then
             # crash, either everything works ok or the database is never changed. 
-            self.databaseRef.executeMultipleQueries(SQLLinkQueries)
+            self.databaseRef.executemany(self.linkExprSQL, links)
             
             # Check if this Project is empty
-            noOfProjects = self.databaseRef.readSQLQuery(f"SELECT ProjectID from ProjHandler WHERE ProjectID = {self.projectID}")
+            noOfProjects = self.databaseRef.readSQLQuery("SELECT ProjectID from ProjHandler WHERE ProjectID = ?", (self.projectID,))
             if not len(noOfProjects): # no Expressions in Project:
                 errorLogging.raiseInfoDlg("Warning! (Code 71)", "There are no Expressions linked to this Project!")
             
@@ -885,7 +877,7 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
         else:
             SQLtoExecute = []               # list of all queries that need to be executed
             if self.projectNameBox.text() != self.existingProjectData[0]:
-                SQLtoExecute.append(f"UPDATE Projects SET ProjectName = '{self.projectNameBox.text()}' WHERE ProjectID = {self.projectID}")
+                SQLtoExecute.append(("UPDATE Projects SET ProjectName = ? WHERE ProjectID = ?", (self.projectNameBox.text(), self.projectID)))
             
             # To find out what needs changing expression wise, convert the lists to sets so order doesn't matter
             # Then, existing - new gives the expressions to remove and new - existing gives those to add
@@ -901,18 +893,18 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
             # existing - new gives the Expressions that were in the Project but no longer are
             for element in existingSet.difference(newSet):
                 # add the SQL query to remove the link
-                SQLtoExecute.append(f"DELETE FROM ProjHandler WHERE ProjectID = {self.projectID} AND ExpressionID = {element}")
+                SQLtoExecute.append(("DELETE FROM ProjHandler WHERE ProjectID = ? AND ExpressionID = ?", (self.projectID, element)))
             
             # new - existing gives the Expressions that weren't in the Project but now are
             for element in newSet.difference(existingSet):
                 # add the SQL query to insert a new Project-Expression link
-                SQLtoExecute.append(f"INSERT INTO ProjHandler (ProjectID, ExpressionID) VALUES ({self.projectID}, {element})")
+                SQLtoExecute.append((self.linkExprSQL, (self.projectID, element)))
             
             # Execute all of these queries concurrently to ensure that no corruption occurs
             self.databaseRef.executeMultipleQueries(SQLtoExecute)
             # we're done with this window, so close it
             
-            noOfProjects = self.databaseRef.readSQLQuery(f"SELECT ProjectID from ProjHandler WHERE ProjectID = {self.projectID}")
+            noOfProjects = self.databaseRef.readSQLQuery("SELECT ProjectID from ProjHandler WHERE ProjectID = ?", (self.projectID,))
             if not len(noOfProjects): # no Expressions in Project:
                 errorLogging.raiseInfoDlg("Warning! (Code 71)", "There are no Expressions linked to this Project!")
             
@@ -929,12 +921,7 @@ class NewProjectEditorWindow(QtWidgets.QMainWindow):
         self.outputTable.removeRow(self.outputTable.currentRow())
     
     def saveExpression(self, expressionID:int, expressionData:dict):
-        self.databaseRef.executeSQLQuery(f""""
-        UPDATE Expressions
-        SET expressionData = \'{json.dumps(expressionData)}\', lastUpdated = {datetime.datetime().now()}
-        WHERE expressionID = {expressionID}
-        """
-        )
+        self.databaseRef.saveExpression(expressionID, json.dumps(expressionData))
     
     def validateText(self):
         # if any of the characters are not alphanumeric or a '_'
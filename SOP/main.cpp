@@ -297,13 +297,37 @@ std::vector<ParseTerm> applyBooleanIdentities(std::vector<ParseTerm> exprIn, std
 	return exprOut; // else we cannot simplify further, return what we've got
 }
 
-const char* sumOfProducts(const char* truthTable, const int rowWidth) {
+/*
+###                Struct: SOPResultHolder          ###
+Use: the SOPResult handed to Python only has pointers to the expression and identity log, so this owns the strings
+those pointers point into. Python only ever sees the SOPResult part and passes it back to freeSOPResult when done.
+---
+Visible to dll (external): No (only as a SOPResult)
+*/
+struct SOPResultHolder : SOPResult {
+	std::string expressionString;
+	std::string identitiesString;
+
+	void setResult(int newStatus, const std::string &expr, const std::string &identityLog, int passCount) {
+		expressionString = expr;
+		identitiesString = identityLog;
+		status = newStatus;
+		passes = passCount;
+		// the pointers are only taken once the strings have their final contents, so they can't be moved afterwards
+		expression = expressionString.c_str();
+		expressionLength = (int)expressionString.size();
+		identities = identitiesString.c_str();
+		identitiesLength = (int)identitiesString.size();
+	}
+};
+
+void generateSumOfProducts(const char* truthTable, const int rowWidth, SOPResultHolder &resultOut) {
 	/*
-	FUNCTION:		sumOfProducts
-	INPUTS:			truth table (string), rowWidth (integer)
-	OUTPUTS:		boolean expression (string)
+	FUNCTION:		generateSumOfProducts
+	INPUTS:			truth table (string), rowWidth (integer), result to fill in
+	OUTPUTS:		boolean expression (string) and status, written into resultOut
 	CALLS:			N/A
-	VISIBLE TO DLL: yes
+	VISIBLE TO DLL: no (see sumOfProducts, sumOfProductsToBuffer and sumOfProductsResult)
 
 	EXPLANATION:
 
@@ -315,7 +339,8 @@ const char* sumOfProducts(const char* truthTable, const int rowWidth) {
 
 	if (strlen(truthTable) % rowWidth) {
 		// check if the truth table is complete. This will be called if there is extra data supplied.
-		return " @@0@@ERROR: TRUTH TABLE IS NOT CONSISTENT";
+		resultOut.setResult(SOP_STATUS_INVALID_INPUT, " ", "ERROR: TRUTH TABLE IS NOT CONSISTENT", 0);
+		return;
 	}
 	int rows = strlen(truthTable) / rowWidth;
 
@@ -323,9 +348,7 @@ const char* sumOfProducts(const char* truthTable, const int rowWidth) {
 	// wide then there will be 10 rows in the truth table.
 
 	std::vector<std::vector<bool>> _truthTable;				// truth table 2D array
-	static std::string output = "";							// the SOP output
-	output.erase(output.begin(), output.end());				// we need to return a static string, but if this has been called before output will already have a value. 
-	// therefore, the contents of output is completely erased.
+	std::string output = "";								// the SOP output. this is local so that several threads can generate at once
 	std::string termOutput = "";							// each term in the output
 	bool nextValue;											// next term to evaluate 
 
@@ -374,12 +397,59 @@ const char* sumOfProducts(const char* truthTable, const int rowWidth) {
 		output = "0";		// so therefore Q=0 (a constant value).
 	}
 	
-	// Now we have sucesfully generated the SOP, we need to package the SOP back into the string to tell Python that 
+	// Now we have sucesfully generated the SOP, we need to package the SOP back up to tell Python that 
 	// generation was successfull and that no errors occurred. 
-	
-	output += "@@1@@Sucessfully Generated SOP";
-	// Format of output is SOP_STRING@@SUCCESS@@OTHER_MESSAGES where @@ is used to seperate.
-	return output.c_str(); // return the final SOP string back to the Python program.
+	resultOut.setResult(SOP_STATUS_OK, output, "Sucessfully Generated SOP", 0);
+}
+
+void generateSumOfProductsPacked(const unsigned char* outputs, const int noVars, SOPResultHolder &resultOut) {
+	/*
+	FUNCTION:		generateSumOfProductsPacked
+	INPUTS:			output column (packed bits), number of variables, result to fill in
+	OUTPUTS:		boolean expression (string) and status, written into resultOut
+	CALLS:			N/A
+	VISIBLE TO DLL: no (see sumOfProductsPacked)
+
+	EXPLANATION:
+
+	Same as generateSumOfProducts but the truth table is only the output column, with the output of row i in bit
+	(i % 8) of byte (i / 8). The inputs of row i are the binary value of i (A is the most significant bit), so they are
+	worked out from the row number instead of being sent over and unpacked into a 2D array.
+
+	*/
+
+	if (noVars < 0 || noVars > (int)ALPHABET.size()) {
+		resultOut.setResult(SOP_STATUS_INVALID_INPUT, " ", "ERROR: TRUTH TABLE HAS AN INVALID NUMBER OF VARIABLES", 0);
+		return;
+	}
+	int rows = 1 << noVars;
+	int onesCount = 0;										// rows with an output of 1
+	std::string output = "";
+
+	for (int row = 0; row < rows; row++) {
+		if (!((outputs[row >> 3] >> (row & 7)) & 1)) {
+			continue;										// output is 0 so this row isn't part of the expression
+		}
+		onesCount++;
+		for (int col = 0; col < noVars; col++) {
+			output += ALPHABET[col];
+			if (!((row >> (noVars - 1 - col)) & 1)) {		// this input is 0 in this row so it needs a NOT
+				output += "#";
+			}
+		}
+		output += "+";
+	}
+
+	if (onesCount == rows) {
+		output = "1";		// every row gives an output of 1 so Q=1 as a constant value
+	}
+	else if (onesCount == 0) {
+		output = "0";		// there is no row that causes Q=1 so Q=0 (a constant value)
+	}
+	else {
+		output.pop_back();	// remove the extra + at the end
+	}
+	resultOut.setResult(SOP_STATUS_OK, output, "Sucessfully Generated SOP", 0);
 }
 
 std::string reverseString(std::string strToReverse) {
@@ -428,8 +498,10 @@ std::vector<std::any> tokeniseInput(std::string exprIn) {
 	return tokenisedOutput;
 }
 
-const char* simplifyBooleanExpr(const char* boolExprIn) {
-	/* Process:
+void generateSimplifiedExpr(const char* boolExprIn, SOPResultHolder &resultOut) {
+	/* Not visible to dll, see simplifyBooleanExpr, simplifyBooleanExprToBuffer and simplifyBooleanExprResult.
+	
+	Process:
 		1. The string has # after a variable to indicate that it is inverted (i.e. Not A = A#). However, it is
 		much easier to process if the # comes before. Therefore, the string is reversed.
 
@@ -445,21 +517,18 @@ const char* simplifyBooleanExpr(const char* boolExprIn) {
 		5. data returned
 	*/
 
-	static std::string output = "";
-	output.erase(output.begin(), output.end());				// we need to return a static string, but if this has been called before output will already have a value.
-					
-	static std::string errorReturnString;					// as above, but this string is used if we have an error during the process
-	errorReturnString.erase(errorReturnString.begin(), errorReturnString.end());	// erase the contents of the string to ensure it's empty
+	std::string output = "";								// local rather than static so that several threads can simplify at once
 
 	// This regex checks if the input expression is in SOP format. For an explanation of how this regex works, see the design section.
-	std::regex inputValidator("((([A-Z]+[#]?)+)[+]?)*[#,A-Z]$");
+	// It is only compiled on the first call (static), building a std::regex costs more than matching a short expression.
+	static const std::regex inputValidator("((([A-Z]+[#]?)+)[+]?)*[#,A-Z]$");
 	std::smatch regexOutput;
 
 	std::string boolExprInString = boolExprIn;				// we have to convert explicity from const char * to std::string
 
 	if (!std::regex_match(boolExprInString, regexOutput, inputValidator)) {	// The input string doesn't match the validation regex
-		errorReturnString = ("0@@0@@Input string |" + boolExprInString + "| is not valid."); // generate the debug error message
-		return { errorReturnString.c_str()};	// stop execution and return error
+		resultOut.setResult(SOP_STATUS_INVALID_INPUT, "0", "Input string |" + boolExprInString + "| is not valid.", 0); // generate the debug error message
+		return;									// stop execution and return error
 	}
 	
 	std::string reversedExpr = reverseString(boolExprIn);
@@ -472,7 +541,6 @@ const char* simplifyBooleanExpr(const char* boolExprIn) {
 	std::string identityDebugString = "";					// debug output for user
 	int identityPassesCompleted = 0;						// amount of simplifacation rounds we have done
 
-	output = "1@@";											// just a quirk of static strings means that it's easier to assume its all gone correctly and then say otherwise
 	
 	
 	for (std::any tok : tokenisedExpr) {					// for every token in the tokenised expression, repeat this
@@ -499,16 +567,15 @@ const char* simplifyBooleanExpr(const char* boolExprIn) {
 			catch (std::bad_any_cast) {
 				// Something has gone _very_ wrong to get here - the term was neither variable nor operator
 				// This means the input has been corrupted.
-				std::string errorLog = "NULL@@0@@Tokens not generated correctly!" + std::string(boolExprIn) ;
+				std::string errorLog = "Tokens not generated correctly!" + std::string(boolExprIn) ;
 
 				for (auto& errorTok : tokenisedExpr) {
 					int i = (int)&errorTok;
 					errorLog += "TokGEN: " + std::any_cast<ParseToken>(errorTok).getData() + std::to_string(i);
 				}
 				errorLog += "TokGEN - TokMG: " + std::any_cast<ParseToken>(tok).getData();
-				const char* returner = errorLog.c_str();
-
-				return { returner };
+				resultOut.setResult(SOP_STATUS_INTERNAL_ERROR, "0", errorLog, 0);
+				return;
 			}
 		}
 	}
@@ -532,13 +599,176 @@ const char* simplifyBooleanExpr(const char* boolExprIn) {
 		output += term.getString();
 		output += "+";
 	}
-	output.pop_back();
-	
-	if (output=="1@@") {		// if the size of the output is 0, then the output isn't dependant on any of the variables -> output is always 1
-		output = "1@@1";
-			// 1@@" + identityDebugString + "@@" + std::to_string(identityPassesCompleted)); // add the debug info to the string (since we have successfully got to here)
+	if (output.size() > 0) {
+		output.pop_back();	// remove the extra + at the end
 	}
-	output += ("@@" + identityDebugString + "@@" + std::to_string(identityPassesCompleted)); // add the debug info to the string (since we have successfully got to here)
-	
-	return output.c_str(); 
+	else {					// if the size of the output is 0, then the output isn't dependant on any of the variables -> output is always 1
+		output = "1";
+	}
+	// add the debug info to the result (since we have successfully got to here)
+	resultOut.setResult(SOP_STATUS_OK, output, identityDebugString, identityPassesCompleted);
+}
+
+std::string formatSumOfProducts(const SOPResultHolder &result) {
+	// original string format for the SOP generator: SOP_STRING@@SUCCESS@@OTHER_MESSAGES where @@ is used to seperate.
+	return result.expressionString + "@@" + std::to_string(result.status) + "@@" + result.identitiesString;
+}
+
+std::string formatSimplifiedExpr(const SOPResultHolder &result) {
+	// original string format for the simplifier: STATUS@@EXPRESSION@@IDENTITIES@@PASSES, or STATUS@@0@@ERROR on failure
+	// where an internal error has the status NULL
+	if (result.status == SOP_STATUS_OK) {
+		return "1@@" + result.expressionString + "@@" + result.identitiesString + "@@" + std::to_string(result.passes);
+	}
+	std::string status = (result.status == SOP_STATUS_INVALID_INPUT) ? "0" : "NULL";
+	return status + "@@0@@" + result.identitiesString;
+}
+
+int copyToBuffer(const std::string& result, char* buffer, const int bufferSize) {
+	/*
+	Copies a result into a buffer owned by the caller (including the null terminator). If the buffer is too small
+	nothing is copied. Either way the length of the result is returned, so the caller can compare it against the
+	size of its buffer and call again with a bigger one.
+	*/
+	int resultLength = (int)result.size();
+	if (buffer != nullptr && resultLength < bufferSize) {
+		memcpy(buffer, result.c_str(), resultLength + 1);
+	}
+	return resultLength;
+}
+
+const char* sumOfProducts(const char* truthTable, const int rowWidth) {
+	/*
+	Original export kept for older versions of the Python program. The result lives in a static string so it is only
+	valid until the next call and two threads calling at once will overwrite each other - use sumOfProductsToBuffer.
+	*/
+	static std::string output = "";
+	SOPResultHolder result;
+	generateSumOfProducts(truthTable, rowWidth, result);
+	output = formatSumOfProducts(result);
+	return output.c_str();
+}
+
+int sumOfProductsToBuffer(const char* truthTable, const int rowWidth, char* buffer, const int bufferSize) {
+	// reentrant version of sumOfProducts: writes SOP_STRING@@SUCCESS@@OTHER_MESSAGES into the caller's buffer
+	SOPResultHolder result;
+	generateSumOfProducts(truthTable, rowWidth, result);
+	return copyToBuffer(formatSumOfProducts(result), buffer, bufferSize);
+}
+
+SOPResult* sumOfProductsResult(const char* truthTable, const int rowWidth) {
+	// structured version of sumOfProducts, the result must be given back to freeSOPResult once it has been read
+	SOPResultHolder* result = new SOPResultHolder();
+	generateSumOfProducts(truthTable, rowWidth, *result);
+	return result;
+}
+
+SOPResult* sumOfProductsPacked(const unsigned char* outputs, const int noVars) {
+	// sumOfProductsResult for a packed output column, the result must be given back to freeSOPResult once it has been read
+	SOPResultHolder* result = new SOPResultHolder();
+	generateSumOfProductsPacked(outputs, noVars, *result);
+	return result;
+}
+
+const char* simplifyBooleanExpr(const char* boolExprIn) {
+	// original export, same problems as sumOfProducts - use simplifyBooleanExprToBuffer
+	static std::string output = "";
+	SOPResultHolder result;
+	generateSimplifiedExpr(boolExprIn, result);
+	output = formatSimplifiedExpr(result);
+	return output.c_str();
+}
+
+int simplifyBooleanExprToBuffer(const char* boolExprIn, char* buffer, const int bufferSize) {
+	// reentrant version of simplifyBooleanExpr: writes STATUS@@EXPRESSION@@IDENTITIES@@PASSES into the caller's buffer
+	SOPResultHolder result;
+	generateSimplifiedExpr(boolExprIn, result);
+	return copyToBuffer(formatSimplifiedExpr(result), buffer, bufferSize);
+}
+
+SOPResult* simplifyBooleanExprResult(const char* boolExprIn) {
+	// structured version of simplifyBooleanExpr, the result must be given back to freeSOPResult once it has been read
+	SOPResultHolder* result = new SOPResultHolder();
+	generateSimplifiedExpr(boolExprIn, *result);
+	return result;
+}
+
+void freeSOPResult(SOPResult* result) {
+	// every SOPResult given to Python is really a SOPResultHolder, so deleting it as one frees the strings too
+	delete static_cast<SOPResultHolder*>(result);
+}
+
+/*
+###                Struct: SOPBatchHolder          ###
+Use: owns everything a batch call gives to Python - one array of SOPResults and one string holding all of their text
+back to back - so a whole batch is two allocations and a single call to freeSOPBatchResult.
+---
+Visible to dll (external): No (only as a SOPBatchResult)
+*/
+struct SOPBatchHolder : SOPBatchResult {
+	std::vector<SOPResult> resultArray;
+	std::string text;
+	std::vector<std::pair<size_t, size_t>> offsets;		// where each result's expression and identities start in text
+
+	void addResult(const SOPResultHolder &item) {
+		// copy one result into the batch, the pointers are only filled in by finish() once text stops growing
+		offsets.push_back({ text.size(), text.size() + item.expressionString.size() });
+		text += item.expressionString;
+		text += item.identitiesString;
+		SOPResult copy = {};
+		copy.status = item.status;
+		copy.passes = item.passes;
+		copy.expressionLength = item.expressionLength;
+		copy.identitiesLength = item.identitiesLength;
+		resultArray.push_back(copy);
+	}
+
+	void finish() {
+		for (size_t i = 0; i < resultArray.size(); i++) {
+			resultArray[i].expression = text.c_str() + offsets[i].first;
+			resultArray[i].identities = text.c_str() + offsets[i].second;
+		}
+		count = (int)resultArray.size();
+		results = resultArray.data();
+	}
+};
+
+SOPBatchResult* sumOfProductsPackedBatch(const unsigned char* outputs, const int* noVars, const int count) {
+	/*
+	sumOfProductsPacked for several truth tables in one call. The output columns are sent back to back, table i
+	taking (2^noVars[i] + 7) / 8 bytes. The same SOPResultHolder is reused for every table so its strings keep their
+	memory between tables.
+	*/
+	SOPBatchHolder* batch = new SOPBatchHolder();
+	batch->resultArray.reserve(count > 0 ? count : 0);
+	batch->offsets.reserve(count > 0 ? count : 0);
+	SOPResultHolder item;
+	size_t offset = 0;
+	for (int i = 0; i < count; i++) {
+		generateSumOfProductsPacked(outputs + offset, noVars[i], item);
+		batch->addResult(item);
+		if (noVars[i] >= 0 && noVars[i] <= (int)ALPHABET.size()) {
+			offset += (((size_t)1 << noVars[i]) + 7) / 8;
+		}
+	}
+	batch->finish();
+	return batch;
+}
+
+SOPBatchResult* simplifyBooleanExprBatch(const char* const* boolExprsIn, const int count) {
+	// simplifyBooleanExprResult for several expressions in one call, reusing one SOPResultHolder like the SOP batch
+	SOPBatchHolder* batch = new SOPBatchHolder();
+	batch->resultArray.reserve(count > 0 ? count : 0);
+	batch->offsets.reserve(count > 0 ? count : 0);
+	SOPResultHolder item;
+	for (int i = 0; i < count; i++) {
+		generateSimplifiedExpr(boolExprsIn[i], item);
+		batch->addResult(item);
+	}
+	batch->finish();
+	return batch;
+}
+
+void freeSOPBatchResult(SOPBatchResult* batch) {
+	delete static_cast<SOPBatchHolder*>(batch);
 }
@@ -6,6 +6,28 @@
 #define SOP_API __declspec(dllimport)
 #endif
 
+#define SOP_STATUS_INVALID_INPUT 0		// the input wasn't valid (bad truth table or expression)
+#define SOP_STATUS_OK 1					// generated successfully
+#define SOP_STATUS_INTERNAL_ERROR 2		// something went wrong inside the library
+
+struct SOPResult {
+	// Result of the structured exports. Python reads the strings straight out of the library's memory using the
+	// pointers and lengths, then gives the result back to freeSOPResult.
+	int status;					// one of the SOP_STATUS values above
+	int passes;					// simplification passes completed (always 0 for the SOP generator)
+	const char* expression;		// generated expression
+	int expressionLength;
+	const char* identities;		// identity log when successful, otherwise the error message
+	int identitiesLength;
+};
+
+struct SOPBatchResult {
+	// Result of the batch exports: count SOPResults in one array, in the same order as the inputs. The strings they
+	// point to belong to the batch, so the individual results must NOT be given to freeSOPResult.
+	int count;
+	SOPResult* results;
+};
+
 extern "C" SOP_API const char* sumOfProducts(const char* truthTable, const int rowWidth);
 //extern SOP_API const char* _sumOfProducts(std::vector<std::vector<bool>> truthTable);
 // This defines the function to the compiler so that it can be exported to a dll. 
@@ -13,3 +35,26 @@ extern "C" SOP_API const char* sumOfProducts(const char* truthTable, const int r
 
 extern "C" SOP_API const char * simplifyBooleanExpr(const char * boolExprIn);
 // This defines the function to the compiler so that it can be exported to a dll. 
+
+extern "C" SOP_API int sumOfProductsToBuffer(const char* truthTable, const int rowWidth, char* buffer, const int bufferSize);
+extern "C" SOP_API int simplifyBooleanExprToBuffer(const char* boolExprIn, char* buffer, const int bufferSize);
+// Reentrant versions of the functions above. The result is written into a buffer owned by the caller instead of a
+// static string, so they are safe to call from several threads at once. They return the length of the result and
+// only write to the buffer if it is big enough to hold it (plus the null terminator).
+
+extern "C" SOP_API SOPResult* sumOfProductsResult(const char* truthTable, const int rowWidth);
+extern "C" SOP_API SOPResult* simplifyBooleanExprResult(const char* boolExprIn);
+extern "C" SOP_API void freeSOPResult(SOPResult* result);
+// Structured versions that return a SOPResult instead of a string that has to be split on @@. Every result returned
+// must be freed with freeSOPResult exactly once.
+
+extern "C" SOP_API SOPResult* sumOfProductsPacked(const unsigned char* outputs, const int noVars);
+// SOP generator for a truth table sent as just its output column, one bit per row (row i is bit i % 8 of byte i / 8).
+// The inputs of each row are worked out from the row number. Free the result with freeSOPResult.
+
+extern "C" SOP_API SOPBatchResult* sumOfProductsPackedBatch(const unsigned char* outputs, const int* noVars, const int count);
+extern "C" SOP_API SOPBatchResult* simplifyBooleanExprBatch(const char* const* boolExprsIn, const int count);
+extern "C" SOP_API void freeSOPBatchResult(SOPBatchResult* batch);
+// Batch versions of sumOfProductsPacked and simplifyBooleanExprResult. One call handles a whole list of truth tables
+// (output columns back to back) or expressions, which saves the cost of a call per item. Free the batch with
+// freeSOPBatchResult once every result has been read.
@@ -0,0 +1,259 @@
+import time
+from SOP_QuineMcCluskey import parseSOPExpression, formatCover, popCount
+
+"""
+Espresso style heuristic two-level minimiser for wide truth tables (16+ variables) where exact methods take too long.
+
+Cubes use the same (mask, value) pairs as SOP_QuineMcCluskey. Sets of minterms (the ON-set, OFF-set, the area a cube
+covers etc.) are stored as Python integers used as bitmaps, where bit m is set if minterm m is in the set. This means
+"does this cube hit the OFF-set" is a single AND rather than a loop over every row of the table.
+
+The main loop is the standard one:
+    EXPAND      grow every cube as far as it can go without covering an OFF-set minterm (makes them prime)
+    IRREDUNDANT remove cubes that are completely covered by the other cubes
+    REDUCE      shrink every cube to the smallest cube that still covers the minterms only it covers
+and repeats until the cover stops getting cheaper or the time limit runs out. The cover is valid after every step so
+stopping early always returns a correct (just possibly larger) expression.
+
+The time limit is checked inside every step, not just between passes, as building the first cover alone can take far
+longer than the limit on a random 18+ variable table. A step that runs out of time keeps the rest of its cubes as they
+were. If the first cover isn't finished in half the time limit, the minterms left are covered by quickCover, which
+raises literals by looking them up in a byte table instead of doing bitmap operations over the whole table for every
+literal, and once the whole limit is used up just adds a cube for each minterm still left.
+"""
+
+DEFAULT_TIME_LIMIT = 5.0    # seconds simplifyBitmap is allowed to run for
+
+class EspressoSolver:
+    def __init__(self, onBits: int, dcBits: int, noVars: int):
+        self.noVars = noVars
+        self.fullBits = (1 << (1 << noVars)) - 1            # every minterm in the table
+        self.onBits = onBits
+        self.offBits = self.fullBits & ~(onBits | dcBits)   # minterms that must not be covered
+
+        # varBits[p] has bit m set when bit p of minterm m is 1, used to find the smallest cube around a set of minterms
+        self.varBits = []
+        for p in range(noVars):
+            blockSize = 1 << p
+            bits = ((1 << blockSize) - 1) << blockSize  # blockSize 0s followed by blockSize 1s
+            length = blockSize * 2
+            while length < (1 << noVars):
+                bits |= bits << length
+                length *= 2
+            self.varBits.append(bits)
+
+    def cubeBits(self, mask: int, value: int) -> int:
+        # bitmap of every minterm covered by a cube
+        bits = 1 << value
+        for p in range(self.noVars):
+            if mask & (1 << p):
+                bits |= bits << (1 << p)
+        return bits
+
+    def raiseLiteral(self, cube: tuple[int, int, int], p: int) -> tuple[int, int, int]:
+        # remove variable p from the cube (e.g. AB# -> A when p is B) and return the new (mask, value, bits)
+        mask, value, bits = cube
+        if value & (1 << p):
+            bits |= bits >> (1 << p)
+        else:
+            bits |= bits << (1 << p)
+        return mask | (1 << p), value & ~(1 << p), bits
+
+    def supercube(self, bits: int) -> tuple[int, int, int]:
+        # smallest cube containing every minterm in bits
+        mask = 0
+        value = 0
+        for p in range(self.noVars):
+            hasOne = bits & self.varBits[p]
+            hasZero = bits & ~self.varBits[p]
+            if hasOne and hasZero:
+                mask |= 1 << p
+            elif hasOne:
+                value |= 1 << p
+        return mask, value, self.cubeBits(mask, value)
+
+    def expandCube(self, cube: tuple[int, int, int], targetBits: int) -> tuple[int, int, int]:
+        # raise literals until the cube is prime. literals that would pull in the most of targetBits (minterms that
+        # still need covering) are tried first. if a literal can't be raised now it never can, because the cube only
+        # gets bigger, so one pass is enough.
+        candidates = []
+        for p in range(self.noVars):
+            if cube[0] & (1 << p):
+                continue
+            raised = self.raiseLiteral(cube, p)
+            if not raised[2] & self.offBits:
+                candidates.append(((raised[2] & targetBits).bit_count(), p))
+
+        for _, p in sorted(candidates, reverse=True):
+            raised = self.raiseLiteral(cube, p)
+            if not raised[2] & self.offBits:
+                cube = raised
+        return cube
+
+    def initialCover(self, deadline: float = None) -> tuple[list[tuple[int, int, int]], int]:
+        # build a prime cover straight from the ON-set by expanding the lowest uncovered minterm until nothing is left.
+        # this avoids ever creating one cube per minterm, which would be millions of cubes at 22 variables.
+        # returns the cover and a bitmap of the ON-set minterms it doesn't cover yet (0 unless deadline passed)
+        cover = []
+        remaining = self.onBits
+        while remaining:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            minterm = (remaining & -remaining).bit_length() - 1
+            cube = self.expandCube((0, minterm, 1 << minterm), remaining)
+            cover.append(cube)
+            remaining &= ~cube[2]
+        return cover, remaining
+
+    def quickCover(self, remaining: int, deadline: float) -> list[tuple[int, int]]:
+        # cover the minterms in remaining when initialCover has run out of time. each minterm is grown by raising
+        # literals in order (not best first) and the OFF-set is checked one minterm at a time in a table with a byte per
+        # minterm (b"1" if it's set), so the cost depends on the size of the cube rather than the size of the table. the
+        # cubes are prime but not as good as initialCover's. after deadline every minterm left gets its own cube.
+        size = 1 << self.noVars
+        offRows = format(self.offBits, f"0{size}b")[::-1].encode()
+        remainingRows = bytearray(format(remaining, f"0{size}b")[::-1].encode())
+        cover = []
+        minterm = remainingRows.find(b"1")
+        while minterm >= 0:
+            if time.perf_counter() > deadline:
+                cover += [(0, m) for m in range(minterm, size) if remainingRows[m] == ord("1")]
+                break
+            minterms = [minterm]
+            mask = 0
+            for p in range(self.noVars):
+                raisedMinterms = [m ^ (1 << p) for m in minterms]
+                if ord("1") not in map(offRows.__getitem__, raisedMinterms):
+                    minterms += raisedMinterms
+                    mask |= 1 << p
+            for m in minterms:
+                remainingRows[m] = ord("0")
+            cover.append((mask, minterm & ~mask))
+            minterm = remainingRows.find(b"1", minterm + 1)
+        return cover
+
+    def expand(self, cover: list[tuple[int, int, int]], deadline: float = None) -> list[tuple[int, int, int]]:
+        # biggest cubes first, skipping any cube that an earlier expanded cube has swallowed.
+        # once deadline passes the rest of the cubes are kept as they are
+        cover = sorted(cover, key=lambda cube: popCount(cube[0]), reverse=True)
+        expanded = []
+        expandedBits = 0
+        for i, cube in enumerate(cover):
+            if deadline is not None and time.perf_counter() > deadline:
+                return expanded + cover[i:]
+            if not cube[2] & ~expandedBits:
+                continue
+            cube = self.expandCube(cube, self.onBits & ~expandedBits)
+            expanded.append(cube)
+            expandedBits |= cube[2]
+        return expanded
+
+    def coveredTwice(self, cover: list[tuple[int, int, int]]) -> int:
+        # bitmap of minterms covered by at least 2 cubes
+        once = twice = 0
+        for cube in cover:
+            twice |= once & cube[2]
+            once |= cube[2]
+        return twice
+
+    def irredundant(self, cover: list[tuple[int, int, int]], deadline: float = None) -> list[tuple[int, int, int]]:
+        # a cube is redundant if every minterm it covers is also covered by another cube. smallest cubes are removed
+        # first. twice is only ever shrunk when a cube is removed, so it never claims a minterm is double covered when it
+        # isn't and removing cubes can't leave a hole. once deadline passes the rest of the cubes are all kept.
+        twice = self.coveredTwice(cover)
+        kept = []
+        cover = sorted(cover, key=lambda cube: popCount(cube[0]))
+        for i, cube in enumerate(cover):
+            if deadline is not None and time.perf_counter() > deadline:
+                return kept + cover[i:]
+            if not cube[2] & ~twice & self.onBits:
+                twice &= ~cube[2]
+            else:
+                kept.append(cube)
+        return kept
+
+    def reduce(self, cover: list[tuple[int, int, int]], deadline: float = None) -> list[tuple[int, int, int]]:
+        # shrink each cube to the supercube of the ON-set minterms only it covers, so the next EXPAND can grow it in a
+        # different direction. uses the same conservative twice bitmap as irredundant. once deadline passes the rest of
+        # the cubes are kept as they are.
+        twice = self.coveredTwice(cover)
+        reduced = []
+        cover = sorted(cover, key=lambda cube: popCount(cube[0]), reverse=True)
+        for i, cube in enumerate(cover):
+            if deadline is not None and time.perf_counter() > deadline:
+                return reduced + cover[i:]
+            uniqueBits = cube[2] & ~twice & self.onBits
+            if not uniqueBits:
+                # everything this cube covers is covered elsewhere
+                twice &= ~cube[2]
+                continue
+            newCube = self.supercube(uniqueBits)
+            twice &= ~(cube[2] & ~newCube[2])
+            reduced.append(newCube)
+        return reduced
+
+def coverCost(cover) -> tuple[int, int]:
+    # fewer cubes is better, then fewer literals (eliminated variables are the 1 bits in the mask)
+    return len(cover), -sum(popCount(cube[0]) for cube in cover)
+
+def mintermBitmap(minterms) -> int:
+    # turns a list of minterms into a bitmap, done through a bytearray since adding up 1 << m is very slow
+    minterms = list(minterms)
+    if not minterms:
+        return 0
+    table = bytearray((max(minterms) >> 3) + 1)
+    for m in minterms:
+        table[m >> 3] |= 1 << (m & 7)
+    return int.from_bytes(table, "little")
+
+def simplifyBitmap(onBits: int, noVars: int, dcBits: int = 0, timeLimit: float = DEFAULT_TIME_LIMIT, progressCallback=None) -> tuple[list[tuple[int, int]], str, int]:
+    # returns the cover as (mask, value) pairs, a debug string and the number of passes of the main loop.
+    # progressCallback(passes) is called before every pass.
+    if not onBits:
+        return [], "Predefined constant result", 0
+
+    startTime = time.perf_counter()
+    deadline = startTime + timeLimit
+    solver = EspressoSolver(onBits, dcBits, noVars)
+
+    cover, remaining = solver.initialCover(startTime + timeLimit / 2)
+    if remaining:
+        # initialCover is too slow for this table, so the rest is done by quickCover and returned without IRREDUNDANT
+        cover = [(mask, value) for mask, value, _ in cover] + solver.quickCover(remaining, deadline)
+        return cover, f"ESPRESSO{{C{len(cover)}-TIMEOUT}}", 0
+
+    cover = solver.irredundant(cover, deadline)
+    passes = 0
+    while time.perf_counter() <= deadline:
+        if progressCallback:
+            progressCallback(passes)
+        passes += 1
+        newCover = solver.irredundant(solver.expand(solver.reduce(cover, deadline), deadline), deadline)
+        if coverCost(newCover) >= coverCost(cover):
+            break
+        cover = newCover
+    timedOut = time.perf_counter() > deadline
+
+    debugStr = f"ESPRESSO{{C{len(cover)}{'-TIMEOUT' if timedOut else ''}}}"
+    return [(mask, value) for mask, value, _ in cover], debugStr, passes
+
+def removeRedundantCubes(cover: list[tuple[int, int]], onBits: int, dcBits: int, noVars: int) -> list[tuple[int, int]]:
+    # IRREDUNDANT on its own, for a cover made some other way. a cube that only covers don't cares is always removed
+    solver = EspressoSolver(onBits, dcBits, noVars)
+    kept = solver.irredundant([(mask, value, solver.cubeBits(mask, value)) for mask, value in cover])
+    return [(mask, value) for mask, value, _ in kept]
+
+def simplifyMinterms(minterms, noVars: int, dontCares=(), timeLimit: float = DEFAULT_TIME_LIMIT, progressCallback=None) -> tuple[list[tuple[int, int]], str, int]:
+    # same as simplifyBitmap but for a list of minterms (e.g. the rows of the Truth Table Editor set to 1)
+    return simplifyBitmap(mintermBitmap(minterms), noVars, mintermBitmap(dontCares), timeLimit, progressCallback)
+
+def simplifyBooleanExpr(strIn: str, timeLimit: float = DEFAULT_TIME_LIMIT) -> list[str]:
+    # same signature and return format as dllWrapper.simplifyBooleanExpr: [expression, identities, passes]
+    noVars, cubes = parseSOPExpression(strIn)
+    solver = EspressoSolver(0, 0, noVars)
+    onBits = 0
+    for mask, value in cubes:
+        onBits |= solver.cubeBits(mask, value)
+
+    cover, debugStr, passes = simplifyBitmap(onBits, noVars, timeLimit=timeLimit)
+    return [formatCover(cover, noVars), debugStr, str(passes)]
@@ -0,0 +1,206 @@
+import time
+from SOP_QuineMcCluskey import parseSOPExpression, expandCube, findPrimeImplicants, selectCover, formatCover, popCount, espressoCover, TooManyImplicants
+
+"""
+Exact minimum cover selection for the prime implicants found by SOP_QuineMcCluskey.
+
+The prime implicant chart has one row per minterm and one column per prime. It is first shrunk with the usual
+reductions (essential primes, row dominance and column dominance) and whatever is left (the cyclic core) is solved
+with branch-and-bound. The search starts from the greedy cover so there is always an answer, and if the deadline
+passes the best cover found so far is returned instead of the proven minimum.
+
+Rows and columns are stored as integer bitsets (rowCols[r] has bit c set if prime c covers minterm r and colRows[c]
+is the other way round), and the state of the search is just a pair of bitsets of the rows and columns still active.
+
+The time limit covers finding the primes as well. If they can't all be found in time (see
+SOP_QuineMcCluskey.findPrimeImplicants) the cover comes from Espresso instead, marked -TIMEOUT as it isn't minimal.
+"""
+
+DEFAULT_TIME_LIMIT = 2.0        # seconds allowed for finding the primes and the branch-and-bound search
+DOMINANCE_LIMIT = 2000          # skip the O(n^2) dominance checks on charts bigger than this
+
+class SearchTimeout(Exception):
+    # raised inside the search when the deadline has passed
+    pass
+
+def iterBits(x: int):
+    # yields the index of every 1 bit in x, lowest first
+    while x:
+        lowBit = x & -x
+        yield lowBit.bit_length() - 1
+        x ^= lowBit
+
+class CoverChart:
+    def __init__(self, primes: list[tuple[int, int]], minterms, noVars: int):
+        self.primes = primes
+        minterms = sorted(set(minterms))
+        rowIndex = {m: r for r, m in enumerate(minterms)}
+
+        self.rowCols = [0] * len(minterms)
+        self.colRows = [0] * len(primes)
+        for c, (mask, value) in enumerate(primes):
+            for m in expandCube(mask, value):
+                r = rowIndex.get(m)
+                if r is not None:
+                    self.rowCols[r] |= 1 << c
+                    self.colRows[c] |= 1 << r
+
+        # every term costs more than any number of literals, so fewer terms always wins and literals break ties
+        self.costs = [(noVars + 1) * (noVars + 1) + (noVars - popCount(mask)) for mask, _ in primes]
+
+        self.allRows = (1 << len(minterms)) - 1
+        self.allCols = (1 << len(primes)) - 1
+        self.deadline = None
+        self.bestCost = None
+        self.bestCols = None
+        self.nodes = 0
+        self.progressCallback = None    # called with no arguments every time the deadline is checked
+
+    def checkDeadline(self) -> None:
+        if time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if self.progressCallback:
+            self.progressCallback()
+
+    def coverCost(self, cols) -> int:
+        return sum(self.costs[c] for c in cols)
+
+    def reduce(self, rows: int, cols: int):
+        # apply the chart reductions until nothing changes. returns (rows, cols, forced columns) or None if some row
+        # can no longer be covered
+        forced = []
+        changed = True
+        while changed and rows:
+            changed = False
+
+            # essential columns: a row only one column covers
+            for r in iterBits(rows):
+                if not rows >> r & 1:
+                    continue    # already covered by an essential column taken this pass
+                rowCols = self.rowCols[r] & cols
+                if not rowCols:
+                    return None
+                if rowCols & (rowCols - 1) == 0:
+                    c = rowCols.bit_length() - 1
+                    forced.append(c)
+                    rows &= ~self.colRows[c]
+                    cols &= ~rowCols
+                    changed = True
+            if not rows:
+                break
+
+            activeRows = list(iterBits(rows))
+            activeCols = list(iterBits(cols))
+            if len(activeRows) > DOMINANCE_LIMIT or len(activeCols) > DOMINANCE_LIMIT:
+                break
+
+            # row dominance: if every column covering r1 also covers r2, covering r1 covers r2 for free
+            rowSets = sorted(((self.rowCols[r] & cols, r) for r in activeRows), key=lambda item: item[0].bit_count())
+            for i, (set1, r1) in enumerate(rowSets):
+                self.checkDeadline()
+                if not rows >> r1 & 1:
+                    continue
+                for set2, r2 in rowSets[i + 1:]:
+                    if rows >> r2 & 1 and not set1 & ~set2:
+                        rows &= ~(1 << r2)
+                        changed = True
+
+            # column dominance: a column covering a subset of another column's rows and costing at least as much is
+            # never needed
+            colSets = sorted(((self.colRows[c] & rows, c) for c in activeCols), key=lambda item: item[0].bit_count(), reverse=True)
+            for i, (set1, c1) in enumerate(colSets):
+                self.checkDeadline()
+                if not cols >> c1 & 1:
+                    continue
+                for set2, c2 in colSets[i + 1:]:
+                    if cols >> c2 & 1 and not set2 & ~set1 and self.costs[c1] <= self.costs[c2]:
+                        cols &= ~(1 << c2)
+                        changed = True
+
+        return rows, cols, forced
+
+    def lowerBound(self, rows: int, cols: int) -> int:
+        # rows that share no columns each need a different column, so the cheapest column of each is a lower bound
+        bound = 0
+        usedCols = 0
+        for rowCols, _ in sorted(((self.rowCols[r] & cols, r) for r in iterBits(rows)), key=lambda item: item[0].bit_count()):
+            if rowCols & usedCols:
+                continue
+            usedCols |= rowCols
+            bound += min(self.costs[c] for c in iterBits(rowCols))
+        return bound
+
+    def search(self, rows: int, cols: int, chosen: list[int], cost: int) -> None:
+        self.nodes += 1
+        self.checkDeadline()
+
+        reduced = self.reduce(rows, cols)
+        if reduced is None:
+            return
+        rows, cols, forced = reduced
+        chosen = chosen + forced
+        cost += self.coverCost(forced)
+
+        if not rows:
+            if cost < self.bestCost:
+                self.bestCost = cost
+                self.bestCols = chosen
+            return
+
+        if cost + self.lowerBound(rows, cols) >= self.bestCost:
+            return
+
+        # branch on the hardest row (fewest columns). one of its columns has to be in the cover, and once a column
+        # has been tried it is left out of the later branches so the same cover isn't searched twice.
+        branchRow = min(iterBits(rows), key=lambda r: (self.rowCols[r] & cols).bit_count())
+        options = sorted(iterBits(self.rowCols[branchRow] & cols), key=lambda c: (-(self.colRows[c] & rows).bit_count(), self.costs[c]))
+        for c in options:
+            self.search(rows & ~self.colRows[c], cols & ~(1 << c), chosen + [c], cost + self.costs[c])
+            cols &= ~(1 << c)
+
+    def solve(self, initialCols: list[int], timeLimit: float) -> bool:
+        # returns True if the cover found is proven to be the minimum
+        self.bestCols = initialCols
+        self.bestCost = self.coverCost(initialCols)
+        self.deadline = time.perf_counter() + timeLimit
+        try:
+            self.search(self.allRows, self.allCols, [], 0)
+        except (SearchTimeout, RecursionError):
+            return False
+        return True
+
+def exactCover(primes: list[tuple[int, int]], minterms, noVars: int, timeLimit: float = DEFAULT_TIME_LIMIT, progressCallback=None) -> tuple[list[tuple[int, int]], bool, int]:
+    # returns the chosen primes, whether they are proven minimal and the number of search nodes visited
+    greedyCover, _ = selectCover(primes, minterms)
+    primeIndex = {prime: c for c, prime in enumerate(primes)}
+
+    chart = CoverChart(primes, minterms, noVars)
+    chart.progressCallback = progressCallback
+    isOptimal = chart.solve([primeIndex[prime] for prime in greedyCover], timeLimit)
+    return [primes[c] for c in chart.bestCols], isOptimal, chart.nodes
+
+def simplifyMinterms(minterms, noVars: int, dontCares=(), timeLimit: float = DEFAULT_TIME_LIMIT, progressCallback=None) -> tuple[list[tuple[int, int]], str, int]:
+    # full simplification of a list of minterms, returns the cover, a debug string and the number of passes.
+    # progressCallback(passes) is called every prime implicant round and regularly during the cover search.
+    minterms = set(minterms)
+    if not minterms:
+        return [], "Predefined constant result", 0
+    deadline = time.perf_counter() + timeLimit
+    try:
+        primes, passes = findPrimeImplicants(minterms, noVars, dontCares, progressCallback, deadline)
+    except TooManyImplicants as e:
+        cover, _, espressoPasses = espressoCover(minterms, noVars, dontCares, deadline, progressCallback)
+        return cover, f"EXACT-ESPRESSO{{C{len(cover)}-TIMEOUT}}", e.passes + espressoPasses
+    searchCallback = (lambda: progressCallback(passes)) if progressCallback else None
+    cover, isOptimal, nodes = exactCover(primes, minterms, noVars, max(0.0, deadline - time.perf_counter()), searchCallback)
+    return cover, f"EXACT{{P{len(primes)}-N{nodes}-C{len(cover)}{'' if isOptimal else '-TIMEOUT'}}}", passes
+
+def simplifyBooleanExpr(strIn: str, timeLimit: float = DEFAULT_TIME_LIMIT) -> list[str]:
+    # same signature and return format as dllWrapper.simplifyBooleanExpr: [expression, identities, passes]
+    noVars, cubes = parseSOPExpression(strIn)
+    minterms = set()
+    for mask, value in cubes:
+        minterms.update(expandCube(mask, value))
+
+    cover, debugStr, passes = simplifyMinterms(minterms, noVars, timeLimit=timeLimit)
+    return [formatCover(cover, noVars), debugStr, str(passes)]
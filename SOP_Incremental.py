@@ -0,0 +1,123 @@
+import time
+from SOP_QuineMcCluskey import expandCube, findPrimeImplicants, popCount
+
+"""
+Prime implicants that are kept up to date as rows of a truth table change, so editing a few outputs and generating
+the expression again doesn't have to find every prime from scratch. Used by the Quine-McCluskey and exact engines,
+which only need the primes to pick a cover (see dllWrapper._simplifyTableIncrementally).
+
+The primes are (mask, value) cubes like SOP_QuineMcCluskey's, of the function f = the 1s and don't cares. Changing a
+row between 1 and don't care doesn't change f, so only the minterms given to the cover change. Otherwise:
+
+    row m added to f    every prime of the new f that isn't a prime of the old one contains m, so those are found by
+                        growing the cube m one variable at a time. old primes inside a new one are no longer prime.
+    row m taken out     primes that contain m aren't implicants any more. every new prime is inside one of them
+                        and misses m, so it contains one of its halves on the other side of m for some variable.
+                        each half is grown into every prime containing it.
+
+A cube can grow by a variable if the cube on the other side of that variable is all in f, and it's a prime once it
+can't grow by any. Past MAX_CHANGED_ROWS the primes are found from scratch instead.
+
+Finding them from scratch has the same limits as SOP_QuineMcCluskey.findPrimeImplicants, so creating an
+IncrementalPrimes for a table with too many can raise TooManyImplicants. Such a table isn't worth keeping primes for.
+"""
+
+MAX_CHANGED_ROWS = 64   # rows changed since the last table before rebuilding is quicker than updating
+
+ROW_OFF = 0
+ROW_ON = 1
+ROW_DONT_CARE = 2
+
+class IncrementalPrimes:
+    def __init__(self, table, progressCallback=None, timeLimit: float = None):
+        # table is a PackedTruthTable, progressCallback(passes) is called during the first merge, which raises
+        # TooManyImplicants if it takes longer than timeLimit seconds (None for no limit) or finds too many
+        self.noVars = table.noVars
+        self.fullMask = (1 << self.noVars) - 1
+        self.rows = bytearray(table.noRows)     # ROW_ value of every row, for quick lookups while growing cubes
+        for row in table.minterms():
+            self.rows[row] = ROW_ON
+        for row in table.dontCareRows():
+            self.rows[row] = ROW_DONT_CARE
+        deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+        primes, self.passes = findPrimeImplicants(table.minterms(), self.noVars, table.dontCareRows(), progressCallback, deadline)
+        self.primes = set(primes)
+        self.onBits = table.asInt()
+        self.dcBits = table.dontCaresAsInt()
+
+    def changedRows(self, table) -> int:
+        # number of rows that are different in table, or None if it's a different size
+        if table.noVars != self.noVars:
+            return None
+        return popCount((self.onBits ^ table.asInt()) | (self.dcBits ^ table.dontCaresAsInt()))
+
+    def update(self, table) -> int:
+        # bring the primes up to date with table, returns the number of rows that changed
+        onBits = table.asInt()
+        dcBits = table.dontCaresAsInt()
+        changed = (self.onBits ^ onBits) | (self.dcBits ^ dcBits)
+        noChanged = 0
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            row = bit.bit_length() - 1
+            self.setRow(row, ROW_DONT_CARE if dcBits & bit else (ROW_ON if onBits & bit else ROW_OFF))
+            noChanged += 1
+        self.onBits = onBits
+        self.dcBits = dcBits
+        return noChanged
+
+    def setRow(self, row: int, value: int) -> None:
+        wasInFunction = self.rows[row] != ROW_OFF
+        self.rows[row] = value
+        if value != ROW_OFF and not wasInFunction:
+            self._addRow(row)
+        elif value == ROW_OFF and wasInFunction:
+            self._removeRow(row)
+
+    def _isImplicant(self, mask: int, value: int) -> bool:
+        return all(self.rows[m] != ROW_OFF for m in expandCube(mask, value))
+
+    def _primesContaining(self, mask: int, value: int) -> set[tuple[int, int]]:
+        # every prime that contains the cube (mask, value), which must be an implicant
+        primes = set()
+        toGrow = [(mask, value)]
+        seen = {(mask, value)}
+        while toGrow:
+            mask, value = toGrow.pop()
+            isPrime = True
+            freeBits = self.fullMask & ~mask
+            while freeBits:
+                bit = freeBits & -freeBits
+                freeBits ^= bit
+                if not self._isImplicant(mask, value ^ bit):
+                    continue    # the other side of this variable isn't all in f
+                isPrime = False
+                grown = (mask | bit, value & ~bit)
+                if grown not in seen:
+                    seen.add(grown)
+                    toGrow.append(grown)
+            if isPrime:
+                primes.add((mask, value))
+        return primes
+
+    def _addRow(self, row: int) -> None:
+        newPrimes = self._primesContaining(0, row)
+        # old primes inside one of the new ones are no longer prime
+        self.primes = {(mask, value) for mask, value in self.primes
+                       if not any(mask & ~newMask == 0 and value & ~newMask == newValue for newMask, newValue in newPrimes)}
+        self.primes |= newPrimes
+
+    def _removeRow(self, row: int) -> None:
+        removed = [(mask, value) for mask, value in self.primes if row & ~mask == value]
+        self.primes.difference_update(removed)
+        halves = set()
+        for mask, value in removed:
+            freeBits = mask
+            while freeBits:
+                bit = freeBits & -freeBits
+                freeBits ^= bit
+                # the half of the old prime where this variable is the opposite of the row that was taken out
+                halves.add((mask & ~bit, value | (bit & ~row)))
+        for mask, value in halves:
+            self.primes |= self._primesContaining(mask, value)
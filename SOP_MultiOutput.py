@@ -0,0 +1,184 @@
+import heapq
+import time
+from SOP_QuineMcCluskey import expandCube, popCount, TooManyImplicants, CHECK_INTERVAL
+import SOP_Espresso
+
+"""
+Multi-output minimisation, for truth tables with several output columns (e.g. a decoder). Simplifying each output on
+its own can give every output its own copy of a term like AB#, where one AND gate could feed all of them. Here the
+outputs are simplified together so terms are shared wherever that makes the whole circuit smaller.
+
+Every implicant is a (mask, value) cube like SOP_QuineMcCluskey's plus a tag: a bitmask of the outputs the cube can be
+used in (output i is bit i). A minterm's tag is every output where it's a 1 or a don't care, and when two cubes merge
+the new cube's tag is the AND of theirs. A cube is only thrown away once a bigger cube can be used for every output it
+can, so the primes include the shared terms as well as the best term for each output on its own.
+
+The cover is picked greedily over (minterm, output) pairs, so a term that covers the same minterm in 2 outputs counts
+twice. Once the terms are picked each output keeps only the ones it needs.
+
+Tagged primes can run into millions for wide tables, so past MAX_IMPLICANTS or the time limit each output is
+simplified with Espresso instead and only terms that come out identical are shared. The tagged primes get half the
+time limit so the Espresso fallback always has the other half.
+"""
+
+MAX_IMPLICANTS = 1 << 18    # implicants in one round of the merge before giving up on the tagged primes
+
+def findMultiOutputPrimes(tags: dict[int, int], noVars: int, progressCallback=None, deadline: float = None) -> tuple[list[tuple[int, int, int]], int]:
+    # tags is minterm -> outputs it can be covered in, returns (mask, value, tag) primes and the number of rounds.
+    # the same merge as SOP_QuineMcCluskey.findPrimeImplicants but with a tag on every implicant, and it raises
+    # TooManyImplicants in the same way.
+    fullMask = (1 << noVars) - 1
+    current = {(0, m): tag for m, tag in tags.items()}
+    primes = []
+    passes = 0
+
+    def checkLimits(noImplicants: int) -> None:
+        if noImplicants > MAX_IMPLICANTS:
+            raise TooManyImplicants(passes)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TooManyImplicants(passes)
+        if progressCallback:
+            progressCallback(passes)
+
+    while current:
+        passes += 1
+        checkLimits(len(current))
+
+        groups : dict[int, dict[int, dict[int, int]]] = {}
+        for (mask, value), tag in current.items():
+            groups.setdefault(popCount(value), {}).setdefault(mask, {})[value] = tag
+
+        absorbed = set()    # implicants where a bigger implicant can be used in every output they can
+        nextRound = {}
+        tried = 0
+
+        for count, lowerGroup in groups.items():
+            upperGroup = groups.get(count + 1)
+            if not upperGroup:
+                continue
+            for mask, values in lowerGroup.items():
+                upperValues = upperGroup.get(mask)
+                if not upperValues:
+                    continue
+                for value, lowerTag in values.items():
+                    tried += 1
+                    if tried % CHECK_INTERVAL == 0:
+                        checkLimits(len(nextRound))
+                    freeBits = fullMask & ~(mask | value)
+                    while freeBits:
+                        bit = freeBits & -freeBits
+                        freeBits ^= bit
+                        upperTag = upperValues.get(value | bit)
+                        if upperTag is None:
+                            continue
+                        tag = lowerTag & upperTag
+                        if not tag:
+                            continue    # no output has both halves, so the bigger cube isn't an implicant of anything
+                        nextRound[(mask | bit, value)] = tag
+                        if tag == lowerTag:
+                            absorbed.add((mask, value))
+                        if tag == upperTag:
+                            absorbed.add((mask, value | bit))
+
+        primes += [(mask, value, tag) for (mask, value), tag in current.items() if (mask, value) not in absorbed]
+        current = nextRound
+
+    return primes, passes
+
+def selectMultiOutputCover(primes: list[tuple[int, int, int]], onSets: list[set[int]], deadline: float = None) -> tuple[list[list[tuple[int, int]]], int]:
+    # pick primes so every 1 of every output is covered, returns the cover of each output and the number of essential
+    # primes. the same essential + greedy method as SOP_QuineMcCluskey.selectCover, over (minterm, output) pairs.
+    # raises TooManyImplicants(0) if deadline passes while the primes are being listed
+    noOutputs = len(onSets)
+    uncovered = {(m, i) for i, onSet in enumerate(onSets) for m in onSet}
+    coveredBy : dict[tuple[int, int], list[int]] = {row: [] for row in uncovered}
+    primeCovers = []
+    for p, (mask, value, tag) in enumerate(primes):
+        if deadline is not None and p % CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+            raise TooManyImplicants(0)
+        minterms = expandCube(mask, value)
+        covers = {(m, i) for i in range(noOutputs) if tag >> i & 1 for m in minterms if m in onSets[i]}
+        primeCovers.append(covers)
+        for row in covers:
+            coveredBy[row].append(p)
+
+    chosen = list(dict.fromkeys(primeIndices[0] for primeIndices in coveredBy.values() if len(primeIndices) == 1))
+    noEssential = len(chosen)
+    for p in chosen:
+        uncovered -= primeCovers[p]
+
+    gain = [len(covers & uncovered) for covers in primeCovers]
+    heap = [(-gain[p], -popCount(primes[p][0]), p) for p in range(len(primes)) if gain[p]]
+    heapq.heapify(heap)
+    while uncovered:
+        negGain, negSize, p = heapq.heappop(heap)
+        if -negGain != gain[p]:
+            if gain[p]:
+                heapq.heappush(heap, (-gain[p], negSize, p))
+            continue
+        chosen.append(p)
+        for row in primeCovers[p] & uncovered:
+            uncovered.discard(row)
+            for q in coveredBy[row]:
+                gain[q] -= 1
+
+    # give every output the chosen primes that cover any of its 1s, then drop the ones the others make redundant.
+    # smallest cubes go first so the bigger (often shared) terms are the ones kept
+    covers = []
+    for i, onSet in enumerate(onSets):
+        candidates = sorted((p for p in chosen if any(row[1] == i for row in primeCovers[p])), key=lambda p: popCount(primes[p][0]))
+        mintermsOf = {p: {m for m, output in primeCovers[p] if output == i} for p in candidates}
+        counts = {}
+        for p in candidates:
+            for m in mintermsOf[p]:
+                counts[m] = counts.get(m, 0) + 1
+        kept = []
+        for p in candidates:
+            if all(counts[m] > 1 for m in mintermsOf[p]):
+                for m in mintermsOf[p]:
+                    counts[m] -= 1
+            else:
+                kept.append(primes[p][:2])
+        covers.append(kept)
+    return covers, noEssential
+
+def sharedTermCount(covers: list[list[tuple[int, int]]]) -> int:
+    # number of different terms used by more than one output
+    uses = {}
+    for cover in covers:
+        for cube in set(cover):
+            uses[cube] = uses.get(cube, 0) + 1
+    return sum(1 for count in uses.values() if count > 1)
+
+def simplifyMultiOutput(onSets: list, noVars: int, dcSets: list = None, timeLimit: float = SOP_Espresso.DEFAULT_TIME_LIMIT, progressCallback=None) -> tuple[list[list[tuple[int, int]]], str, int]:
+    # onSets[i] and dcSets[i] are the minterms that are 1 and don't care in output i. returns the cover of every
+    # output, a debug string and the number of passes
+    startTime = time.perf_counter()
+    onSets = [set(onSet) for onSet in onSets]
+    dcSets = [set(dcSet) for dcSet in dcSets] if dcSets is not None else [set() for _ in onSets]
+
+    tags = {}
+    for i, (onSet, dcSet) in enumerate(zip(onSets, dcSets)):
+        for m in onSet | dcSet:
+            tags[m] = tags.get(m, 0) | 1 << i
+
+    deadline = startTime + timeLimit
+    sharedDeadline = startTime + timeLimit / 2
+    try:
+        primes, passes = findMultiOutputPrimes(tags, noVars, progressCallback, sharedDeadline)
+        covers, noEssential = selectMultiOutputCover(primes, onSets, sharedDeadline)
+    except TooManyImplicants as e:
+        # too wide to share terms exactly, simplify every output on its own and share any identical terms. every
+        # output gets an equal share of the time left
+        timedOut = time.perf_counter() > sharedDeadline
+        covers = []
+        passes = e.passes
+        for i, (onSet, dcSet) in enumerate(zip(onSets, dcSets)):
+            outputTimeLimit = max(0.0, deadline - time.perf_counter()) / (len(onSets) - i)
+            cover, debugStr, outputPasses = SOP_Espresso.simplifyMinterms(onSet, noVars, dcSet, outputTimeLimit, progressCallback)
+            covers.append(cover)
+            passes += outputPasses
+            timedOut = timedOut or "-TIMEOUT" in debugStr
+        return covers, f"MULTI-ESPRESSO{{C{sum(map(len, covers))}-S{sharedTermCount(covers)}{'-TIMEOUT' if timedOut else ''}}}", passes
+
+    return covers, f"MULTI{{P{len(primes)}-E{noEssential}-C{sum(map(len, covers))}-S{sharedTermCount(covers)}}}", passes
@@ -0,0 +1,268 @@
+import heapq
+import time
+import variableNames
+from variableNames import ALPHABET
+
+"""
+Bit-packed Quine-McCluskey simplifier. This is an alternative to the identity based simplifier in SOP.dll and
+takes/returns data in exactly the same way as dllWrapper.simplifyBooleanExpr so the two can be swapped freely.
+
+Every implicant is stored as a pair of integers (mask, value):
+    mask:  a 1 bit means this variable has been eliminated from the term (a "-" in the textbook notation)
+    value: the required value of every variable that hasn't been eliminated (eliminated bits are always 0)
+
+Variable A is the most significant bit, matching the row order of the Truth Table Editor. e.g. with 3 variables
+the term AC# is (mask=0b010, value=0b100). Python ints have no size limit so nothing here stops at 26 variables, the
+names past Z come from variableNames.py.
+
+Listing every prime implicant can take far too long: a big cube like GH in a 14 variable table has millions of
+smaller cubes inside it, and every one of them is an implicant in some round of the merge. So findPrimeImplicants
+gives up (TooManyImplicants) once it has more than MAX_IMPLICANTS or its deadline passes, and simplifyMinterms
+uses Espresso (SOP_Espresso.py) for the cover instead, like SOP_MultiOutput does.
+"""
+
+DEFAULT_TIME_LIMIT = 2.0    # seconds simplifyMinterms allows for finding the primes before using Espresso
+MAX_IMPLICANTS = 1 << 16    # implicants findPrimeImplicants can hold at once (this round's, the next round's and primes)
+CHECK_INTERVAL = 4096       # implicants tried between checks of the limits and calls of progressCallback in a round
+
+class TooManyImplicants(Exception):
+    # raised by findPrimeImplicants when a limit is hit, passes is the number of rounds started
+    def __init__(self, passes: int):
+        super().__init__(passes)
+        self.passes = passes
+
+def popCount(x: int) -> int:
+    # number of 1 bits in x
+    return bin(x).count("1")
+
+def parseSOPExpression(exprIn: str, noVars: int = 0, names: list[str] = None) -> tuple[int, list[tuple[int, int]]]:
+    # turns an SOP string (e.g. "AB#+C") into the number of variables used and a list of (mask, value) cubes.
+    # the number of variables is taken from the highest letter used, so "AC" is a 3 variable expression, unless a
+    # bigger noVars is given (e.g. the width of the truth table the expression came from). with a name table (see
+    # variableNames.py) the names are looked up in it and the expression has as many variables as there are names.
+    exprIn = exprIn.replace(" ", "")
+    if not exprIn:
+        raise ValueError(f"Input string |{exprIn}| is not valid.")
+
+    if names is not None or variableNames.isSeparated(exprIn):
+        # named or separated expression, see variableNames.py
+        parsedTerms = variableNames.parseLiterals(exprIn, names)
+        noVars = max([noVars, len(names or ())] + [variable + 1 for term in parsedTerms for variable, _ in term])
+        return noVars, _termsToCubes(parsedTerms, noVars)
+
+    parsedTerms = []    # each term as a list of (variable index, is inverted)
+    for term in exprIn.split("+"):
+        if not term or term[0] not in ALPHABET:
+            # empty term (e.g. "A++B") or a term starting with #
+            raise ValueError(f"Input string |{exprIn}| is not valid.")
+
+        literals = []
+        for char in term:
+            if char in ALPHABET:
+                literals.append([ALPHABET.index(char), False])
+                noVars = max(noVars, ALPHABET.index(char) + 1)
+            elif char == "#" and not literals[-1][1]:
+                # the # applies to the variable before it
+                literals[-1][1] = True
+            else:
+                # any other character (or ##) is invalid
+                raise ValueError(f"Input string |{exprIn}| is not valid.")
+        parsedTerms.append(literals)
+
+    return noVars, _termsToCubes(parsedTerms, noVars)
+
+def _termsToCubes(parsedTerms, noVars: int) -> list[tuple[int, int]]:
+    cubes = []
+    fullMask = (1 << noVars) - 1
+    for literals in parsedTerms:
+        careBits = 0
+        value = 0
+        isContradiction = False
+        for variable, isInverted in literals:
+            bit = 1 << (noVars - 1 - variable)
+            if careBits & bit and bool(value & bit) == isInverted:
+                # the term contains A and A# so it can never be true (AA# = 0)
+                isContradiction = True
+                break
+            careBits |= bit
+            if not isInverted:
+                value |= bit
+        if not isContradiction:
+            cubes.append((fullMask & ~careBits, value))
+    return cubes
+
+def expandCube(mask: int, value: int) -> list[int]:
+    # list every minterm covered by a cube, e.g. (0b010, 0b100) -> [0b100, 0b110]
+    minterms = [value]
+    bit = 1
+    while bit <= mask:
+        if mask & bit:
+            # every minterm so far appears once with this bit as 0 and once as 1
+            minterms += [m | bit for m in minterms]
+        bit <<= 1
+    return minterms
+
+def formatImplicant(mask: int, value: int, noVars: int, names: list[str] = None) -> str:
+    # turn a (mask, value) pair back into the term syntax used by the DLL, e.g. (0b010, 0b100) -> "AC#". past 26
+    # variables or with a name table the term is written by variableNames instead, e.g. "A*V30#"
+    if names is not None or noVars > len(ALPHABET):
+        literals = [(i, not value >> (noVars - 1 - i) & 1) for i in range(noVars) if not mask >> (noVars - 1 - i) & 1]
+        return variableNames.formatTerm(literals, noVars, names)
+    termOut = ""
+    for i in range(noVars):
+        bit = 1 << (noVars - 1 - i)
+        if mask & bit:
+            continue    # variable eliminated from this term
+        termOut += ALPHABET[i]
+        if not value & bit:
+            termOut += "#"
+    return termOut
+
+def formatCover(cover: list[tuple[int, int]], noVars: int, names: list[str] = None) -> str:
+    # join a list of implicants into an SOP expression
+    if not cover:
+        return "0"
+    if any(mask == (1 << noVars) - 1 for mask, _ in cover):
+        # one of the implicants covers every row so Q is always 1
+        return "1"
+    return "+".join(formatImplicant(mask, value, noVars, names) for mask, value in sorted(cover, key=lambda imp: (popCount(imp[0]), imp[1])))
+
+def findPrimeImplicants(minterms, noVars: int, dontCares=(), progressCallback=None, deadline: float = None,
+                        maxImplicants: int = MAX_IMPLICANTS) -> tuple[list[tuple[int, int]], int]:
+    # Repeatedly merges implicants whose values differ by exactly 1 bit until nothing else can be merged.
+    # Implicants are grouped by the number of 1s in their value so each group is only compared with the next one up,
+    # and rather than comparing every pair we look up "value with one extra bit set" in a dictionary, so each round
+    # is linear in the number of implicants. progressCallback(passes) is called at the start of every round and every
+    # CHECK_INTERVAL implicants within one (so it can cancel a long round). raises TooManyImplicants if more than
+    # maxImplicants are held at once (None for no limit) or time.perf_counter() passes deadline.
+    fullMask = (1 << noVars) - 1
+    current = {(0, m) for m in minterms} | {(0, m) for m in dontCares}
+    primes = []
+    passes = 0
+
+    def checkLimits(noImplicants: int) -> None:
+        if maxImplicants is not None and noImplicants > maxImplicants:
+            raise TooManyImplicants(passes)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TooManyImplicants(passes)
+        if progressCallback:
+            progressCallback(passes)
+
+    while current:
+        passes += 1
+        checkLimits(len(current) + len(primes))
+
+        # group the implicants by popcount, and within that by mask (only equal masks can merge)
+        groups : dict[int, dict[int, set[int]]] = {}
+        for mask, value in current:
+            groups.setdefault(popCount(value), {}).setdefault(mask, set()).add(value)
+
+        merged = set()      # implicants that were absorbed into a bigger one this round
+        nextRound = set()   # the bigger implicants generated this round
+        tried = 0
+
+        for count, lowerGroup in groups.items():
+            upperGroup = groups.get(count + 1)
+            if not upperGroup:
+                continue
+            for mask, values in lowerGroup.items():
+                upperValues = upperGroup.get(mask)
+                if not upperValues:
+                    continue
+                for value in values:
+                    tried += 1
+                    if tried % CHECK_INTERVAL == 0:
+                        checkLimits(len(current) + len(nextRound) + len(primes))
+                    # try setting each bit that is 0 and not eliminated
+                    freeBits = fullMask & ~(mask | value)
+                    while freeBits:
+                        bit = freeBits & -freeBits  # lowest set bit
+                        freeBits ^= bit
+                        if value | bit in upperValues:
+                            nextRound.add((mask | bit, value))
+                            merged.add((mask, value))
+                            merged.add((mask, value | bit))
+
+        primes += [imp for imp in current if imp not in merged]
+        current = nextRound
+
+    return primes, passes
+
+def selectCover(primes: list[tuple[int, int]], minterms) -> tuple[list[tuple[int, int]], int]:
+    # pick a small set of prime implicants that covers every minterm.
+    # essential primes (the only prime covering some minterm) are always taken, then the rest is covered greedily.
+    uncovered = set(minterms)
+    coveredBy : dict[int, list[int]] = {m: [] for m in uncovered}   # minterm -> indices of primes covering it
+    primeCovers = []                                                # prime index -> minterms it covers
+    for i, (mask, value) in enumerate(primes):
+        covers = {m for m in expandCube(mask, value) if m in uncovered}
+        primeCovers.append(covers)
+        for m in covers:
+            coveredBy[m].append(i)
+
+    chosen = []
+    for m, primeIndices in coveredBy.items():
+        if len(primeIndices) == 1:
+            chosen.append(primeIndices[0])
+    chosen = list(dict.fromkeys(chosen))   # remove duplicates but keep the order
+    noEssential = len(chosen)
+    for i in chosen:
+        uncovered -= primeCovers[i]
+
+    # take the prime that covers the most remaining minterms, preferring the one with the fewest literals.
+    # the scores only ever go down, so a heap with lazy re-scoring avoids rescanning every prime each time.
+    gain = [len(covers & uncovered) for covers in primeCovers]
+    heap = [(-gain[i], -popCount(primes[i][0]), i) for i in range(len(primes)) if gain[i]]
+    heapq.heapify(heap)
+    while uncovered:
+        negGain, negSize, i = heapq.heappop(heap)
+        if -negGain != gain[i]:
+            # out of date score, push it back with the real one
+            if gain[i]:
+                heapq.heappush(heap, (-gain[i], negSize, i))
+            continue
+        chosen.append(i)
+        for m in primeCovers[i] & uncovered:
+            uncovered.discard(m)
+            for j in coveredBy[m]:
+                gain[j] -= 1
+
+    return [primes[i] for i in chosen], noEssential
+
+def simplifyMinterms(minterms, noVars: int, dontCares=(), progressCallback=None, timeLimit: float = DEFAULT_TIME_LIMIT) -> tuple[list[tuple[int, int]], str, int]:
+    # full simplification of a list of minterms, returns the cover, a debug string and the number of passes
+    minterms = set(minterms)
+    if not minterms:
+        return [], "Predefined constant result", 0
+    deadline = time.perf_counter() + timeLimit
+    try:
+        primes, passes = findPrimeImplicants(minterms, noVars, dontCares, progressCallback, deadline)
+    except TooManyImplicants as e:
+        cover, debugStr, passes = espressoCover(minterms, noVars, dontCares, deadline, progressCallback)
+        return cover, f"QM-{debugStr}", e.passes + passes
+    cover, noEssential = selectCover(primes, minterms)
+    return cover, f"QM{{P{len(primes)}-E{noEssential}-C{len(cover)}}}", passes
+
+def espressoCover(minterms, noVars: int, dontCares, deadline: float, progressCallback=None) -> tuple[list[tuple[int, int]], str, int]:
+    # the cover from SOP_Espresso for when findPrimeImplicants gives up, with whatever time is left before deadline
+    # (with none left it's still a valid cover, just not improved)
+    import SOP_Espresso     # imported here as SOP_Espresso imports from this file
+    return SOP_Espresso.simplifyBitmap(rowsToBitmap(minterms, noVars), noVars, rowsToBitmap(dontCares, noVars),
+                                       max(0.0, deadline - time.perf_counter()), progressCallback)
+
+def rowsToBitmap(rows, noVars: int) -> int:
+    # list of rows -> integer with bit m set for every row m (the format SOP_Espresso uses)
+    bitmap = bytearray(((1 << noVars) + 7) // 8)
+    for m in rows:
+        bitmap[m >> 3] |= 1 << (m & 7)
+    return int.from_bytes(bitmap, "little")
+
+def simplifyBooleanExpr(strIn: str) -> list[str]:
+    # same signature and return format as dllWrapper.simplifyBooleanExpr: [expression, identities, passes]
+    noVars, cubes = parseSOPExpression(strIn)
+    minterms = set()
+    for mask, value in cubes:
+        minterms.update(expandCube(mask, value))
+
+    cover, debugStr, passes = simplifyMinterms(minterms, noVars)
+    return [formatCover(cover, noVars), debugStr, str(passes)]
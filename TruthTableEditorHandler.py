@@ -1,9 +1,106 @@
 from PyQt5 import QtWidgets, uic
 from PyQt5.QtWidgets import *
-from PyQt5.QtGui import QIcon
-import sys, csv, errorLogging, os
+from PyQt5.QtGui import QIcon, QColor, QValidator
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+import sys, errorLogging, os
+from functools import partial
+import truthTableFiles
+from packedTruthTable import PackedTruthTable, MultiOutputTruthTable, DONT_CARE
 
-ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+MAX_VARIABLES = 20      # 2^20 rows, the table view only ever draws the rows on screen so this is still quick to edit
+MAX_OUTPUTS = 16
+
+# Model for the table view in the Truth Table Editor. The data is a MultiOutputTruthTable so a row is 1 bit per output,
+# and the input columns are worked out from the row number when they are drawn. Only the output columns (the last ones)
+# can be edited, and each output is 0, 1 or X (don't care).
+class TruthTableModel(QAbstractTableModel):
+    def __init__(self, table: MultiOutputTruthTable, parent=None):
+        super().__init__(parent)
+        self.table = table
+
+    def setTable(self, table: MultiOutputTruthTable):
+        # swap in a new table (e.g. when the number of variables changes), the view only redraws what's visible
+        self.beginResetModel()
+        self.table = table
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.table.noRows
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        # one column per input variable and one per output
+        return 0 if parent.isValid() else self.table.noVars + self.table.noOutputs
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if col >= self.table.noVars:
+                return self.table.getValue(row, col - self.table.noVars)
+            # variable A is the most significant bit of the row number
+            return row >> (self.table.noVars - 1 - col) & 1
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole and col >= self.table.noVars:
+            # output boxes are white like the old spin boxes so it's clear which column is editable
+            return QColor("white")
+        return None
+
+    def setData(self, index: QModelIndex, value, role=Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole or index.column() < self.table.noVars:
+            return False
+        value = str(value).upper()
+        if value not in ("0", "1", DONT_CARE):
+            return False
+        self.table.setValue(index.row(), index.column() - self.table.noVars, value)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() >= self.table.noVars:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+        return Qt.ItemIsEnabled
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            # the names come from the file the table was loaded from, or are A, B, C... and Q (Q0, Q1... for several outputs)
+            if section < self.table.noVars:
+                return self.table.getNames()[section]
+            return self.table.getOutputNames()[section - self.table.noVars]
+        return str(section)
+
+# spin box for an output, 0, 1 and then X (don't care) which is stored as 2
+class OutputSpinBox(QSpinBox):
+    def textFromValue(self, value):
+        return DONT_CARE if value == 2 else str(value)
+
+    def valueFromText(self, text):
+        return 2 if text.upper() == DONT_CARE else int(text)
+
+    def validate(self, text, pos):
+        if text.upper() in ("0", "1", DONT_CARE):
+            return QValidator.Acceptable, text, pos
+        return (QValidator.Intermediate if not text else QValidator.Invalid), text, pos
+
+# editor for the output column, allows 0, 1 and X like the old spin boxes did 0 and 1
+class OutputDelegate(QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        editor = OutputSpinBox(parent)
+        editor.setRange(0, 2)
+        return editor
+
+    def setEditorData(self, editor, index):
+        value = index.data(Qt.EditRole)
+        editor.setValue(2 if value == DONT_CARE else int(value))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.textFromValue(editor.value()), Qt.EditRole)
 
 # pop up to load a CSV file 
 class CSVImportDialog(QDialog):
@@ -27,9 +124,15 @@ class CSVImportDialog(QDialog):
         # Create a new layout to stop things moving around (fix their UI positions)
         self.layout = QVBoxLayout()
         message = QLabel("Is the top row of the CSV file variable names?")
+        
+        # the last columns of the file are the outputs, usually just the 1
+        self.outputsSpinBox = QSpinBox()
+        self.outputsSpinBox.setRange(1, MAX_OUTPUTS)
+        self.outputsSpinBox.setPrefix("Output columns: ")
 
         # add all the UI elements of this pop-up to the window layout
         self.layout.addWidget(message)
+        self.layout.addWidget(self.outputsSpinBox)
         self.layout.addWidget(self.buttonBox)
         self.setLayout(self.layout)
     
@@ -64,26 +167,39 @@ class TTWindow(QtWidgets.QMainWindow):
         self.actClearTable.triggered.connect(self.createInputBoxes)
         self.actImportFile.triggered.connect(self.loadInputFile)
         
+        # not in the .ui file, tables with several outputs are simplified together so the outputs can share terms
+        self.actSetOutputs = self.findChild(QMenu, "menuOptions").addAction("Set number of outputs...")
+        self.actSetOutputs.triggered.connect(self.askForNumberOfOutputs)
+        
+        self.noVarsSpinBox.setMaximum(MAX_VARIABLES)                        # the .ui file limits this to 5 from when every row was a widget
         self.noVarsSpinBox.valueChanged.connect(self.createInputBoxes)      # when the spin box value changes, call this function
         self.setFixedSize(self.size())                                      # this stops the window from being resized.
         
-        self.variableInputGuideLabel = QLabel(self)                         
-        self.inputScrollArea.setWidget(self.variableInputGuideLabel)
         self.inputScrollArea.setMinimumWidth(200)
         
-        self.scrollContainerWidget   = QWidget()
-        self.gridLayout              = QGridLayout(self.scrollContainerWidget)
-        self.inputScrollArea.setWidget(self.scrollContainerWidget)
+        # the table view only creates widgets for the rows on screen, so it has its own scroll bars and fills the scroll area
+        self.truthTableModel = TruthTableModel(MultiOutputTruthTable(self.noVarsSpinBox.value()), self)
+        self.truthTableView  = QTableView()
+        self.truthTableView.setModel(self.truthTableModel)
+        self.outputDelegate  = OutputDelegate(self.truthTableView)
+        self.truthTableView.setStyleSheet("QTableView { background-color: rgb(123, 146, 209); }")
+        self.truthTableView.setEditTriggers(QAbstractItemView.AllEditTriggers)
+        # fixed row and column sizes means Qt never has to measure every row
+        self.truthTableView.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.truthTableView.verticalHeader().setDefaultSectionSize(22)
+        self.truthTableView.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.truthTableView.horizontalHeader().setDefaultSectionSize(28)
+        self.inputScrollArea.setWidget(self.truthTableView)
+        self.inputScrollArea.setWidgetResizable(True)
         
-        self.outputSpinBoxes = []
         self.createInputBoxes()
         
         self.isDone = False
     
-    def stageFileName(self, fN:str, topRowHeader:bool):
+    def stageFileName(self, fN:str, topRowHeader:bool, noOutputs:int=1):
         # this is a project that has been saved loading previous data back in.
         # we stage the filename into a variable and wait for it to be called
-        self.stagedFile = [fN, topRowHeader]
+        self.stagedFile = [fN, topRowHeader, noOutputs]
         
     def loadInputFile(self):
         # Create a new set of options
@@ -95,11 +211,14 @@ class TTWindow(QtWidgets.QMainWindow):
         downloadsFolder = os.path.expanduser("~") + "\\Downloads"
         
         #                                               window title prompt           # default folder       types of files allowed      options we defined earlier
-        fileName, _ = QFileDialog.getOpenFileName(self,"Select Truth Table import...", downloadsFolder,"CSV Files (*.csv);;All Files (*)", options=options)
+        fileName, _ = QFileDialog.getOpenFileName(self,"Select Truth Table import...", downloadsFolder,"CSV Files (*.csv);;PLA Files (*.pla);;All Files (*)", options=options)
         # the first returned variable is the file name and the second isn't needed
         
         if fileName: # check if we got a file name (i.e. the user didn't click the x button)
-            self.loadCSVIntoGrid(fileName) # load the file name
+            if fileName.lower().endswith(".pla"):
+                self.loadPLAIntoGrid(fileName)
+            else:
+                self.loadCSVIntoGrid(fileName) # load the file name
             
     def loadCSVIntoGrid(self, fileName=None):
         topRowIsHeaders = False # the top row of the CSV can be the variable labels
@@ -109,124 +228,94 @@ class TTWindow(QtWidgets.QMainWindow):
             dlg = CSVImportDialog()
             topRowIsHeaders = dlg.exec()  # check if the top row of the CSV is data using 
             # ... the pop up window defined earlier
+            noOutputs = dlg.outputsSpinBox.value()
         else:
             # if file name is not given by user, we have been sent the data by another section of the program
             # format data as required
             fileName = self.stagedFile[0]
             topRowIsHeaders = self.stagedFile[1]
+            noOutputs = self.stagedFile[2]
+        
+        self.loadTableFromFile(partial(truthTableFiles.readCSVTruthTable, noOutputs=noOutputs), fileName, topRowIsHeaders, MAX_VARIABLES)
+    
+    def loadPLAIntoGrid(self, fileName):
+        # PLA files say how many inputs they have so there's nothing to ask the user
+        self.loadTableFromFile(truthTableFiles.readPLATruthTable, fileName, MAX_VARIABLES)
+    
+    def loadTableFromFile(self, readFunction, *args):
+        # the file is read straight into a packed table and the view is only updated once at the end. the progress
+        # dialog keeps the window responsive (and cancellable) while a big file loads.
+        progressDialog = QProgressDialog("Loading truth table...", "Cancel", 0, 100, self)
+        progressDialog.setWindowModality(Qt.WindowModal)
+        progressDialog.setMinimumDuration(500)
+        
+        def updateProgress(rowsRead, totalRows):
+            if totalRows:
+                progressDialog.setValue(min(99, int(100 * rowsRead / totalRows)))
+            else:
+                progressDialog.setMaximum(0)    # total isn't known, show a busy bar instead
+            QApplication.processEvents()
+            return not progressDialog.wasCanceled()
         
         try:
-            with open(fileName, newline = '') as csvFile: 
-                csvReader = csv.reader(csvFile)
-                for count, row in enumerate(csvReader):
-                    if topRowIsHeaders and not count:
-                        # ignore top row of the csv if it is a label row
-                        continue
-                    
-                    # if we are in the first row of actual data
-                    if (count == 0 and not topRowIsHeaders) or (count == 1 and topRowIsHeaders):
-                        # the length of the row includes the output variable so subtract 1
-                        noVariables = len(row) - 1
-                        # update spinbox
-                        self.noVarsSpinBox.setValue(noVariables)
-                        
-                    # this row contains elements other than 1 or 0
-                    if row.count("0") + row.count("1") != len(row):
-                        errorLogging.raiseError("Error! (Code 37)", "Truth Table Editor (CSV Loading): Corrupted data!\nCharacters in the CSV are not 0 or 1, or the header row was incorrectly disabled.")
-                        return
-                    
-                    try:
-                        # Try to set the output box at the current index to the current value
-                        self.outputSpinBoxes[count - topRowIsHeaders].setValue(int(row[-1]))
-                    except IndexError:
-                        # if this doesn't work the CSV is missing data
-                        errorLogging.raiseError("Error! (Code 38)", f"Truth Table Editor (CSV Loading): Row length is not correct - too much or too little data on line {count+1}.")
-                        return
+            table = readFunction(*args, updateProgress)
+        except truthTableFiles.TruthTableFileError as e:
+            errorLogging.raiseError(f"Error! (Code {e.code})", e.message)
+            return
         except Exception as e:
             errorLogging.raiseError("Error! (Code 73)", f"Couldn't open this file. Please try again later.\nException: {e}")
-            
-    def clearMainGrid(self):
-        while self.gridLayout.count():
-            nextItem = self.gridLayout.takeAt(0)
-            toDelete = nextItem.widget()
-            
-            if toDelete is not None:
-                toDelete.deleteLater()
+            return
+        finally:
+            progressDialog.close()
         
-        return True
-    
-    def submitData(self):
-        item : QSpinBox = None # defining this as a QSpinBox means we get IDE features even tho python's dynamic, just a little workaround
-        
-        data = "" # output string to be sent to SOP generator
-        cols = self.noVarsSpinBox.value() # number of variables input 
-        
-        for count, item in enumerate(self.outputSpinBoxes):
-            data += (f"{bin(count)[2:].rjust(cols,"0")}{item.value()}")
-            # for every item in the 2D array:
-            #   get the binary value of the inputs and pad it to the number of columns
-            #   e.g. 0 => 0000 if there were 4 inputs
-            #   add the output box's value to the end
-            #   add this to the data 
-             
+        if table:
+            self.loadTruthTable(table)
             
+    def getTruthTable(self) -> PackedTruthTable | MultiOutputTruthTable:
+        # copy of the table being edited, the inputs of row i are just i in binary so only the outputs are stored.
+        # a table with one output is a plain PackedTruthTable
+        return self.truthTableModel.table.simplest()
+    
+    def loadTruthTable(self, table: PackedTruthTable | MultiOutputTruthTable):
+        # put a saved or imported table into the editor
+        if isinstance(table, PackedTruthTable):
+            table = MultiOutputTruthTable.fromTable(table)
+        self.noVarsSpinBox.setValue(table.noVars)
+        self.setTable(table)
+    
+    def askForNumberOfOutputs(self):
+        # outputs are added empty or removed from the end, the rest of the table stays as it is
+        table = self.truthTableModel.table
+        noOutputs, accepted = QInputDialog.getInt(self, "Truth Table Outputs", "Number of output columns:", table.noOutputs, 1, MAX_OUTPUTS)
+        if accepted and noOutputs != table.noOutputs:
+            self.setTable(table.withOutputs(noOutputs))
+    
+    def submitData(self) -> PackedTruthTable | MultiOutputTruthTable:
         # this section is done (used for save data)
         self.isDone = True
-        # return the output string and the number of variables + 1 (to account for the output data)
-        return [data, cols + 1]     
+        # return the truth table to be sent to the SOP generator
+        return self.getTruthTable()
             
     def createInputBoxes(self):
-        # number of variables being entered
-        cols = self.noVarsSpinBox.value() 
-        
-        # Create a label with the variable names
-        inputVarChars = QLabel("    ".join(ALPHABET[:cols]), self)
-        #clear input boxes
-        self.clearMainGrid()
-        #create a new list of output boxes - .copy() ensures that we dont have memory issues with the UI.
-        self.outputSpinBoxes = [].copy()
-        
-        # add the grid of boxes to the UI handler
-        self.gridLayout.addWidget(inputVarChars,0, 0)
-        
-        # cols no of variables implies 2^cols possible input combinations, e.g. 3 variables -> 8 possible input combos
-        for i in range(2**cols):
-            nextInputLine = ("    ".join(list(bin(i)[2:].rjust(cols,"0"))))
-            # what does this line do?
-            #   bin(i) converts the number to a binary string
-            #   [2:] removes the 0b prefix that shows this number is binary - we know it is so we don't need it
-            #   .rjust(cols,"0") pads the string so that it is always the number of cols long, e.g. with 3 input variables, 1 is converted to 001
-            #   list(...) converts the whole thing into a list, e.g. 101 would become [1,0,1]
-            #   " ".join() turns the list into a string with each element seperated by a space, e.g. [1,0,1] becomes "1 0 1"
-            #   this is then added as a line to the box input.
-            nextLabel = QLabel(self)
-            nextLabel.setText(nextInputLine)
-            nextLabel.show()
-            
-            # add each widget to the grid
-            self.gridLayout.addWidget(nextLabel, i+1, 0)
-            
-            # create a new output box
-            nextBox = QSpinBox(self)
-            # make it so that only 0 and 1 (binary) is supported.
-            nextBox.setRange(0,1)
-            # make sure the input box is shown to the user
-            nextBox.show()
-            # add the next box to the main UI to keep it inline
-            self.gridLayout.addWidget(nextBox, i+1, 1)
-            
-            nextBox.setStyleSheet("""
-            QSpinBox {
-                background-color: white;
-            }
-            """)
-            
-            # add the next output box to the list of boxes            
-            self.outputSpinBoxes.append(nextBox)
+        # new empty table with the number of variables in the spin box. this is also "Clear table", so the names from
+        # a loaded file go too (the number of outputs stays the same)
+        self.setTable(MultiOutputTruthTable(self.noVarsSpinBox.value(), self.truthTableModel.table.noOutputs))
+    
+    def setTable(self, table: MultiOutputTruthTable):
+        # the output columns move when the number of variables changes, so the 0/1/X editor has to move with them
+        oldTable = self.truthTableModel.table
+        for column in range(oldTable.noVars, oldTable.noVars + oldTable.noOutputs):
+            self.truthTableView.setItemDelegateForColumn(column, None)
+        self.truthTableModel.setTable(table)
+        for column in range(table.noVars, table.noVars + table.noOutputs):
+            self.truthTableView.setItemDelegateForColumn(column, self.outputDelegate)
             
     def getSaveData(self) -> str:
-        outputSpinBoxText = "".join([str(box.value()) for box in self.outputSpinBoxes])
-        return [self.noVarsSpinBox.value(), outputSpinBoxText, self.actAutoCloseWin.isChecked(), self.actAutoOpenExpr.isChecked(), self.isDone]
+        # the outputs are saved packed (see packedTruthTable.py), the names are None unless they came from a file. the
+        # first output is where it always was and any others come after the names
+        table = self.truthTableModel.table
+        outputs = table.toSaveStrings()
+        return [self.noVarsSpinBox.value(), outputs[0], self.actAutoCloseWin.isChecked(), self.actAutoOpenExpr.isChecked(), self.isDone, table.names, outputs[1:], table.outputNames]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,234 @@
+import hashlib
+from packedTruthTable import PackedTruthTable
+from SOP_QuineMcCluskey import parseSOPExpression
+
+"""
+Reduced ordered binary decision diagrams (BDDs). A BDD stores a function as a graph where every node tests one
+variable and has a low child (variable = 0) and a high child (variable = 1), ending in the FALSE and TRUE terminals.
+The variables are always tested in the same order (A first) and no two nodes are the same, so every function has
+exactly one BDD. That means:
+
+    - two functions are equal if and only if they are the same node, no matter how their expressions were written
+    - the hash of a node's structure (canonicalHash) identifies the function, so it can be used as a key
+    - a function can be evaluated, or its number of true rows counted, without building the 2^n row truth table
+
+Nodes are ints indexing BDDManager's lists, with 0 and 1 as the FALSE and TRUE terminals. Nodes from different
+managers can't be mixed (but their canonical hashes can be compared).
+"""
+
+FALSE = 0
+TRUE = 1
+MAX_COMPUTED_ENTRIES = 1 << 20      # the computed table is emptied when it reaches this size so it can't grow forever
+
+class BDDManager:
+    def __init__(self, noVars: int):
+        self.noVars = noVars
+        # node i tests variable[i] and goes to low[i] or high[i]. the terminals are "below" every variable (noVars)
+        self.variable = [noVars, noVars]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.uniqueTable = {}       # (variable, low, high) -> node, so the same node is never made twice
+        self.computedTable = {}     # (f, g, h) -> ite(f, g, h), results of previous operations
+        self.hashes = {FALSE: "0", TRUE: "1"}
+
+    def makeNode(self, variable: int, low: int, high: int) -> int:
+        # the node testing variable with the given children, reduced: a test where both children are the same is skipped
+        if low == high:
+            return low
+        key = (variable, low, high)
+        node = self.uniqueTable.get(key)
+        if node is None:
+            node = len(self.variable)
+            self.variable.append(variable)
+            self.low.append(low)
+            self.high.append(high)
+            self.uniqueTable[key] = node
+        return node
+
+    def variableNode(self, variable: int) -> int:
+        # the function that is just the variable (e.g. A)
+        return self.makeNode(variable, FALSE, TRUE)
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        # if f then g else h, every other operation is built from this
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        result = self.computedTable.get(key)
+        if result is not None:
+            return result
+
+        # split on the first variable any of them tests, and solve the two halves
+        top = min(self.variable[f], self.variable[g], self.variable[h])
+        f0, f1 = self.cofactors(f, top)
+        g0, g1 = self.cofactors(g, top)
+        h0, h1 = self.cofactors(h, top)
+        result = self.makeNode(top, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+
+        if len(self.computedTable) >= MAX_COMPUTED_ENTRIES:
+            self.computedTable.clear()
+        self.computedTable[key] = result
+        return result
+
+    def cofactors(self, node: int, variable: int) -> tuple[int, int]:
+        # the node with variable set to 0 and to 1. a node that doesn't test it is the same either way
+        if self.variable[node] != variable:
+            return node, node
+        return self.low[node], self.high[node]
+
+    def AND(self, f: int, g: int) -> int:
+        return self.ite(f, g, FALSE)
+
+    def OR(self, f: int, g: int) -> int:
+        return self.ite(f, TRUE, g)
+
+    def NOT(self, f: int) -> int:
+        return self.ite(f, FALSE, TRUE)
+
+    def XOR(self, f: int, g: int) -> int:
+        return self.ite(f, self.NOT(g), g)
+
+    def equivalent(self, f: int, g: int) -> bool:
+        # every function has one node, so this is all there is to it
+        return f == g
+
+    # Conversion from the formats used by the rest of the program
+
+    def fromCube(self, mask: int, value: int) -> int:
+        # (mask, value) term like SOP_QuineMcCluskey's, built from the last variable up so no ite is needed
+        node = TRUE
+        for variable in range(self.noVars - 1, -1, -1):
+            bit = 1 << (self.noVars - 1 - variable)
+            if mask & bit:
+                continue    # variable isn't in the term
+            node = self.makeNode(variable, FALSE, node) if value & bit else self.makeNode(variable, node, FALSE)
+        return node
+
+    def fromCover(self, cover: list[tuple[int, int]]) -> int:
+        # OR of every term, paired up like a tournament so the intermediate BDDs stay small
+        nodes = [self.fromCube(mask, value) for mask, value in cover]
+        if not nodes:
+            return FALSE
+        while len(nodes) > 1:
+            pairs = [self.OR(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+            if len(nodes) % 2:
+                pairs.append(nodes[-1])
+            nodes = pairs
+        return nodes[0]
+
+    def fromExpression(self, exprIn: str, names: list[str] = None) -> int:
+        # SOP string (e.g. "AB#+C", or the constants "0" and "1") -> node, names is the expression's name table if it
+        # has one (see variableNames.py). raises ValueError if it isn't valid SOP or uses more variables than the
+        # manager has
+        exprIn = exprIn.replace(" ", "")
+        if exprIn in ("0", "1"):
+            return TRUE if exprIn == "1" else FALSE
+        noVars, cover = parseSOPExpression(exprIn, self.noVars, names)
+        if noVars != self.noVars:
+            raise ValueError(f"Expression |{exprIn}| uses {noVars} variables, this BDD manager has {self.noVars}.")
+        return self.fromCover(cover)
+
+    def fromTruthTable(self, table: PackedTruthTable) -> int:
+        # packed output column -> node. rows that differ only in the last variable are next to each other, so the
+        # table is built from the bottom up by pairing neighbouring rows into nodes for the last variable, then
+        # neighbouring nodes for the variable before it and so on up to A. each byte is 8 rows (the last 3 variables),
+        # and there are only 256 possible bytes, so those nodes are made once per byte value.
+        if table.noVars != self.noVars:
+            raise ValueError(f"Truth table has {table.noVars} variables, this BDD manager has {self.noVars}.")
+        if self.noVars < 3:
+            nodes = [table.getOutput(row) for row in range(table.noRows)]
+            firstVariable = self.noVars - 1
+        else:
+            byteNodes = {}
+            for byte in set(table.packed):
+                rowNodes = [byte >> row & 1 for row in range(8)]
+                for variable in range(self.noVars - 1, self.noVars - 4, -1):
+                    rowNodes = [self.makeNode(variable, rowNodes[i], rowNodes[i + 1]) for i in range(0, len(rowNodes), 2)]
+                byteNodes[byte] = rowNodes[0]
+            nodes = list(map(byteNodes.__getitem__, table.packed))
+            firstVariable = self.noVars - 4
+
+        for variable in range(firstVariable, -1, -1):
+            nodes = [self.makeNode(variable, nodes[i], nodes[i + 1]) for i in range(0, len(nodes), 2)]
+        return nodes[0]
+
+    def toTruthTable(self, f: int) -> PackedTruthTable:
+        # node -> packed output column. the rows below a node are worked out once per (node, variable) as an int with
+        # one bit per row, rows where the variable is 0 in the low half and 1 in the high half
+        memo = {}
+        def rowBits(node: int, variable: int) -> int:
+            if variable == self.noVars:
+                return node     # a single row, TRUE = 1 and FALSE = 0
+            key = (node, variable)
+            if key not in memo:
+                half = 1 << (self.noVars - 1 - variable)
+                low, high = self.cofactors(node, variable)
+                memo[key] = rowBits(low, variable + 1) | rowBits(high, variable + 1) << half
+            return memo[key]
+
+        table = PackedTruthTable(self.noVars)
+        table.packed[:] = rowBits(f, 0).to_bytes(len(table.packed), "little")
+        return table
+
+    # Using a function without its truth table
+
+    def evaluate(self, f: int, row: int) -> int:
+        # output for one row, where the inputs are the binary value of row (A is the most significant bit)
+        while f > TRUE:
+            f = self.high[f] if row >> (self.noVars - 1 - self.variable[f]) & 1 else self.low[f]
+        return f
+
+    def satisfyingCount(self, f: int) -> int:
+        # number of rows where the function is 1. a node that skips variables covers every value of them, so each
+        # skipped variable doubles the count of the path
+        memo = {FALSE: 0, TRUE: 1}
+        def count(node: int) -> int:
+            # rows below the node, counting only the variables after the one it tests
+            if node not in memo:
+                variable = self.variable[node]
+                low, high = self.low[node], self.high[node]
+                memo[node] = (count(low) << (self.variable[low] - variable - 1)) + (count(high) << (self.variable[high] - variable - 1))
+            return memo[node]
+        return count(f) << self.variable[f]
+
+    def nodeCount(self, f: int) -> int:
+        # size of the BDD for f, terminals included
+        seen = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node > TRUE:
+                stack += [self.low[node], self.high[node]]
+        return len(seen)
+
+    def canonicalHash(self, f: int) -> str:
+        # hash of the BDD's structure. equal functions have equal hashes even between managers, so this identifies a
+        # function rather than the way its expression was written
+        if f not in self.hashes:
+            structure = f"{self.variable[f]}:{self.canonicalHash(self.low[f])}:{self.canonicalHash(self.high[f])}"
+            self.hashes[f] = hashlib.sha256(structure.encode()).hexdigest()
+        return self.hashes[f]
+
+def functionHash(exprIn: str, noVars: int = 0, names: list[str] = None) -> str:
+    # canonical hash of an SOP expression's function, e.g. "AB+AB#" and "A" have the same hash
+    constant = exprIn.replace(" ", "")
+    if constant in ("0", "1"):
+        return constant
+    noVars, _ = parseSOPExpression(exprIn, noVars, names)
+    manager = BDDManager(noVars)
+    return manager.canonicalHash(manager.fromExpression(exprIn, names))
+
+def expressionsEquivalent(exprIn1: str, exprIn2: str) -> bool:
+    # whether two SOP expressions are the same function
+    noVars = max(parseSOPExpression(exprIn, 0)[0] if exprIn.replace(" ", "") not in ("0", "1") else 0 for exprIn in (exprIn1, exprIn2))
+    manager = BDDManager(noVars)
+    return manager.equivalent(manager.fromExpression(exprIn1), manager.fromExpression(exprIn2))
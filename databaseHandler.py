@@ -1,10 +1,76 @@
 import sqlite3
 import datetime
+from itertools import groupby
 import errorLogging
 
+"""
+main.db keeps its schema version in PRAGMA user_version (0 for databases made before versioning). connectToDatabase
+runs every upgrade the file hasn't had yet, each in its own transaction along with bumping the version, so a main.db
+from an older version of the program is brought up to date the first time it's opened. SCHEMA_UPGRADES[i] takes a
+database from version i to i + 1, and a new database is made at SCHEMA_VERSION straight away.
+"""
+
+SCHEMA_UPGRADES = [
+  # 1: ProjHandler gets a primary key on (projectID, expressionID) so a link can only be in the table once, and an index
+  # on expressionID for the lookups from the expression side (the primary key already covers lookups by projectID).
+  # SQLite can't add a primary key to an existing table, so the rows are copied into a new one - INSERT OR IGNORE
+  # drops any duplicate links, ordered by rowid so the links keep the order they were added in
+  """
+  CREATE TABLE ProjHandlerUpgrade (
+    projectID INTEGER NOT NULL,
+    expressionID INTEGER NOT NULL,
+    PRIMARY KEY (projectID, expressionID),
+    FOREIGN KEY (projectID) REFERENCES Projects(projectID),
+    FOREIGN KEY (expressionID) REFERENCES Expressions(expressionID)
+  );
+  INSERT OR IGNORE INTO ProjHandlerUpgrade (projectID, expressionID) SELECT projectID, expressionID FROM ProjHandler ORDER BY rowid;
+  DROP TABLE ProjHandler;
+  ALTER TABLE ProjHandlerUpgrade RENAME TO ProjHandler;
+  CREATE INDEX IF NOT EXISTS ProjHandlerExpressionIndex ON ProjHandler (expressionID);
+  """,
+  # 2: lastUpdated goes from "01/09/2024 09:35" to "2024-09-01 09:35" (see generateTimeStamp) so it sorts in date order,
+  # with an index on the Expressions one for openPrevious. anything that isn't in the old format is left alone
+  """
+  UPDATE Expressions SET lastUpdated = substr(lastUpdated, 7, 4) || '-' || substr(lastUpdated, 4, 2) || '-' || substr(lastUpdated, 1, 2) || substr(lastUpdated, 11)
+  WHERE lastUpdated GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9] [0-9][0-9]:[0-9][0-9]';
+  UPDATE Projects SET lastUpdated = substr(lastUpdated, 7, 4) || '-' || substr(lastUpdated, 4, 2) || '-' || substr(lastUpdated, 1, 2) || substr(lastUpdated, 11)
+  WHERE lastUpdated GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9] [0-9][0-9]:[0-9][0-9]';
+  CREATE INDEX IF NOT EXISTS ExpressionsLastUpdatedIndex ON Expressions (lastUpdated);
+  """,
+]
+SCHEMA_VERSION = len(SCHEMA_UPGRADES)
+
+# sqlite3 keeps this many prepared statements per connection, looked up by the query's text. queries take their values
+# as ? parameters (see databaseHandler.execute) so the same text is used every time and only parsed once. the default
+# of 128 is plenty for the queries here, this leaves room for the f-string queries that are left
+STATEMENT_CACHE_SIZE = 256
+
+# each process (the project manager and every open editor) keeps one connection to main.db until it closes. in WAL
+# mode readers and the writer don't block each other, and a writer that finds the database busy waits up to
+# BUSY_TIMEOUT_MS for it rather than failing with "database is locked". synchronous=NORMAL only syncs the WAL to disk at
+# checkpoints rather than on every commit, a power cut can lose the last few commits but can't corrupt the database
+BUSY_TIMEOUT_MS = 5000
+CONNECTION_PRAGMAS = [
+  "PRAGMA journal_mode = WAL",
+  f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+  "PRAGMA synchronous = NORMAL",
+]
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"   # how lastUpdated is stored, biggest unit first so sorting the text sorts by time
+DISPLAY_FORMAT = "%d/%m/%Y %H:%M"       # how it's shown in the project manager
+OLD_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M" # timestamps from before schema version 2 have no seconds
+
 def generateTimeStamp(): # This function returns a timestamp of the current time to update when the Project/Expression was last updated
     time = datetime.datetime.now() # Get the current time using the datetime library
-    return time.strftime("%d/%m/%Y %H:%M") # This returns the time in an easy-to-read format e.g. 01/09/2024 09:35
+    return time.strftime(TIMESTAMP_FORMAT) # e.g. 2024-09-01 09:35:12
+
+def formatTimeStamp(timeStamp) -> str: # lastUpdated in an easy-to-read format e.g. 01/09/2024 09:35
+    for timeFormat in (TIMESTAMP_FORMAT, OLD_TIMESTAMP_FORMAT):
+        try:
+            return datetime.datetime.strptime(timeStamp, timeFormat).strftime(DISPLAY_FORMAT)
+        except (ValueError, TypeError):
+            pass
+    return str(timeStamp)   # not a timestamp (e.g. None), shown as it is
 
 class databaseHandler:
   def __init__(self) -> None:
@@ -25,50 +91,91 @@ class databaseHandler:
       lastUpdated TEXT
     );
     """
+    # not WITHOUT ROWID, the listings use ProjHandler.rowid to keep links in the order they were added
     self.createLinkTable = """
     CREATE TABLE IF NOT EXISTS ProjHandler (
       projectID INTEGER NOT NULL,
       expressionID INTEGER NOT NULL,
+      PRIMARY KEY (projectID, expressionID),
       FOREIGN KEY (projectID) REFERENCES Projects(projectID),
       FOREIGN KEY (expressionID) REFERENCES Expressions(expressionID)
     );
     """
+    self.createLinkIndex = "CREATE INDEX IF NOT EXISTS ProjHandlerExpressionIndex ON ProjHandler (expressionID);"
+    self.createLastUpdatedIndex = "CREATE INDEX IF NOT EXISTS ExpressionsLastUpdatedIndex ON Expressions (lastUpdated);"
 
   def isConnectionOpen(self):
-    try:
-      self.connectToMain()
-      return True
-    except:
-      return False
+    return self.connection is not None
 
   def connectToMain(self):
     self.connectToDatabase("main.db")
 
   def connectToDatabase(self, path):
+    if self.connection is not None and path == self.dbpath:
+      return  # already connected, the connection is kept open rather than reopened
+    self.closeConnection()
     self.dbpath = path
     try:
-      self.connection = sqlite3.connect(path)
+      self.connection = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE)
+      for pragma in CONNECTION_PRAGMAS:
+        self.connection.execute(pragma)
     except sqlite3.Error:
       errorLogging.raiseGenericFatalError(4)
+    self.upgradeDatabase()
+
+  def upgradeDatabase(self):
+    version = self.readSQLQuery("PRAGMA user_version")[0][0]
+    if version >= SCHEMA_VERSION:
+      return
+    if not self.readSQLQuery("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'ProjHandler'"):
+      # a new database, createDatabase makes the tables at the latest version so there's nothing to upgrade
+      self.executeSQLQuery(f"PRAGMA user_version = {SCHEMA_VERSION}")
+      return
+    for newVersion in range(version + 1, SCHEMA_VERSION + 1):
+      try:
+        # executescript commits anything pending first, then the upgrade and the new version are committed together
+        self.connection.executescript(f"BEGIN; {SCHEMA_UPGRADES[newVersion - 1]} PRAGMA user_version = {newVersion}; COMMIT;")
+      except sqlite3.Error:
+        self.connection.rollback()
+        errorLogging.raiseGenericFatalError(83, additionalDbgInfo=f"UPGRADE: {version} -> {newVersion}")
+        return
           
-  def executeSQLQuery(self, query : str, isReadQuery : bool = False, dontCommit : bool = False):
-    SQLcursor = self.connection.cursor()
+  # query's values go in params and are written as ? in the query, e.g. execute("... WHERE expressionID = ?", (exprID,)).
+  # SQLite fills them in itself so they never need quoting or escaping (quotes in expression data can't break the
+  # query) and the query is the same text every time, so it's only prepared once (see STATEMENT_CACHE_SIZE)
+  def execute(self, query : str, params : tuple = (), isReadQuery : bool = False, dontCommit : bool = False):
     try:
-      SQLcursor.execute(query)
+      SQLcursor = self.connection.execute(query, params)
       if isReadQuery:
         return SQLcursor.fetchall()
       elif not dontCommit:
         self.connection.commit()
       return 1
     except sqlite3.Error:
-      errorLogging.raiseGenericFatalError(5, additionalDbgInfo=f"QRY: {query}\nDC: {dontCommit}")
+      errorLogging.raiseGenericFatalError(5, additionalDbgInfo=f"QRY: {query}\nPRM: {params}\nDC: {dontCommit}")
+
+  def executemany(self, query : str, paramsList : list[tuple], dontCommit : bool = False):
+    # the same query once for each set of params, e.g. adding every link of a project
+    try:
+      self.connection.executemany(query, paramsList)
+      if not dontCommit:
+        self.connection.commit()
+      return 1
+    except sqlite3.Error:
+      errorLogging.raiseGenericFatalError(5, additionalDbgInfo=f"QRY: {query}\nPRM: {paramsList}\nDC: {dontCommit}")
+
+  def executeSQLQuery(self, query : str, isReadQuery : bool = False, dontCommit : bool = False):
+    return self.execute(query, (), isReadQuery, dontCommit)
       
-  def readSQLQuery(self, query : str):
-    return self.executeSQLQuery(query, True)
+  def readSQLQuery(self, query : str, params : tuple = ()):
+    return self.execute(query, params, True)
 
-  def executeMultipleQueries(self, queries:list[str]):
+  def executeMultipleQueries(self, queries:list):
+    # each query is either a string or a (query, params) pair for execute
     for query in queries:
-      self.executeSQLQuery(query, False, True)  # execute write-only query and don't commit to database yet
+      if isinstance(query, str):
+        query = (query, ())
+      self.execute(*query, False, True)  # execute write-only query and don't commit to database yet
     
     self.connection.commit() # all queries were executed successfully, commit all to database
     return 1  # return 1 to show all queries were executed successfully
@@ -77,20 +184,60 @@ class databaseHandler:
     self.executeSQLQuery(self.createProjectTable)
     self.executeSQLQuery(self.createExprTable)
     self.executeSQLQuery(self.createLinkTable)
+    self.executeSQLQuery(self.createLinkIndex)
+    self.executeSQLQuery(self.createLastUpdatedIndex)
+    self.executeSQLQuery(f"PRAGMA user_version = {SCHEMA_VERSION}")
     self.connection.commit()
     self.closeConnection()
     self.connectToDatabase(self.dbpath)
     
+  # The project manager's listings. Each one is a single query joining every row to the rows it's linked to (LEFT JOIN so
+  # rows with no links still appear), grouped back together here. This is one query however many rows there are,
+  # rather than one per row. Each item is (ID, name, lastUpdated, [(linked ID, linked name), ...]).
+  def getProjectListing(self) -> list:
+    return self._groupListing(self.readSQLQuery("""
+    SELECT Projects.projectID, Projects.projectName, Projects.lastUpdated, Expressions.expressionID, Expressions.expressionName
+    FROM Projects
+    LEFT JOIN ProjHandler ON ProjHandler.projectID = Projects.projectID
+    LEFT JOIN Expressions ON Expressions.expressionID = ProjHandler.expressionID
+    ORDER BY Projects.projectID, ProjHandler.rowid
+    """))
+
+  def getExpressionListing(self) -> list:
+    # expressionData isn't fetched, it's the whole save and the listing doesn't show it
+    return self._groupListing(self.readSQLQuery("""
+    SELECT Expressions.expressionID, Expressions.expressionName, Expressions.lastUpdated, Projects.projectID, Projects.projectName
+    FROM Expressions
+    LEFT JOIN ProjHandler ON ProjHandler.expressionID = Expressions.expressionID
+    LEFT JOIN Projects ON Projects.projectID = ProjHandler.projectID
+    ORDER BY Expressions.expressionID, ProjHandler.rowid
+    """))
+
+  def getMostRecentExpression(self):
+    # ID of the expression updated last, or None if there aren't any. this reads one entry from the end of
+    # ExpressionsLastUpdatedIndex rather than sorting the whole table (the index has the ID in it to break ties)
+    data = self.readSQLQuery("SELECT expressionID FROM Expressions ORDER BY lastUpdated DESC, expressionID DESC LIMIT 1")
+    return data[0][0] if data else None
+
+  def _groupListing(self, rows) -> list:
+    # rows are ordered by their first column, so every row of one item is next to each other
+    listing = []
+    for (itemID, name, lastUpdated), itemRows in groupby(rows, key=lambda row: row[:3]):
+      links = [(linkedID, linkedName) for *_, linkedID, linkedName in itemRows if linkedID is not None]
+      listing.append((itemID, name, lastUpdated, links))
+    return listing
+
   def resetExprIncrement(self):
     self.executeSQLQuery("UPDATE SQLITE_SEQUENCE SET SEQ=0 WHERE NAME='Expressions';")
   def resetProjectIncrement(self):
     self.executeSQLQuery("UPDATE SQLITE_SEQUENCE SET SEQ=0 WHERE NAME='Projects';")
     
   def saveExpression(self, exprID:int, newData:str):
-    self.executeSQLQuery(f"UPDATE Expressions SET ExpressionData = '{newData}' WHERE ExpressionID = {exprID}")
-    self.executeSQLQuery(f"UPDATE Expressions SET LastUpdated = '{generateTimeStamp()}' WHERE ExpressionID = {exprID}")
+    # one UPDATE, so one commit
+    self.execute("UPDATE Expressions SET ExpressionData = ?, LastUpdated = ? WHERE ExpressionID = ?", (newData, generateTimeStamp(), exprID))
     
   def closeConnection(self):
     if self.connection:
       self.connection.close()
+      self.connection = None
   
\ No newline at end of file
@@ -1,25 +1,154 @@
 import ctypes
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import errorLogging
+import SOP_QuineMcCluskey
+import SOP_Espresso
+import SOP_ExactCover
+import simplifyCacheHandler
+import simplifyEngines
+import expressionVerifier
+import variableNames
+from simplifyEngines import ENGINE_DLL, ENGINE_QM, ENGINE_ESP, ENGINE_EXACT, ENGINE_MULTI
+from packedTruthTable import PackedTruthTable, MultiOutputTruthTable
+from SOP_Incremental import IncrementalPrimes, MAX_CHANGED_ROWS
+from SOP_QuineMcCluskey import TooManyImplicants
 
 pathToDLL = os.getcwd() + "\\SOP.dll"
 os.add_dll_directory(os.getcwd())
 
 _SOPDLL = None
 
+# Simplification engines that can be used by simplifyBooleanExpr (the ENGINE_ constants are in simplifyEngines.py).
+# Each one takes the SOP string and returns [expression, identities used, passes] so the rest of the program doesn't
+# need to know which one ran.
+ENGINE_NAMES = {
+    ENGINE_DLL: "SOP Library (Boolean identities)",
+    ENGINE_QM:  "Quine-McCluskey (bit-packed)",
+    ENGINE_ESP: "Espresso (heuristic, 16+ variables)",
+    ENGINE_EXACT: "Exact minimum cover (time limited)",
+}
+_simplifyEngine = ENGINE_DLL
+
+# form of the expression solveTruthTable gives back. a POS is the simplified SOP of the complemented table turned
+# around by De Morgan's law (see variableNames.py), so every engine can make either form
+FORM_SOP  = "SOP"
+FORM_POS  = "POS"
+FORM_AUTO = "AUTO"      # whichever of the two has the lower variableNames.expressionCost
+FORM_NAMES = {
+    FORM_SOP:  "Sum of products",
+    FORM_POS:  "Product of sums",
+    FORM_AUTO: "Whichever is cheaper",
+}
+_expressionForm = FORM_SOP
+_simplifyTimeLimit = 2.0    # seconds the time limited engines may spend improving their answer
+_verifyResults = True       # check every simplified expression against its truth table before it's used
+PROCESS_POOL_MIN_ROWS = 1 << 14     # below this many rows in total a batch is quicker to simplify than to start processes for
+
+# engines written in Python rather than in the DLL
+_PYTHON_ENGINES = {
+    ENGINE_QM:    SOP_QuineMcCluskey.simplifyBooleanExpr,
+    ENGINE_ESP:   lambda strIn: SOP_Espresso.simplifyBooleanExpr(strIn, _simplifyTimeLimit),
+    ENGINE_EXACT: lambda strIn: SOP_ExactCover.simplifyBooleanExpr(strIn, _simplifyTimeLimit),
+}
+# the same engines given a whole truth table (simplifyEngines.TABLE_ENGINES) save writing out and parsing the SOP string
+
+# results of previous simplifications, shared by everything that goes through simplifyTruthTable
+_resultCache = simplifyCacheHandler.simplifyCacheHandler()
+
+# prime implicants of the last few tables simplified by an incremental engine (simplifyEngines.INCREMENTAL_ENGINES),
+# newest first. a table that only differs from one of them in a few rows is simplified by updating its primes rather
+# than finding them all again. there's one for the table and one for its complement (for the POS)
+MAX_INCREMENTAL_STATES = 2
+_incrementalStates = []
+_incrementalLock = threading.Lock()
+
+# only used with an older SOP.dll (including the one in the repository, see below) that doesn't have the *ToBuffer
+# exports, which return a static string that two threads calling at once would overwrite
+_legacyDLLLock = threading.Lock()
+_hasBufferExports = False
+_hasResultExports = False
+_hasPackedExport = False
+_hasBatchExports = False
+
+# status values in SOPResult (see SOP/main.h)
+SOP_STATUS_INVALID_INPUT = 0
+SOP_STATUS_OK = 1
+SOP_STATUS_INTERNAL_ERROR = 2
+
+class SOPResult(ctypes.Structure):
+    # returned by the *Result exports. the strings stay in the DLL's memory until freeSOPResult is called so they are
+    # read straight from there with string_at rather than being copied and split on @@
+    _fields_ = [
+        ("status", ctypes.c_int),
+        ("passes", ctypes.c_int),
+        ("expression", ctypes.c_void_p),
+        ("expressionLength", ctypes.c_int),
+        ("identities", ctypes.c_void_p),
+        ("identitiesLength", ctypes.c_int),
+    ]
+
 """
-The DLL sends info back in the following form:
+The DLL sends info back as a SOPResult (status, passes, expression and identity log/error message). Older versions of
+SOP.dll only have the string exports, which send it back in the following form:
 
 OPERATION_STATUS, DATA_GENERATED, DEBUG_INFO
 
-where each of these is seperated by @@. In case of error, the return format is:
+where each of these is seperated by @@ (although sumOfProducts puts DATA_GENERATED first). In case of error, the
+return format is:
 
 0, NULL, ERROR INFO
 
+Either way _callDLL turns it into the same (status, expression, identities, passes) tuple.
+
+The SOP.dll in the repository is still the one built before the *ToBuffer, *Result, sumOfProductsPacked and batch
+exports were added to SOP/main.cpp, so dllInit finds none of them and every call takes the string path one at a time
+under _legacyDLLLock. They're only used once SOP.dll is rebuilt from SOP/SOP.sln, and SOP_DLL_HASH in ProjectManager.py
+(checked by ProjectManager and verify.py) has to be updated to the new DLL's hash at the same time.
+
+The functions that don't start with _ come in two versions: generateSOP, generateSimplifiedExpr and solveTruthTable
+are thread safe and raise SOPLibraryError, while sumOfProducts, simplifyBooleanExpr and simplifyTruthTable are the
+same thing for the GUI and show the fatal error dialog instead (Qt dialogs can only be opened from the main thread).
 """
 
+class SOPBatchResult(ctypes.Structure):
+    # returned by the *Batch exports, results points to count SOPResults. the whole batch is freed with
+    # freeSOPBatchResult, never the results on their own
+    _fields_ = [
+        ("count", ctypes.c_int),
+        ("results", ctypes.POINTER(SOPResult)),
+    ]
+
+class SOPLibraryError(Exception):
+    # error code (see errorLogging) and debug info for an error that happened off the main thread
+    def __init__(self, code: int, dbgInfo=None):
+        super().__init__(code, dbgInfo)
+        self.code = code
+        self.dbgInfo = dbgInfo
+
+class SOPVerificationError(SOPLibraryError):
+    # the simplified expression isn't the same function as the truth table it came from. rawSOP is still correct so
+    # it can be shown instead, mismatch is the expressionVerifier.ExpressionMismatchError with the details
+    def __init__(self, rawSOP: str, passes, mismatch):
+        super().__init__(81, mismatch.report())
+        self.rawSOP = rawSOP
+        self.passes = passes
+        self.mismatch = mismatch
+
+class SimplifyCancelled(Exception):
+    # raised by a progressCallback to stop solveTruthTable part way through (see simplifyWorker.py)
+    pass
+
+def _reportErrors(function, *args):
+    # run one of the thread safe functions and turn any error into the usual fatal error dialog
+    try:
+        return function(*args)
+    except SOPLibraryError as e:
+        errorLogging.raiseGenericFatalError(e.code, additionalDbgInfo=e.dbgInfo)
+
 def dllInit():
-    global _SOPDLL
+    global _SOPDLL, _hasBufferExports, _hasResultExports, _hasPackedExport, _hasBatchExports
     try:
         # try to open the DLL file
         _SOPDLL = ctypes.WinDLL(pathToDLL)
@@ -32,62 +161,533 @@ def dllInit():
         _SOPDLL.simplifyBooleanExpr.argtypes = [ctypes.c_char_p]
         _SOPDLL.simplifyBooleanExpr.restype = ctypes.c_char_p
         
+        # reentrant versions that write into a buffer we own, not in DLLs built before they were added
+        _hasBufferExports = hasattr(_SOPDLL, "sumOfProductsToBuffer") and hasattr(_SOPDLL, "simplifyBooleanExprToBuffer")
+        if _hasBufferExports:
+            _SOPDLL.sumOfProductsToBuffer.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+            _SOPDLL.sumOfProductsToBuffer.restype = ctypes.c_int
+            _SOPDLL.simplifyBooleanExprToBuffer.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+            _SOPDLL.simplifyBooleanExprToBuffer.restype = ctypes.c_int
+        
+        # structured versions that return a SOPResult
+        _hasResultExports = all(hasattr(_SOPDLL, name) for name in ("sumOfProductsResult", "simplifyBooleanExprResult", "freeSOPResult"))
+        if _hasResultExports:
+            _SOPDLL.sumOfProductsResult.argtypes = [ctypes.c_char_p, ctypes.c_int]
+            _SOPDLL.sumOfProductsResult.restype = ctypes.POINTER(SOPResult)
+            _SOPDLL.simplifyBooleanExprResult.argtypes = [ctypes.c_char_p]
+            _SOPDLL.simplifyBooleanExprResult.restype = ctypes.POINTER(SOPResult)
+            _SOPDLL.freeSOPResult.argtypes = [ctypes.POINTER(SOPResult)]
+            _SOPDLL.freeSOPResult.restype = None
+        
+        # SOP generator that takes a PackedTruthTable's output column instead of the row string
+        _hasPackedExport = _hasResultExports and hasattr(_SOPDLL, "sumOfProductsPacked")
+        if _hasPackedExport:
+            _SOPDLL.sumOfProductsPacked.argtypes = [ctypes.c_char_p, ctypes.c_int]
+            _SOPDLL.sumOfProductsPacked.restype = ctypes.POINTER(SOPResult)
+        
+        # one call for a whole list of truth tables or expressions
+        _hasBatchExports = _hasPackedExport and all(hasattr(_SOPDLL, name) for name in ("sumOfProductsPackedBatch", "simplifyBooleanExprBatch", "freeSOPBatchResult"))
+        if _hasBatchExports:
+            _SOPDLL.sumOfProductsPackedBatch.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+            _SOPDLL.sumOfProductsPackedBatch.restype = ctypes.POINTER(SOPBatchResult)
+            _SOPDLL.simplifyBooleanExprBatch.argtypes = [ctypes.POINTER(ctypes.c_char_p), ctypes.c_int]
+            _SOPDLL.simplifyBooleanExprBatch.restype = ctypes.POINTER(SOPBatchResult)
+            _SOPDLL.freeSOPBatchResult.argtypes = [ctypes.POINTER(SOPBatchResult)]
+            _SOPDLL.freeSOPBatchResult.restype = None
+        
     except FileNotFoundError:
         # The DLL has been moved or deleted
         errorLogging.raiseGenericFatalError(35)
     except Exception:
         # another reason is stopping the program opening the file
         errorLogging.raiseGenericFatalError(36)
-        
-def sumOfProducts(strIn: str, size:int) -> str:
-    # reference to the DLL sumOfProducts command
-    global _SOPDLL
+
+def _readResult(resultPointer) -> tuple[int, str, str, int]:
+    # copy the fields out of a SOPResult and give it back to the DLL to free
+    try:
+        return _readResultFields(resultPointer.contents)
+    finally:
+        _SOPDLL.freeSOPResult(resultPointer)
+
+def _readResultFields(result: SOPResult) -> tuple[int, str, str, int]:
+    expression = ctypes.string_at(result.expression, result.expressionLength).decode()
+    identities = ctypes.string_at(result.identities, result.identitiesLength).decode()
+    return result.status, expression, identities, result.passes
+
+def _readBatchResult(batchPointer) -> list[tuple[int, str, str, int]]:
+    # _readResult for every result in a SOPBatchResult, then the whole batch is freed at once
+    try:
+        batch = batchPointer.contents
+        return [_readResultFields(batch.results[i]) for i in range(batch.count)]
+    finally:
+        _SOPDLL.freeSOPBatchResult(batchPointer)
+
+def _parseSOPString(output: str) -> tuple[int, str, str, int]:
+    # SOP_STRING@@STATUS@@MESSAGE
+    output = output.split("@@")
+    status = int(output[1]) if len(output) > 1 and output[1].isdigit() else SOP_STATUS_INTERNAL_ERROR
+    return status, output[0], output[-1], 0
+
+def _parseSimplifyString(output: str) -> tuple[int, str, str, int]:
+    # STATUS@@EXPRESSION@@IDENTITIES@@PASSES, or STATUS@@0@@ERROR when status isn't 1 ("NULL" for an internal error)
+    output = output.split("@@")
+    if output[0] == "1" and len(output) == 4:
+        return SOP_STATUS_OK, output[1], output[2], int(output[3])
+    status = SOP_STATUS_INVALID_INPUT if output[0] == "0" else SOP_STATUS_INTERNAL_ERROR
+    return status, output[1] if len(output) > 1 else "", output[-1], 0
+
+def _callDLL(functionName: str, parseString, *args) -> tuple[int, str, str, int]:
+    # call a DLL function (e.g. "sumOfProducts") with the best interface the loaded DLL has and return its
+    # (status, expression, identities, passes). every version apart from the original exports is reentrant so no lock
+    # is needed.
+    if _hasResultExports:
+        return _readResult(getattr(_SOPDLL, functionName + "Result")(*args))
+    if _hasBufferExports:
+        # each call gets its own buffer. if it's too small the DLL returns the length it needs and we try again.
+        bufferSize = max(4096, 2 * len(args[0]))
+        while True:
+            buffer = ctypes.create_string_buffer(bufferSize)
+            length = getattr(_SOPDLL, functionName + "ToBuffer")(*args, buffer, bufferSize)
+            if length < bufferSize:
+                return parseString(buffer.value.decode())
+            bufferSize = length + 1
+    with _legacyDLLLock:
+        return parseString(bytes(getattr(_SOPDLL, functionName)(*args)).decode())
+
+def generateSOP(strIn: str, size: int) -> str:
+    # thread safe version of sumOfProducts
     try:
         # start by encoding the input string so it can be sent across to the dll
-        _strIn = strIn.encode("utf-8")
-        
-        # call the dll function and decode the results
-        output = str(_SOPDLL.sumOfProducts(_strIn, size).decode())
-        # output is seperated by @@ so we use the split command to collect all parts in a list
-        output = output.split("@@")
-        
-        # operation stauts
-        status = output[1]
-        
-        if status == "0":
-            # an error occured while evaulating the input (inside the dll)
-            errorLogging.raiseGenericFatalError(39,additionalDbgInfo=f"SOP: {output}")
-        elif status == "1":
-            # generated successfully
-            return output[0]             
-        else:
-            # SOP library returned an invalid status -> internal runtime error
-            errorLogging.raiseGenericFatalError(40, additionalDbgInfo=f"SOP_DBG: {output[2]}")
-        
-    except Exception:
+        status, expression, message, _ = _callDLL("sumOfProducts", _parseSOPString, strIn.encode("utf-8"), size)
+    except Exception as e:
         # could not run the SOP calculation
-        errorLogging.raiseGenericFatalError(41)
+        raise SOPLibraryError(41, e)
+    return _checkSOPStatus(status, expression, message)
+
+def generateSOPFromTable(table: PackedTruthTable) -> str:
+    # thread safe SOP generation for a PackedTruthTable, the row string is only built for DLLs without the packed export
+    if not _hasPackedExport:
+        return generateSOP(table.toRowString(), table.noVars + 1)
+    try:
+        status, expression, message, _ = _readResult(_SOPDLL.sumOfProductsPacked(bytes(table.packed), table.noVars))
+    except Exception as e:
+        raise SOPLibraryError(41, e)
+    return _checkSOPStatus(status, expression, message)
+
+def generateSOPBatch(tables: list[PackedTruthTable]) -> list:
+    # generateSOPFromTable for a list of tables in one DLL call. each item is the SOP string or the SOPLibraryError it
+    # caused, in the same order as the tables
+    if not _hasBatchExports:
+        return [_resultOrError(generateSOPFromTable, table) for table in tables]
+    if not tables:
+        return []
+    try:
+        noVars = (ctypes.c_int * len(tables))(*(table.noVars for table in tables))
+        outputs = b"".join(bytes(table.packed) for table in tables)
+        results = _readBatchResult(_SOPDLL.sumOfProductsPackedBatch(outputs, noVars, len(tables)))
+    except Exception as e:
+        error = SOPLibraryError(41, e)
+        return [error] * len(tables)
+    return [_resultOrError(_checkSOPStatus, status, expression, message) for status, expression, message, _ in results]
+
+def _resultOrError(function, *args):
+    # for the batch functions, one bad item is returned as its error instead of stopping the rest
+    try:
+        return function(*args)
+    except SOPLibraryError as e:
+        return e
+
+def _checkSOPStatus(status: int, expression: str, message: str) -> str:
+    if status == SOP_STATUS_INVALID_INPUT:
+        # an error occured while evaulating the input (inside the dll)
+        raise SOPLibraryError(39, f"SOP: {message}")
+    elif status == SOP_STATUS_OK:
+        # generated successfully
+        return expression
+    else:
+        # SOP library returned an invalid status -> internal runtime error
+        raise SOPLibraryError(40, f"SOP_DBG: {status} {message}")
+
+def sumOfProducts(strIn: str, size:int) -> str:
+    return _reportErrors(generateSOP, strIn, size)
         
+def setSimplifyEngine(engine: str) -> None:
+    # choose which engine simplifyBooleanExpr uses
+    global _simplifyEngine
+    if engine not in ENGINE_NAMES:
+        # unknown engine, likely corrupted save data
+        errorLogging.raiseGenericFatalError(76, additionalDbgInfo=f"ENG: {engine}")
+        return
+    _simplifyEngine = engine
+
+def getSimplifyEngine() -> str:
+    return _simplifyEngine
+
+def setExpressionForm(form: str) -> None:
+    # choose whether solveTruthTable gives back a sum of products, a product of sums or the cheaper of the two
+    global _expressionForm
+    if form not in FORM_NAMES:
+        # unknown form, likely corrupted save data
+        errorLogging.raiseGenericFatalError(82, additionalDbgInfo=f"FRM: {form}")
+        return
+    _expressionForm = form
+
+def getExpressionForm() -> str:
+    return _expressionForm
+
+def setSimplifyTimeLimit(seconds: float) -> None:
+    # deadline for the Espresso and exact engines, once it passes they return the best expression found so far
+    global _simplifyTimeLimit
+    _simplifyTimeLimit = max(0.0, float(seconds))
+
+def getSimplifyTimeLimit() -> float:
+    return _simplifyTimeLimit
+
+def setVerifyResults(verify: bool) -> None:
+    # turn the check of each simplified expression against its truth table on or off
+    global _verifyResults
+    _verifyResults = bool(verify)
+
+def getVerifyResults() -> bool:
+    return _verifyResults
+
+def generateSimplifiedExpr(strIn: str) -> list[str]:
+    # thread safe version of simplifyBooleanExpr, sends the expression to whichever engine has been selected. if
+    # verification is on the result is checked against strIn (see expressionVerifier.verifyExpression)
+    BOOL = _simplifyExpression(strIn)
+    if _verifyResults:
+        try:
+            expressionVerifier.verifyExpression(strIn, BOOL[0])
+        except expressionVerifier.ExpressionMismatchError as mismatch:
+            raise SOPVerificationError(strIn, BOOL[2], mismatch)
+    return BOOL
+
+def _simplifyExpression(strIn: str) -> list[str]:
+    # generateSimplifiedExpr without the check, for the truth table paths which check against the table instead
+    if _simplifyEngine in _PYTHON_ENGINES:
+        return _simplifyWithPythonEngine(_PYTHON_ENGINES[_simplifyEngine], strIn)
+    return _simplifyWithDLL(strIn)
+
 def simplifyBooleanExpr(strIn: str):
-    global _SOPDLL
+    return _reportErrors(generateSimplifiedExpr, strIn)
+
+def generateSimplifiedExprBatch(exprs: list[str]) -> list:
+    # generateSimplifiedExpr for a list of expressions, with one DLL call when the DLL engine is selected. each item
+    # is [expression, identities, passes] or the SOPLibraryError it caused, in the same order as the expressions. the
+    # results aren't checked, this is only used for tables which are checked against the table afterwards
+    if _simplifyEngine in _PYTHON_ENGINES or not _hasBatchExports:
+        return [_resultOrError(_simplifyExpression, expr) for expr in exprs]
+    if not exprs:
+        return []
     try:
-        # encode the input to bytes
-        _strIn = strIn.encode("utf-8")
-        # send to dll and decode result and split at deliminator
-        output = str(bytes(_SOPDLL.simplifyBooleanExpr(_strIn)).decode())
-        output = output.split("@@")
-        
-        status = output[0]
-        if status == "0":
-            # an error occured
-            errorLogging.raiseGenericFatalError(42,additionalDbgInfo=f"SMP_DBG: {output[2]}")
-        elif status == "1":
-            # generated successfully
-            # return the parts of the output excluding the status since it must be 1 ("OK") to get to this point.
-            return output[1:]             
+        encoded = (ctypes.c_char_p * len(exprs))(*(expr.encode("utf-8") for expr in exprs))
+        results = _readBatchResult(_SOPDLL.simplifyBooleanExprBatch(encoded, len(exprs)))
+    except Exception as e:
+        error = SOPLibraryError(44, e)
+        return [error] * len(exprs)
+    return [_resultOrError(_checkSimplifyStatus, *result) for result in results]
+
+def solveTruthTable(table: PackedTruthTable, progressCallback=None) -> list:
+    # truth table -> [SOP_RAW, expression, identities, passes] in the selected form, for a POS the raw expression is
+    # the unsimplified POS (every row that is 0) rather than the SOP
+    form = _expressionForm
+    if form == FORM_SOP:
+        return _solveSumOfProducts(table, progressCallback)
+    try:
+        POSResult = _toProductOfSumsResult(_solveSumOfProducts(table.complement(), progressCallback))
+    except SOPVerificationError as e:
+        POSResult = _toProductOfSumsResult(e)     # its raw SOP is of NOT Q, so it's shown as the raw POS of Q
+    if form == FORM_POS:
+        if isinstance(POSResult, SOPLibraryError):
+            raise POSResult
+        return POSResult
+    try:
+        SOPResult = _solveSumOfProducts(table, progressCallback)
+    except SOPVerificationError as e:
+        if isinstance(POSResult, SOPLibraryError):
+            raise   # both forms failed, the raw SOP is shown
+        SOPResult = e
+    return _cheaperResult(SOPResult, POSResult)
+
+def _solveSumOfProducts(table: PackedTruthTable, progressCallback=None) -> list:
+    # the result cache is checked first so a table that has been solved before with this engine is returned straight away.
+    # progressCallback(passes) is called between steps and by the Python engines after every pass, it can raise
+    # SimplifyCancelled to stop. the DLL can't be interrupted so it only gets checked before and after.
+    engine = _simplifyEngine
+    tableHash = _hashTable(table)
+    cached = _resultCache.lookup(tableHash, engine)
+    if cached:
+        return cached
+
+    if progressCallback:
+        progressCallback(0)
+    SOP = generateSOPFromTable(table)
+    if SOP == "0" or SOP == "1":
+        # constant output, nothing to simplify (or worth caching)
+        return [SOP, SOP, "Predefined constant result", 0]
+
+    if progressCallback:
+        progressCallback(0)
+    if engine in simplifyEngines.INCREMENTAL_ENGINES:
+        BOOL = _simplifyTableIncrementally(engine, table, progressCallback)
+    elif engine in simplifyEngines.TABLE_ENGINES:
+        BOOL = _simplifyTableWithPythonEngine(engine, table, progressCallback)
+    elif table.hasDontCares():
+        BOOL = _simplifyWithDontCares(table, generateSOPFromTable(table.withDontCaresSet()))
+    else:
+        BOOL = _simplifyExpression(SOP)
+    _verifyResult(table, SOP, BOOL)
+    _resultCache.store(tableHash, engine, table.noVars, SOP, BOOL[0], BOOL[1], BOOL[2])
+    return [SOP] + list(BOOL)
+
+def solveMultiOutputTable(table: MultiOutputTruthTable, progressCallback=None) -> list:
+    # solveTruthTable for a table with several outputs. they are simplified together by SOP_MultiOutput (whichever
+    # engine is selected) so they can share terms, and the result is the same [SOP_RAW, expression, identities, passes]
+    # with the raw SOPs and the expressions of every output joined into one string (see variableNames.joinOutputs).
+    # the outputs are always sums of products, the shared terms are what makes them cheaper
+    tableHash = simplifyCacheHandler.hashTruthTable(table.noVars, b"".join(bytes(output.packed) for output in table.outputs),
+                                                    b"".join(bytes(output.dontCares) for output in table.outputs))
+    cached = _resultCache.lookup(tableHash, ENGINE_MULTI)
+    if cached:
+        return cached
+
+    if progressCallback:
+        progressCallback(0)
+    outputNames = variableNames.defaultOutputNames(table.noOutputs)
+    SOPs = [generateSOPFromTable(output) for output in table.outputs]
+    SOP = variableNames.joinOutputs(outputNames, SOPs)
+
+    if progressCallback:
+        progressCallback(0)
+    try:
+        exprs, identities, passes = simplifyEngines.simplifyMultiOutputTable(table, _simplifyTimeLimit, progressCallback)
+    except SimplifyCancelled:
+        raise
+    except Exception as e:
+        raise SOPLibraryError(44, e)
+    try:
+        for output, outputSOP, expr in zip(table.outputs, SOPs, exprs):
+            _verifyResult(output, outputSOP, [expr, identities, passes])
+    except SOPVerificationError as e:
+        raise SOPVerificationError(SOP, passes, e.mismatch)     # the raw SOP of every output is shown instead
+    expr = variableNames.joinOutputs(outputNames, exprs)
+    _resultCache.store(tableHash, ENGINE_MULTI, table.noVars, SOP, expr, identities, passes)
+    return [SOP, expr, identities, passes]
+
+def _hashTable(table: PackedTruthTable) -> str:
+    return simplifyCacheHandler.hashTruthTable(table.noVars, bytes(table.packed), bytes(table.dontCares))
+
+def _simplifyWithDontCares(table: PackedTruthTable, fullSOP: str, BOOL: list = None) -> list[str]:
+    # the DLL's simplifier only knows about 1s, so a table with don't cares is simplified with every don't care set to
+    # 1 (fullSOP, the SOP of table.withDontCaresSet()) and then any term that is only there for the don't cares is
+    # removed. BOOL is the simplifier's result for fullSOP if it has already been worked out (by a batch call)
+    if fullSOP == "1":
+        return ["1", "Predefined constant result", "0"]    # the 1s and don't cares are every row
+    if BOOL is None:
+        BOOL = _simplifyExpression(fullSOP)
+    try:
+        noVars, cover = SOP_QuineMcCluskey.parseSOPExpression(BOOL[0], table.noVars)
+    except ValueError:
+        return BOOL     # not valid SOP, left for _verifyResult to report
+    cover = SOP_Espresso.removeRedundantCubes(cover, table.asInt(), table.dontCaresAsInt(), noVars)
+    return [SOP_QuineMcCluskey.formatCover(cover, noVars)] + list(BOOL[1:])
+
+def _verifyResult(table: PackedTruthTable, SOP: str, BOOL: list) -> None:
+    # raise SOPVerificationError if the simplified expression BOOL[0] isn't the same function as the table. results
+    # that fail aren't cached.
+    if not _verifyResults:
+        return
+    try:
+        expressionVerifier.verifyAgainstTable(table, BOOL[0])
+    except expressionVerifier.ExpressionMismatchError as mismatch:
+        raise SOPVerificationError(SOP, BOOL[2], mismatch)
+
+def simplifyTruthTable(table: PackedTruthTable):
+    return _reportErrors(solveTruthTable, table)
+
+def _toProductOfSumsResult(result):
+    # a result for the complemented table -> the same result as a POS. a verification error is turned round the same
+    # way so its raw expression is still Q rather than NOT Q, other errors are passed straight through
+    if isinstance(result, SOPVerificationError):
+        return SOPVerificationError(variableNames.toProductOfSums(result.rawSOP), result.passes, _complementMismatch(result.mismatch))
+    if isinstance(result, SOPLibraryError):
+        return result
+    SOP, expression, identities, passes = result
+    return [variableNames.toProductOfSums(SOP), variableNames.toProductOfSums(expression), identities, passes]
+
+def _complementMismatch(mismatch):
+    # the mismatch of the simplified NOT Q -> the same mismatch for the POS of Q, the rows that should be 1 are the
+    # ones that should be 0 and the other way round
+    if mismatch.reason:
+        return expressionVerifier.ExpressionMismatchError(mismatch.expression, mismatch.noVars, reason=mismatch.reason)
+    return expressionVerifier.ExpressionMismatchError(variableNames.toProductOfSums(mismatch.expression), mismatch.noVars, mismatch.noExtra,
+                                                      mismatch.noMissing, mismatch.extraRows, mismatch.missingRows)
+
+def _cheaperResult(SOPResult, POSResult):
+    # pick the POS only if it costs less, if either form failed the other one is used
+    if isinstance(SOPResult, SOPLibraryError) or isinstance(POSResult, SOPLibraryError):
+        return POSResult if isinstance(SOPResult, SOPLibraryError) else SOPResult
+    SOPCost = variableNames.expressionCost(SOPResult[1])
+    POSCost = variableNames.expressionCost(POSResult[1])
+    if POSCost < SOPCost:
+        return POSResult[:2] + [f"{POSResult[2]} (product of sums, cost {POSCost} vs {SOPCost})"] + POSResult[3:]
+    return SOPResult
+
+def solveTruthTablesBatch(tables: list[PackedTruthTable], maxWorkers: int = None) -> list:
+    # solveTruthTable for many tables at once, e.g. re-simplifying every expression in a project after the engine has
+    # been changed. the result for each table is [SOP_RAW, expression, identities, passes] or the SOPLibraryError it
+    # caused, in the same order as the tables
+    form = _expressionForm
+    if form == FORM_SOP:
+        return _solveSumOfProductsBatch(tables, maxWorkers)
+    POSResults = [_toProductOfSumsResult(result) for result in _solveSumOfProductsBatch([table.complement() for table in tables], maxWorkers)]
+    if form == FORM_POS:
+        return POSResults
+    return [_cheaperResult(SOPResult, POSResult) for SOPResult, POSResult in zip(_solveSumOfProductsBatch(tables, maxWorkers), POSResults)]
+
+def _solveSumOfProductsBatch(tables: list[PackedTruthTable], maxWorkers: int = None) -> list:
+    # cached tables are skipped, the rest go to the DLL in one batch call for their SOP and then to the DLL in another
+    # batch call or to a pool of processes for the Python engines (which can't run in parallel in threads because of
+    # the GIL).
+    engine = _simplifyEngine
+    timeLimit = _simplifyTimeLimit
+    results = [None] * len(tables)
+    tableHashes = [_hashTable(table) for table in tables]
+
+    misses = []
+    for i, tableHash in enumerate(tableHashes):
+        results[i] = _resultCache.lookup(tableHash, engine)
+        if not results[i]:
+            misses.append(i)
+
+    toSimplify = []     # (index, SOP) of every table that isn't cached or constant
+    for i, SOP in zip(misses, generateSOPBatch([tables[i] for i in misses])):
+        if isinstance(SOP, SOPLibraryError):
+            results[i] = SOP
+        elif SOP == "0" or SOP == "1":
+            results[i] = [SOP, SOP, "Predefined constant result", 0]
+        else:
+            toSimplify.append((i, SOP))
+
+    if engine in simplifyEngines.TABLE_ENGINES:
+        simplified = _simplifyTablesInProcesses(engine, [tables[i] for i, _ in toSimplify], timeLimit, maxWorkers)
+    else:
+        simplified = _simplifyBatchWithDLL([tables[i] for i, _ in toSimplify], [SOP for _, SOP in toSimplify])
+
+    for (i, SOP), BOOL in zip(toSimplify, simplified):
+        if not isinstance(BOOL, SOPLibraryError):
+            try:
+                _verifyResult(tables[i], SOP, BOOL)
+            except SOPVerificationError as e:
+                BOOL = e
+        if isinstance(BOOL, SOPLibraryError):
+            results[i] = BOOL
+            continue
+        _resultCache.store(tableHashes[i], engine, tables[i].noVars, SOP, BOOL[0], BOOL[1], BOOL[2])
+        results[i] = [SOP] + list(BOOL)
+    return results
+
+def _simplifyBatchWithDLL(tables: list[PackedTruthTable], SOPs: list[str]) -> list:
+    # generateSimplifiedExprBatch for the SOPs of some tables, tables with don't cares are simplified the same way as
+    # _simplifyWithDontCares but still in one batch call
+    exprs = list(SOPs)
+    withDontCares = [i for i, table in enumerate(tables) if table.hasDontCares()]
+    for i, fullSOP in zip(withDontCares, generateSOPBatch([tables[i].withDontCaresSet() for i in withDontCares])):
+        exprs[i] = fullSOP
+
+    results = [None] * len(tables)
+    toDLL = []
+    for i, expr in enumerate(exprs):
+        if isinstance(expr, SOPLibraryError):
+            results[i] = expr
+        elif expr == "1":
+            results[i] = _simplifyWithDontCares(tables[i], expr)
         else:
-            # SOP library returned an invalid status -> internal runtime error
-            errorLogging.raiseGenericFatalError(43, additionalDbgInfo=f"SMP_DBG: {output}")
+            toDLL.append(i)
+
+    for i, BOOL in zip(toDLL, generateSimplifiedExprBatch([exprs[i] for i in toDLL])):
+        if tables[i].hasDontCares() and not isinstance(BOOL, SOPLibraryError):
+            BOOL = _simplifyWithDontCares(tables[i], exprs[i], BOOL)
+        results[i] = BOOL
+    return results
+
+def _simplifyTablesInProcesses(engine: str, tables: list[PackedTruthTable], timeLimit: float, maxWorkers: int = None) -> list:
+    # run a Python engine over several tables in a process pool. starting the processes isn't free, so a single table
+    # or a batch of small tables is simplified here instead
+    if len(tables) <= 1 or sum(table.noRows for table in tables) < PROCESS_POOL_MIN_ROWS:
+        return [_resultOrError(_simplifyTableWithPythonEngine, engine, table) for table in tables]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = [executor.submit(simplifyEngines.simplifyPackedTable, engine, table.noVars, bytes(table.packed), timeLimit,
+                                   bytes(table.dontCares) if table.hasDontCares() else None) for table in tables]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(SOPLibraryError(44, e))
+    return results
+
+def clearResultCache() -> bool:
+    return _resultCache.clear()
+
+def _simplifyWithPythonEngine(engineFunction, strIn: str) -> list[str]:
+    try:
+        return engineFunction(strIn)
+    except ValueError as e:
+        # the input expression wasn't valid SOP (same as status 0 from the dll)
+        raise SOPLibraryError(42, f"SMP_DBG: {e}")
     except Exception as e:
-        errorLogging.raiseGenericFatalError(44, additionalDbgInfo=e)
-        
+        raise SOPLibraryError(44, e)
+
+def _simplifyTableWithPythonEngine(engine: str, table: PackedTruthTable, progressCallback=None) -> list[str]:
+    try:
+        return simplifyEngines.simplifyTable(engine, table, _simplifyTimeLimit, progressCallback)
+    except SimplifyCancelled:
+        raise
+    except Exception as e:
+        raise SOPLibraryError(44, e)
+
+def _simplifyTableIncrementally(engine: str, table: PackedTruthTable, progressCallback=None) -> list[str]:
+    # _simplifyTableWithPythonEngine using the primes of the closest table simplified before, if it's close enough.
+    # the state is taken out of the list while it's being updated so two threads never change the same one
+    with _incrementalLock:
+        changes = [(primes.changedRows(table), i) for i, primes in enumerate(_incrementalStates)]
+        changes = [(changedRows, i) for changedRows, i in changes if changedRows is not None and changedRows <= MAX_CHANGED_ROWS]
+        primes = _incrementalStates.pop(min(changes)[1]) if changes else None
+    try:
+        if primes is None:
+            primes, changedRows = IncrementalPrimes(table, progressCallback, _simplifyTimeLimit), None
+        else:
+            changedRows = primes.update(table)
+        BOOL = simplifyEngines.simplifyIncrementally(engine, primes, table, _simplifyTimeLimit, changedRows, progressCallback)
+    except SimplifyCancelled:
+        raise
+    except TooManyImplicants:
+        # too many primes to keep up to date, the table engine falls back to Espresso and nothing is kept
+        return _simplifyTableWithPythonEngine(engine, table, progressCallback)
+    except Exception as e:
+        raise SOPLibraryError(44, e)
+    with _incrementalLock:
+        _incrementalStates.insert(0, primes)
+        del _incrementalStates[MAX_INCREMENTAL_STATES:]
+    return BOOL
+
+def _simplifyWithDLL(strIn: str) -> list[str]:
+    try:
+        # encode the input to bytes and send to dll
+        status, expression, identities, passes = _callDLL("simplifyBooleanExpr", _parseSimplifyString, strIn.encode("utf-8"))
+    except Exception as e:
+        raise SOPLibraryError(44, e)
+    return _checkSimplifyStatus(status, expression, identities, passes)
+
+def _checkSimplifyStatus(status: int, expression: str, identities: str, passes: int) -> list[str]:
+    if status == SOP_STATUS_INVALID_INPUT:
+        # an error occured
+        raise SOPLibraryError(42, f"SMP_DBG: {identities}")
+    elif status == SOP_STATUS_OK:
+        # generated successfully, passes are kept as a string like the rest of the engines
+        return [expression, identities, str(passes)]
+    else:
+        # SOP library returned an invalid status -> internal runtime error
+        raise SOPLibraryError(43, f"SMP_DBG: {status} {identities}")
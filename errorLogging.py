@@ -28,6 +28,9 @@ def writeErrorLog(errorCode, includeDB = True, additionalInfo=None):
     fileNames = ["tmp_dbg.txt"]
     if includeDB:
         fileNames.append("main.db")
+        if os.path.exists("main.db-wal"):
+            # the latest changes are in the WAL file until they're checkpointed into main.db
+            fileNames.append("main.db-wal")
     
     randomSuffix = str(random.randint(0, 99999)).rjust(5,"0")
     with zipfile.ZipFile(f"SYSTEM_LOG_{randomSuffix}.zip", "w") as archive:
@@ -0,0 +1,154 @@
+import numpy as np
+from functools import lru_cache
+from packedTruthTable import PackedTruthTable
+import variableNames
+from SOP_QuineMcCluskey import ALPHABET, parseSOPExpression
+
+"""
+Turns an SOP expression (the "#" after a variable syntax used by SOP.dll and ExportLanguageHandler, e.g. "AB#+C")
+back into its truth table, for checking a simplified expression against the table it came from.
+
+The expression is parsed once, as an array of characters, into (mask, value) cubes like SOP_QuineMcCluskey's. The
+raw SOP of a 20 variable table can have half a million terms, so the parse is done with NumPy rather than a loop
+over the characters. Everything after that is done on packed output columns (row i is bit i % 8 of byte i // 8, the
+same layout as PackedTruthTable), so a 20 variable table is 128KB per column and every AND/OR handles 64 rows at once:
+
+    - the column for a variable is 1 in every row where that input is 1, e.g. C in a 3 variable table is 0b10101010
+    - a term is the AND of its literals' columns (inverted for A#), and the expression is the OR of its terms
+
+A term with most of its variables (e.g. a minterm of the raw SOP) only covers a few rows, so ANDing whole columns
+would be wasted work. Those terms are expanded into their row numbers instead, and terms with the same variables
+are expanded together.
+
+Expressions with long names (e.g. "rst_n*clk#", see variableNames.py) are parsed by SOP_QuineMcCluskey instead. They
+are never as long as a raw SOP, which is always written with the default names.
+"""
+
+# patterns of the 3 lowest input bits within a byte of outputs (bit j of the byte is row 8k + j)
+_LOW_BIT_PATTERNS = [0xAA, 0xCC, 0xF0]
+
+# character classes for parseExpression, looked up for every character at once
+_INVALID, _LETTER, _HASH, _PLUS = 0, 1, 2, 3
+_CHAR_CLASSES = np.zeros(256, dtype = np.uint8)
+_CHAR_CLASSES[[ord(letter) for letter in ALPHABET]] = _LETTER
+_CHAR_CLASSES[ord("#")] = _HASH
+_CHAR_CLASSES[ord("+")] = _PLUS
+# pairs of neighbouring characters (first class * 4 + second class) that can't appear in SOP
+_BAD_PAIRS = np.zeros(16, dtype = bool)
+_BAD_PAIRS[[_HASH << 2 | _HASH, _PLUS << 2 | _HASH, _PLUS << 2 | _PLUS]] = True
+
+@lru_cache(maxsize = 64)
+def _inputColumn(noVars: int, bitPosition: int) -> np.ndarray:
+    # packed column that is 1 in every row with the given bit of the row number set. A is bit noVars - 1.
+    # the result is cached and shared so it must not be changed.
+    noBytes = ((1 << noVars) + 7) // 8
+    if bitPosition < 3:
+        column = np.full(noBytes, _LOW_BIT_PATTERNS[bitPosition], dtype = np.uint8)
+    else:
+        # whole bytes of 0s then 1s, each run 2^(bitPosition - 3) bytes long
+        column = (((np.arange(noBytes) >> (bitPosition - 3)) & 1) * 0xFF).astype(np.uint8)
+    column.setflags(write = False)
+    return column
+
+def _asWords(column: np.ndarray) -> np.ndarray:
+    # 64 rows per operation when the column is a whole number of 8 byte words (any table with 6+ variables)
+    return column.view(np.uint64) if column.size % 8 == 0 else column
+
+def parseExpression(exprIn: str, noVars: int = 0) -> tuple[int, np.ndarray, np.ndarray]:
+    # same as SOP_QuineMcCluskey.parseSOPExpression but returns the masks and values as arrays. raises ValueError
+    # if the expression isn't valid SOP.
+    chars = np.frombuffer(exprIn.replace(" ", "").encode(), dtype = np.uint8)
+    charClasses = _CHAR_CLASSES[chars]
+    # every character is a letter, # or +, the first is a letter and the last isn't +, and no pair of characters is
+    # in _BAD_PAIRS (## and +# put a # after something that isn't a letter, ++ is an empty term)
+    if (chars.size == 0 or charClasses[0] != _LETTER or charClasses[-1] == _PLUS or np.any(charClasses == _INVALID)
+            or np.any(_BAD_PAIRS[(charClasses[:-1] << 2) | charClasses[1:]])):
+        raise ValueError(f"Input string |{exprIn}| is not valid.")
+    isLetter = charClasses == _LETTER
+    isHash = charClasses == _HASH
+
+    letterPositions = np.flatnonzero(isLetter)
+    variables = chars[letterPositions].astype(np.int64) - ord("A")
+    noVars = max(noVars, int(variables.max()) + 1)
+    isInverted = np.zeros(letterPositions.size, dtype = bool)
+    followed = letterPositions + 1 < chars.size
+    isInverted[followed] = isHash[letterPositions[followed] + 1]
+
+    # the letters are in term order, so each term's bits are a contiguous slice that reduceat can OR together. a term
+    # starts with the first letter and every letter after a +
+    startsTerm = np.zeros(chars.size, dtype = bool)
+    startsTerm[0] = True
+    startsTerm[1:] = charClasses[:-1] == _PLUS
+    termStarts = np.flatnonzero(startsTerm[letterPositions])
+    bits = np.int64(1) << (noVars - 1 - variables)
+    plainBits = np.bitwise_or.reduceat(np.where(isInverted, 0, bits), termStarts)
+    invertedBits = np.bitwise_or.reduceat(np.where(isInverted, bits, 0), termStarts)
+
+    # a term with A and A# can never be true (AA# = 0) so it's left out
+    keep = (plainBits & invertedBits) == 0
+    fullMask = (1 << noVars) - 1
+    masks = fullMask & ~(plainBits[keep] | invertedBits[keep])
+    return noVars, masks, plainBits[keep]
+
+def evaluateCubes(masks: np.ndarray, values: np.ndarray, noVars: int) -> PackedTruthTable:
+    # (mask, value) cubes as arrays -> truth table, see the explanation at the top of the file
+    noRows = 1 << noVars
+    noBytes = (noRows + 7) // 8
+    packed = np.zeros(noBytes, dtype = np.uint8)
+    outputWords = _asWords(packed)
+    rowHits = None      # rows set by expanded terms, packed into the output at the end
+
+    uniqueMasks, groupOfCube = np.unique(masks, return_inverse = True)
+    for group, mask in enumerate(uniqueMasks.tolist()):
+        groupValues = values[groupOfCube == group]
+        noFree = mask.bit_count()
+        noLiterals = noVars - noFree
+        # expanding costs about one operation per row covered, a column AND costs one per word per literal
+        if (1 << noFree) <= max(1, noLiterals) * outputWords.size:
+            if rowHits is None:
+                rowHits = np.zeros(noRows, dtype = bool)
+            offsets = np.zeros(1, dtype = np.int64)
+            for bitPosition in range(noVars):
+                if mask >> bitPosition & 1:
+                    offsets = np.concatenate((offsets, offsets | (1 << bitPosition)))
+            rowHits[(groupValues[:, None] | offsets[None, :]).ravel()] = True
+            continue
+
+        for value in groupValues.tolist():
+            term = np.full(outputWords.size, np.iinfo(outputWords.dtype).max, dtype = outputWords.dtype)
+            for bitPosition in range(noVars):
+                if mask >> bitPosition & 1:
+                    continue    # this variable isn't in the term
+                column = _asWords(_inputColumn(noVars, bitPosition))
+                if value >> bitPosition & 1:
+                    term &= column
+                else:
+                    term &= ~column
+            outputWords |= term
+
+    if rowHits is not None:
+        packed |= np.packbits(rowHits, bitorder = "little")
+    return PackedTruthTable(noVars, packed.tobytes())
+
+def evaluateCover(cover: list[tuple[int, int]], noVars: int) -> PackedTruthTable:
+    # the same for a cover from one of the SOP_ engines
+    masks = np.array([mask for mask, _ in cover], dtype = np.int64)
+    values = np.array([value for _, value in cover], dtype = np.int64)
+    return evaluateCubes(masks, values, noVars)
+
+def evaluateExpression(exprIn: str, noVars: int = 0, names: list[str] = None) -> PackedTruthTable:
+    # SOP string -> truth table. the table is as wide as the highest variable used, or noVars if that's bigger (e.g.
+    # the width of the table the expression was generated from). "0" and "1" are the constant results of the SOP
+    # generator. names is the name table the expression is written with, if it doesn't use the default names.
+    # raises ValueError if the expression isn't valid SOP.
+    constant = exprIn.replace(" ", "")
+    if constant in ("0", "1"):
+        table = PackedTruthTable(noVars)
+        if constant == "1":
+            table = PackedTruthTable(noVars, b"\xff" * len(table.packed))   # the constructor clears any bits past the last row
+        return table
+    if names is not None or variableNames.isSeparated(constant):
+        noVars, cover = parseSOPExpression(constant, noVars, names)
+        return evaluateCover(cover, noVars)
+    noVars, masks, values = parseExpression(exprIn, noVars)
+    return evaluateCubes(masks, values, noVars)
@@ -0,0 +1,104 @@
+import numpy as np
+import variableNames
+import binaryDecisionDiagram
+from packedTruthTable import PackedTruthTable
+from expressionEvaluator import evaluateExpression
+from SOP_QuineMcCluskey import parseSOPExpression
+
+"""
+Checks that a simplified expression is the same function as the truth table (or raw SOP) it was simplified from, so
+a bug in one of the simplifiers can't silently give the user the wrong circuit.
+
+Both sides are packed output columns (see expressionEvaluator.py), so they are compared 64 rows at a time with XOR.
+The rows are only unpacked when there is a difference, to count them and list a few for the report. Rows that are
+don't cares in the expected table can be either value.
+
+Without a table (verifyExpression) the two expressions are compared as BDDs instead (see binaryDecisionDiagram.py),
+which works however many variables they have. The truth tables are only built to list the rows that differ, and only
+up to MAX_TABLE_VARIABLES.
+"""
+
+MAX_EXAMPLE_ROWS = 8        # rows of each kind listed in a mismatch report
+MAX_TABLE_VARIABLES = 20    # widest expressions verifyExpression builds truth tables for when they differ
+
+class ExpressionMismatchError(Exception):
+    # where the simplified expression and the function it should equal disagree:
+    #   missingRows - rows that should be 1 but the expression gives 0 (only the first MAX_EXAMPLE_ROWS)
+    #   extraRows   - rows that should be 0 but the expression gives 1 (the same)
+    #   reason      - set instead when the expression couldn't be evaluated at all
+    def __init__(self, expression: str, noVars: int, noMissing=0, noExtra=0, missingRows=(), extraRows=(), reason=None):
+        self.expression = expression
+        self.noVars = noVars
+        self.noMissing = noMissing
+        self.noExtra = noExtra
+        self.missingRows = list(missingRows)
+        self.extraRows = list(extraRows)
+        self.reason = reason
+        super().__init__(self.report())
+
+    def formatRow(self, row: int) -> str:
+        # inputs of a row, e.g. "A=1 B=0 C=1"
+        return " ".join(f"{variableNames.defaultName(i)}={row >> (self.noVars - 1 - i) & 1}" for i in range(self.noVars))
+
+    def report(self) -> str:
+        lines = [f"Simplified expression |{self.expression}| does not match the truth table ({self.noVars} variables)."]
+        if self.reason:
+            lines.append(self.reason)
+            return "\n".join(lines)
+        lines.append(f"{self.noMissing} rows should be 1 but are 0, {self.noExtra} rows should be 0 but are 1.")
+        for label, rows in (("Should be 1", self.missingRows), ("Should be 0", self.extraRows)):
+            for row in rows:
+                lines.append(f"{label}: row {row} ({self.formatRow(row)})")
+        return "\n".join(lines)
+
+def _asWords(packed: bytearray) -> np.ndarray:
+    array = np.frombuffer(bytes(packed), dtype = np.uint8)
+    return array.view(np.uint64) if array.size % 8 == 0 else array
+
+def _rowsSet(words: np.ndarray) -> np.ndarray:
+    # row numbers of every 1 bit in a packed column
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder = "little"))
+
+def compareTables(expected: PackedTruthTable, actual: PackedTruthTable, expression: str = "") -> None:
+    # raise ExpressionMismatchError if the two tables have any different outputs, apart from expected's don't cares
+    if expected.noVars != actual.noVars:
+        raise ExpressionMismatchError(expression, expected.noVars, reason = f"The expression uses {actual.noVars} variables.")
+    expectedWords = _asWords(expected.packed)
+    actualWords = _asWords(actual.packed)
+    careWords = ~_asWords(expected.dontCares)
+    if not np.any((expectedWords ^ actualWords) & careWords):
+        return  # the usual case, no need to look at individual rows
+
+    missingRows = _rowsSet(expectedWords & ~actualWords)   # don't cares are always 0 in expected so can't be missing
+    extraRows = _rowsSet(actualWords & ~expectedWords & careWords)
+    raise ExpressionMismatchError(expression, expected.noVars, missingRows.size, extraRows.size,
+                                  missingRows[:MAX_EXAMPLE_ROWS].tolist(), extraRows[:MAX_EXAMPLE_ROWS].tolist())
+
+def _evaluate(expression: str, noVars: int) -> PackedTruthTable:
+    try:
+        return evaluateExpression(expression, noVars)
+    except ValueError:
+        raise ExpressionMismatchError(expression, noVars, reason = "The expression is not valid SOP.")
+
+def verifyAgainstTable(table: PackedTruthTable, expression: str) -> None:
+    # check a simplified expression against the truth table it was generated from
+    compareTables(table, _evaluate(expression, table.noVars), expression)
+
+def _noVariables(expression: str, noVars: int) -> int:
+    # variables used by an expression (at least noVars)
+    if expression.replace(" ", "") in ("0", "1"):
+        return noVars
+    try:
+        return parseSOPExpression(expression, noVars)[0]
+    except ValueError:
+        raise ExpressionMismatchError(expression, noVars, reason = "The expression is not valid SOP.")
+
+def verifyExpression(rawSOP: str, expression: str, noVars: int = 0) -> None:
+    # check a simplified expression against the raw SOP it was simplified from, when the table itself isn't available
+    noVars = max(_noVariables(rawSOP, noVars), _noVariables(expression, noVars))
+    if binaryDecisionDiagram.expressionsEquivalent(rawSOP, expression):
+        return
+    if noVars > MAX_TABLE_VARIABLES:
+        raise ExpressionMismatchError(expression, noVars, reason = "It is a different function to the unsimplified expression (too many variables to list the rows).")
+    expected = _evaluate(rawSOP, noVars)
+    compareTables(expected, _evaluate(expression, noVars), expression)
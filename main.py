@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import multiprocessing
 from PyQt5 import QtWidgets, uic, QtCore
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QCloseEvent, QIcon
@@ -20,6 +21,8 @@ import ExportLanguageHandler
 
 import errorLogging                     # file that allows for easy error handling
 import databaseHandler                  # allows for saving of files
+import dllWrapper                       # simplification engine settings are part of the save data
+from packedTruthTable import PackedTruthTable, MultiOutputTruthTable  # "TT" save data
 
 class RenameExprDialog(QtWidgets.QDialog):    # Class that manages dialog pop-up for renaming an expression 
     def __init__(self, currentName):
@@ -152,6 +155,7 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
         self.actionRenameThis.triggered.connect(self.renameCurrentExpr)
         
         self.databaseReference = databaseHandler.databaseHandler()
+        # opened when first needed, then kept open until the editor closes
         
         # Load Data from sys.argv 
         
@@ -199,11 +203,13 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
         try:
             truthTableData = loadedDataDict["TT"]
             
-            # number of variables
-            self.truthTWindowReference.noVarsSpinBox.setValue(int(truthTableData[0]))
-            # setup the saved truth table
-            for i, spinBox in enumerate(self.truthTWindowReference.outputSpinBoxes):
-                spinBox.setValue(int(truthTableData[1][i]))
+            # setup the saved truth table (the number of variables and the outputs, packed or in the old format)
+            # input names from a loaded file, and then any outputs after the first (not in save data from older versions)
+            names = truthTableData[5] if len(truthTableData) > 5 else None
+            extraOutputs = truthTableData[6] if len(truthTableData) > 6 else []
+            outputNames = truthTableData[7] if len(truthTableData) > 7 else None
+            table = MultiOutputTruthTable.fromSaveStrings(int(truthTableData[0]), [truthTableData[1]] + extraOutputs, names, outputNames)
+            self.truthTWindowReference.loadTruthTable(table)
             # setup user options
             self.truthTWindowReference.actAutoCloseWin.setChecked(int(truthTableData[2]))
             self.truthTWindowReference.actAutoOpenExpr.setChecked(int(truthTableData[3]))
@@ -235,6 +241,18 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
                 ## Identities used string not generated if no identies applied.
                 
                 self.activateExprViewer()
+            
+            # simplification engine chosen for this expression (not in save data from older versions)
+            if len(exprEditorData) > 8:
+                self.exprWindowReference.setSimplifyEngine(exprEditorData[8])
+            if len(exprEditorData) > 9:
+                dllWrapper.setSimplifyTimeLimit(exprEditorData[9])
+            if len(exprEditorData) > 10:
+                self.exprWindowReference.actionVerify.setChecked(exprEditorData[10])
+            if len(exprEditorData) > 11:
+                self.exprWindowReference.inputNames = exprEditorData[11]
+            if len(exprEditorData) > 12:
+                self.exprWindowReference.setExpressionForm(exprEditorData[12])
         # EV data was missing, incorrect or corrupted
         except IndexError:
             errorLogging.raiseGenericFatalError(14)
@@ -325,7 +343,7 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
             errorLogging.raiseGenericFatalError(19, additionalDbgInfo=e)
             
         # Mark finished sections as complete
-        if loadedDataDict["TT"][-1]:
+        if loadedDataDict["TT"][4]:
             self.markLinkAsCompleted(1)
         
         if loadedDataDict["EX"][0]:
@@ -520,12 +538,11 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
         try:       
             # try to convert our new savedata to a string for the SQL db    
             outputStr = json.dumps(saveDict)
-            # connect to main
-            self.databaseReference.connectToDatabase("main.db")
+            # connect to main if this is the first save
+            if not self.databaseReference.isConnectionOpen():
+                self.databaseReference.connectToMain()
             # save the expression's data
             self.databaseReference.saveExpression(self.expressionID, outputStr)
-            # close the connection
-            self.databaseReference.closeConnection()
             # tell user all went ok
             if not disableConfirmation:
                 errorLogging.raiseInfoDlg("Saved ok!", "Saved Expression.")
@@ -549,7 +566,7 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
         # we can't close yet because we need to update the database
         if self.commitNewExpressionName:
             # update the name (sys.argv 2 is the current expression's id)
-            self.databaseReference.executeSQLQuery(f"UPDATE Expressions SET expressionName = \"{self.workingExpression}\" WHERE ExpressionID = {sys.argv[2]}")
+            self.databaseReference.execute("UPDATE Expressions SET expressionName = ? WHERE ExpressionID = ?", (self.workingExpression, sys.argv[2]))
         
         # check for save on close
         if self.findChild(QAction, "actionAutoSave").isChecked():
@@ -559,8 +576,12 @@ class MainEditorWindow(QtWidgets.QMainWindow):      # Class that manages the UI
         self.databaseReference.closeConnection()    
         sys.exit()
     
-app = QtWidgets.QApplication(sys.argv)
-app.setStyleSheet("""
+# the process pool in dllWrapper.solveTruthTablesBatch starts new Python processes that import this file, so the
+# windows are only created when it is the program being run
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    app = QtWidgets.QApplication(sys.argv)
+    app.setStyleSheet("""
 QMainWindow, QDialog {
     background-color: #2b3c6b;
 }
@@ -600,7 +621,7 @@ QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
 QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {
     background: none; 
 }
-""")
-window = MainEditorWindow(sys.argv)
-window.show()
-sys.exit(app.exec_())
+    """)
+    window = MainEditorWindow(sys.argv)
+    window.show()
+    sys.exit(app.exec_())
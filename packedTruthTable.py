@@ -0,0 +1,223 @@
+"""
+Compact truth table that only stores the output column. The inputs of row i are always the binary value of i (with
+variable A as the most significant bit), so there's no need to store them - the output of row i is bit (i % 8) of byte
+(i // 8). A 16 variable table is 8KB rather than the 1.1 million characters of the old row string.
+
+Saved in the "TT" block as "x:" followed by the packed bytes in hex. The older format (one "0"/"1" character per row)
+can still be loaded.
+
+The inputs can have names (e.g. from the header row of a CSV file), see variableNames.py. They are only used for
+showing and exporting expressions, so two tables with the same outputs are equal whatever their inputs are called.
+
+An output can also be a don't care (X), for input combinations that can never happen. These are kept in a second
+bitmap (dontCares) in the same layout as the outputs, and a don't care row is always 0 in packed. Anything that only
+reads packed (SOP.dll, the raw SOP) sees a don't care as 0, and the simplifiers are given the don't cares separately
+so they can cover them or not, whichever makes the expression smaller. Tables with don't cares are saved as
+"x:<outputs>:<don't cares>".
+
+A table with several output columns is a MultiOutputTruthTable, which is one PackedTruthTable per output sharing the
+same inputs. Anything that only handles one output keeps using PackedTruthTable.
+"""
+
+import variableNames
+
+SAVE_PREFIX = "x:"
+DONT_CARE = "X"         # value of a don't care output in getValue/setValue and files
+
+class PackedTruthTable:
+    def __init__(self, noVars: int, packed=None, names=None, dontCares=None):
+        self.noVars = noVars
+        self.noRows = 1 << noVars
+        self.names = list(names) if names is not None else None     # None means the default names A, B, C...
+        if self.names is not None and len(self.names) != noVars:
+            raise ValueError(f"Truth table with {noVars} variables was given {len(self.names)} names.")
+        noBytes = (self.noRows + 7) // 8
+        if packed is None:
+            self.packed = bytearray(noBytes)
+        else:
+            if len(packed) != noBytes:
+                raise ValueError(f"Truth table with {noVars} variables needs {noBytes} bytes, got {len(packed)}.")
+            self.packed = bytearray(packed)
+            if self.noRows < 8:
+                # bits past the last row must be 0 so equal tables always have equal bytes (used for the cache key)
+                self.packed[0] &= (1 << self.noRows) - 1
+        if dontCares is None:
+            self.dontCares = bytearray(noBytes)
+        else:
+            if len(dontCares) != noBytes:
+                raise ValueError(f"Truth table with {noVars} variables needs {noBytes} bytes of don't cares, got {len(dontCares)}.")
+            self.dontCares = bytearray(dontCares)
+            if self.noRows < 8:
+                self.dontCares[0] &= (1 << self.noRows) - 1
+            # a row that is a 1 isn't a don't care
+            for i, byte in enumerate(self.packed):
+                self.dontCares[i] &= ~byte
+
+    @classmethod
+    def fromOutputString(cls, noVars: int, outputs: str):
+        # "0110" -> table where rows 1 and 2 are 1, an X is a don't care
+        if len(outputs) != 1 << noVars or outputs.count("0") + outputs.count("1") + outputs.count(DONT_CARE) != len(outputs):
+            raise ValueError(f"Output string |{outputs}| is not valid for {noVars} variables.")
+        table = cls(noVars)
+        if "1" in outputs:
+            table.packed[:] = int(outputs.replace(DONT_CARE, "0")[::-1], 2).to_bytes(len(table.packed), "little")
+        if DONT_CARE in outputs:
+            table.dontCares[:] = int(outputs.replace("1", "0").replace(DONT_CARE, "1")[::-1], 2).to_bytes(len(table.packed), "little")
+        return table
+
+    @classmethod
+    def fromRowString(cls, truthTable: str, rowWidth: int):
+        # the old format sent to sumOfProducts: every row's inputs followed by its output, e.g. "000011101110"
+        return cls.fromOutputString(rowWidth - 1, truthTable[rowWidth - 1::rowWidth])
+
+    @classmethod
+    def fromSaveString(cls, noVars: int, saved: str):
+        # load the output column from the "TT" save block in either the packed or the old format
+        if saved.startswith(SAVE_PREFIX):
+            outputs, _, dontCares = saved[len(SAVE_PREFIX):].partition(":")
+            return cls(noVars, bytes.fromhex(outputs), dontCares=bytes.fromhex(dontCares) if dontCares else None)
+        return cls.fromOutputString(noVars, saved)
+
+    def getNames(self) -> list[str]:
+        return self.names if self.names is not None else variableNames.defaultNames(self.noVars)
+
+    def copy(self):
+        return PackedTruthTable(self.noVars, self.packed, self.names, self.dontCares)
+
+    def toSaveString(self) -> str:
+        # the don't cares are only added when there are some, so tables without any save the same as before
+        if self.hasDontCares():
+            return SAVE_PREFIX + self.packed.hex() + ":" + self.dontCares.hex()
+        return SAVE_PREFIX + self.packed.hex()
+
+    def getOutput(self, row: int) -> int:
+        return self.packed[row >> 3] >> (row & 7) & 1
+
+    def setOutput(self, row: int, value: int) -> None:
+        # setting a row to 0 or 1 means it's no longer a don't care
+        self.dontCares[row >> 3] &= ~(1 << (row & 7))
+        if value:
+            self.packed[row >> 3] |= 1 << (row & 7)
+        else:
+            self.packed[row >> 3] &= ~(1 << (row & 7))
+
+    def isDontCare(self, row: int) -> bool:
+        return bool(self.dontCares[row >> 3] >> (row & 7) & 1)
+
+    def setDontCare(self, row: int) -> None:
+        self.packed[row >> 3] &= ~(1 << (row & 7))
+        self.dontCares[row >> 3] |= 1 << (row & 7)
+
+    def getValue(self, row: int):
+        # 0, 1 or DONT_CARE, for showing the table
+        return DONT_CARE if self.isDontCare(row) else self.getOutput(row)
+
+    def setValue(self, row: int, value) -> None:
+        if value == DONT_CARE:
+            self.setDontCare(row)
+        else:
+            self.setOutput(row, int(value))
+
+    def hasDontCares(self) -> bool:
+        return any(self.dontCares)
+
+    def asInt(self) -> int:
+        # the whole output column as one integer (bit i is row i), the bitmap format used by SOP_Espresso
+        return int.from_bytes(self.packed, "little")
+
+    def dontCaresAsInt(self) -> int:
+        return int.from_bytes(self.dontCares, "little")
+
+    def minterms(self) -> list[int]:
+        # every row with an output of 1
+        return self._rowsSet(self.asInt())
+
+    def dontCareRows(self) -> list[int]:
+        return self._rowsSet(self.dontCaresAsInt())
+
+    def complement(self):
+        # NOT Q, every 1 becomes a 0 and the other way round. don't cares stay don't cares
+        bits = ~(self.asInt() | self.dontCaresAsInt()) & ((1 << self.noRows) - 1)
+        return PackedTruthTable(self.noVars, bits.to_bytes(len(self.packed), "little"), self.names, self.dontCares)
+
+    def withDontCaresSet(self):
+        # copy where every don't care is a 1, the largest function the table allows
+        return PackedTruthTable(self.noVars, (self.asInt() | self.dontCaresAsInt()).to_bytes(len(self.packed), "little"), self.names)
+
+    @staticmethod
+    def _rowsSet(bits: int) -> list[int]:
+        minterms = []
+        while bits:
+            lowBit = bits & -bits
+            minterms.append(lowBit.bit_length() - 1)
+            bits ^= lowBit
+        return minterms
+
+    def outputString(self) -> str:
+        # one "0"/"1" per row, row 0 first
+        return bin(self.asInt())[2:].rjust(self.noRows, "0")[::-1]
+
+    def toRowString(self) -> str:
+        # the old row string, only needed for versions of SOP.dll without sumOfProductsPacked
+        outputs = self.outputString()
+        return "".join(f"{bin(row)[2:].rjust(self.noVars, "0")}{outputs[row]}" for row in range(self.noRows))
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, PackedTruthTable) and self.noVars == other.noVars and self.packed == other.packed
+                and self.dontCares == other.dontCares)
+
+class MultiOutputTruthTable:
+    def __init__(self, noVars: int, noOutputs: int = 1, names=None, outputNames=None, outputs=None):
+        self.noVars = noVars
+        self.noRows = 1 << noVars
+        self.names = list(names) if names is not None else None
+        self.outputNames = list(outputNames) if outputNames is not None else None  # None means Q0, Q1, Q2...
+        if outputs is None:
+            outputs = [PackedTruthTable(noVars) for _ in range(noOutputs)]
+        if not outputs or any(output.noVars != noVars for output in outputs):
+            raise ValueError(f"Every output of a truth table with {noVars} variables needs {noVars} variables.")
+        if self.outputNames is not None and len(self.outputNames) != len(outputs):
+            raise ValueError(f"Truth table with {len(outputs)} outputs was given {len(self.outputNames)} output names.")
+        self.outputs = [PackedTruthTable(noVars, output.packed, self.names, output.dontCares) for output in outputs]
+
+    @classmethod
+    def fromTable(cls, table: PackedTruthTable):
+        return cls(table.noVars, names=table.names, outputs=[table])
+
+    @classmethod
+    def fromSaveStrings(cls, noVars: int, saved: list[str], names=None, outputNames=None):
+        return cls(noVars, names=names, outputNames=outputNames, outputs=[PackedTruthTable.fromSaveString(noVars, output) for output in saved])
+
+    @property
+    def noOutputs(self) -> int:
+        return len(self.outputs)
+
+    def getNames(self) -> list[str]:
+        return self.names if self.names is not None else variableNames.defaultNames(self.noVars)
+
+    def getOutputNames(self) -> list[str]:
+        return self.outputNames if self.outputNames is not None else variableNames.defaultOutputNames(self.noOutputs)
+
+    def getValue(self, row: int, output: int):
+        return self.outputs[output].getValue(row)
+
+    def setValue(self, row: int, output: int, value) -> None:
+        self.outputs[output].setValue(row, value)
+
+    def withOutputs(self, noOutputs: int):
+        # copy with outputs added (empty) or removed from the end
+        outputs = self.outputs[:noOutputs] + [PackedTruthTable(self.noVars) for _ in range(noOutputs - self.noOutputs)]
+        return MultiOutputTruthTable(self.noVars, names=self.names, outputs=outputs)
+
+    def simplest(self):
+        # a PackedTruthTable if there's only one output, so single output tables go through the program as before
+        return self.outputs[0].copy() if self.noOutputs == 1 else self.copy()
+
+    def copy(self):
+        return MultiOutputTruthTable(self.noVars, names=self.names, outputNames=self.outputNames, outputs=self.outputs)
+
+    def toSaveStrings(self) -> list[str]:
+        return [output.toSaveString() for output in self.outputs]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MultiOutputTruthTable) and self.outputs == other.outputs
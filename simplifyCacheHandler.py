@@ -0,0 +1,146 @@
+import sqlite3
+import hashlib
+import threading
+import time
+
+"""
+Persistent cache of simplification results so re-submitting a truth table that has already been solved (in this
+expression or any other) doesn't run the SOP generator and simplifier again.
+
+Entries are keyed by a hash of the number of variables and the packed output column of the truth table, plus the
+engine that produced them since each engine can give a different (equally valid) expression. The cache lives in its
+own file next to main.db so it can be deleted at any time without losing any work, and the least recently used
+entries are evicted once it grows past MAX_ENTRIES rows or MAX_BYTES of stored text.
+
+A cache is never essential, so any SQLite error is treated as a miss rather than a fatal error.
+
+Results that ran out of time (TIMEOUT_MARK in their identities) aren't stored. They depend on the time limit and how
+busy the computer was, so with more time the same table can get a better answer.
+"""
+
+CACHE_PATH = "simplifyCache.db"
+MAX_ENTRIES = 5000
+MAX_BYTES = 64 * 1024 * 1024
+TIMEOUT_MARK = "-TIMEOUT"   # put in the identities by the time limited engines when they stop early
+
+def hashTruthTable(noVars: int, packedOutputs: bytes, packedDontCares: bytes = None) -> str:
+    # packedOutputs is the output column of a PackedTruthTable and packedDontCares its don't cares
+    # canonical key for a truth table: the same outputs always give the same hash regardless of where they came from.
+    # tables without don't cares hash the same as they did before don't cares were added
+    key = f"{noVars}:".encode("utf-8") + packedOutputs
+    if packedDontCares and any(packedDontCares):
+        key += b":" + packedDontCares
+    return hashlib.sha256(key).hexdigest()
+
+class simplifyCacheHandler:
+    def __init__(self, path: str = CACHE_PATH) -> None:
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()    # the same handler is shared by every thread in the process
+
+        self.createCacheTable = """
+        CREATE TABLE IF NOT EXISTS SimplifyCache (
+          tableHash TEXT NOT NULL,
+          engine TEXT NOT NULL,
+          noVars INTEGER NOT NULL,
+          rawSOP TEXT NOT NULL,
+          expression TEXT NOT NULL,
+          identities TEXT NOT NULL,
+          passes TEXT NOT NULL,
+          entrySize INTEGER NOT NULL,
+          lastUsed INTEGER NOT NULL,
+          PRIMARY KEY (tableHash, engine)
+        );
+        """
+        self.createLastUsedIndex = "CREATE INDEX IF NOT EXISTS SimplifyCacheLastUsed ON SimplifyCache (lastUsed);"
+
+    def connect(self) -> bool:
+        # open (and create if needed) the cache file, only done the first time the cache is used
+        if self.connection:
+            return True
+        try:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute(self.createCacheTable)
+            self.connection.execute(self.createLastUsedIndex)
+            self.connection.commit()
+            return True
+        except sqlite3.Error:
+            self.connection = None
+            return False
+
+    def lookup(self, tableHash: str, engine: str):
+        # returns [rawSOP, expression, identities, passes] or None if this table hasn't been solved by this engine
+        with self.lock:
+            if not self.connect():
+                return None
+            try:
+                row = self.connection.execute(
+                    "SELECT rawSOP, expression, identities, passes FROM SimplifyCache WHERE tableHash = ? AND engine = ?",
+                    (tableHash, engine)
+                ).fetchone()
+                if row is None:
+                    return None
+                # mark as recently used so it isn't the next thing evicted
+                self.connection.execute(
+                    "UPDATE SimplifyCache SET lastUsed = ? WHERE tableHash = ? AND engine = ?",
+                    (time.time_ns(), tableHash, engine)
+                )
+                self.connection.commit()
+                return list(row)
+            except sqlite3.Error:
+                return None
+
+    def store(self, tableHash: str, engine: str, noVars: int, rawSOP: str, expression: str, identities: str, passes) -> None:
+        with self.lock:
+            if not self.connect():
+                return
+            entrySize = len(rawSOP) + len(expression) + len(identities)
+            if entrySize > MAX_BYTES:
+                return  # would evict the whole cache for a single entry
+            if TIMEOUT_MARK in identities:
+                return  # not the engine's best answer, see above
+            try:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO SimplifyCache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (tableHash, engine, noVars, rawSOP, expression, identities, str(passes), entrySize, time.time_ns())
+                )
+                self.evict()
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+
+    def evict(self) -> None:
+        # keep the most recently used entries that fit inside both limits and delete the rest
+        count, totalSize = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(entrySize), 0) FROM SimplifyCache").fetchone()
+        if count <= MAX_ENTRIES and totalSize <= MAX_BYTES:
+            return
+
+        keptCount = keptSize = 0
+        cutOff = None
+        for lastUsed, entrySize in self.connection.execute("SELECT lastUsed, entrySize FROM SimplifyCache ORDER BY lastUsed DESC"):
+            if keptCount + 1 > MAX_ENTRIES or keptSize + entrySize > MAX_BYTES:
+                cutOff = lastUsed
+                break
+            keptCount += 1
+            keptSize += entrySize
+        if cutOff is not None:
+            self.connection.execute("DELETE FROM SimplifyCache WHERE lastUsed <= ?", (cutOff,))
+
+    def clear(self) -> bool:
+        # returns False if the cache couldn't be cleared (e.g. the file is locked), nothing else depends on it
+        with self.lock:
+            if not self.connect():
+                return False
+            try:
+                self.connection.execute("DELETE FROM SimplifyCache")
+                self.connection.commit()
+                return True
+            except sqlite3.Error:
+                self.connection.rollback()
+                return False
+
+    def closeConnection(self) -> None:
+        with self.lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
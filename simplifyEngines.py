@@ -0,0 +1,70 @@
+import SOP_QuineMcCluskey
+import SOP_Espresso
+import SOP_ExactCover
+import SOP_MultiOutput
+from SOP_Incremental import IncrementalPrimes
+from packedTruthTable import PackedTruthTable, MultiOutputTruthTable
+
+"""
+The simplification engines written in Python, for a whole truth table at a time. This is kept apart from dllWrapper
+(which imports the Qt error dialogs and loads SOP.dll) so the process pool used by dllWrapper.solveTruthTablesBatch
+only has to import the engines themselves in each worker process.
+"""
+
+ENGINE_DLL = "DLL"      # identity based simplifier in SOP.dll
+ENGINE_QM  = "QM"       # bit-packed Quine-McCluskey (SOP_QuineMcCluskey.py)
+ENGINE_ESP = "ESP"      # Espresso heuristic minimiser for wide tables (SOP_Espresso.py)
+ENGINE_EXACT = "EXACT"  # Quine-McCluskey primes with an exact minimum cover (SOP_ExactCover.py)
+ENGINE_MULTI = "MULTI"  # shared term minimiser for tables with several outputs (SOP_MultiOutput.py), used whatever
+                        # engine is selected since the others only simplify one output at a time
+
+# each returns (cover, identities, passes) and calls progressCallback(passes) (if it isn't None) as it goes. the
+# table's don't cares can be covered or not, whichever gives the smaller cover
+TABLE_ENGINES = {
+    ENGINE_QM:    lambda table, timeLimit, progressCallback: SOP_QuineMcCluskey.simplifyMinterms(table.minterms(), table.noVars, table.dontCareRows(), progressCallback=progressCallback, timeLimit=timeLimit),
+    ENGINE_ESP:   lambda table, timeLimit, progressCallback: SOP_Espresso.simplifyBitmap(table.asInt(), table.noVars, table.dontCaresAsInt(), timeLimit=timeLimit, progressCallback=progressCallback),
+    ENGINE_EXACT: lambda table, timeLimit, progressCallback: SOP_ExactCover.simplifyMinterms(table.minterms(), table.noVars, table.dontCareRows(), timeLimit=timeLimit, progressCallback=progressCallback),
+}
+
+def simplifyTable(engine: str, table: PackedTruthTable, timeLimit: float, progressCallback=None) -> list[str]:
+    # [expression, identities, passes] in the same form as the DLL's simplifier
+    cover, identities, passes = TABLE_ENGINES[engine](table, timeLimit, progressCallback)
+    return [SOP_QuineMcCluskey.formatCover(cover, table.noVars), identities, str(passes)]
+
+# engines that only need the prime implicants to pick a cover, so they can keep them from the last table and update them
+# for the rows that changed (see SOP_Incremental.py)
+INCREMENTAL_ENGINES = {
+    ENGINE_QM:    lambda primes, minterms, noVars, timeLimit, progressCallback: SOP_QuineMcCluskey.selectCover(primes, minterms),
+    ENGINE_EXACT: lambda primes, minterms, noVars, timeLimit, progressCallback: SOP_ExactCover.exactCover(primes, minterms, noVars, timeLimit, progressCallback),
+}
+
+def simplifyIncrementally(engine: str, primes: IncrementalPrimes, table: PackedTruthTable, timeLimit: float, changedRows: int = None, progressCallback=None) -> list[str]:
+    # simplifyTable with primes that are already up to date with table. changedRows is the number of rows they were
+    # updated for, or None if they were just found from scratch
+    minterms = table.minterms()
+    passes = primes.passes if changedRows is None else 0
+    if not minterms:
+        return ["0", "Predefined constant result", str(passes)]
+    # smallest cubes first like the rounds of SOP_QuineMcCluskey.findPrimeImplicants, so the greedy cover doesn't
+    # depend on the order of the set
+    primeList = sorted(primes.primes, key=lambda prime: (SOP_QuineMcCluskey.popCount(prime[0]), prime))
+    if engine == ENGINE_QM:
+        cover, noEssential = INCREMENTAL_ENGINES[engine](primeList, minterms, table.noVars, timeLimit, progressCallback)
+        identities = f"QM{{P{len(primeList)}-E{noEssential}-C{len(cover)}}}"
+    else:
+        searchCallback = (lambda: progressCallback(passes)) if progressCallback else None
+        cover, isOptimal, nodes = INCREMENTAL_ENGINES[engine](primeList, minterms, table.noVars, timeLimit, searchCallback)
+        identities = f"EXACT{{P{len(primeList)}-N{nodes}-C{len(cover)}{'' if isOptimal else '-TIMEOUT'}}}"
+    if changedRows is not None:
+        identities += f" (primes updated for {changedRows} changed rows)"
+    return [SOP_QuineMcCluskey.formatCover(cover, table.noVars), identities, str(passes)]
+
+def simplifyPackedTable(engine: str, noVars: int, packed: bytes, timeLimit: float, dontCares: bytes = None) -> list[str]:
+    # simplifyTable for a process pool, only plain values are sent between processes
+    return simplifyTable(engine, PackedTruthTable(noVars, packed, dontCares=dontCares), timeLimit)
+
+def simplifyMultiOutputTable(table: MultiOutputTruthTable, timeLimit: float, progressCallback=None) -> list:
+    # [expression of every output, identities, passes]
+    covers, identities, passes = SOP_MultiOutput.simplifyMultiOutput([output.minterms() for output in table.outputs], table.noVars,
+                                                                     [output.dontCareRows() for output in table.outputs], timeLimit, progressCallback)
+    return [[SOP_QuineMcCluskey.formatCover(cover, table.noVars) for cover in covers], identities, str(passes)]
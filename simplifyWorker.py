@@ -0,0 +1,65 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+import threading
+
+import dllWrapper
+from packedTruthTable import PackedTruthTable, MultiOutputTruthTable
+
+"""
+Runs dllWrapper.solveTruthTable (or solveMultiOutputTable) on a QThreadPool thread so the windows keep responding while a big truth table is
+simplified. Everything goes back to the GUI thread through signals, nothing in here touches a widget.
+
+Cancelling is cooperative: the Python engines call the progress callback after every pass, which raises
+SimplifyCancelled once cancel() has been called. A call into SOP.dll can't be interrupted, so if the DLL engine is
+cancelled it finishes in the background and its result is thrown away.
+"""
+
+# Qt only lets QObjects have signals and QRunnable isn't one, so the signals live in their own object
+class SimplifyWorkerSignals(QObject):
+    progress  = pyqtSignal(int)     # passes completed so far
+    finished  = pyqtSignal(list)    # [SOP_RAW, expression, identities, passes]
+    failed    = pyqtSignal(object)  # the dllWrapper.SOPLibraryError that stopped it
+    cancelled = pyqtSignal()
+
+class SimplifyWorker(QRunnable):
+    def __init__(self, table: PackedTruthTable | MultiOutputTruthTable):
+        super().__init__()
+        self.table = table
+        self.signals = SimplifyWorkerSignals()
+        self.cancelEvent = threading.Event()
+        self.lastPasses = -1    # only emit progress when the pass count changes, the exact search reports very often
+
+    def cancel(self):
+        # safe to call from any thread, the worker stops at its next progress report
+        self.cancelEvent.set()
+
+    def isCancelled(self) -> bool:
+        return self.cancelEvent.is_set()
+
+    def reportProgress(self, passes: int):
+        if self.cancelEvent.is_set():
+            raise dllWrapper.SimplifyCancelled()
+        if passes != self.lastPasses:
+            self.lastPasses = passes
+            self.signals.progress.emit(passes)
+
+    def run(self):
+        try:
+            if isinstance(self.table, MultiOutputTruthTable):
+                result = dllWrapper.solveMultiOutputTable(self.table, self.reportProgress)
+            else:
+                result = dllWrapper.solveTruthTable(self.table, self.reportProgress)
+        except dllWrapper.SimplifyCancelled:
+            self.signals.cancelled.emit()
+            return
+        except dllWrapper.SOPLibraryError as e:
+            self.signals.failed.emit(e)
+            return
+        except Exception as e:
+            # anything else is still a problem in the library wrapper, report it the same way
+            self.signals.failed.emit(dllWrapper.SOPLibraryError(44, f"Simplify worker: {e}"))
+            return
+
+        if self.cancelEvent.is_set():
+            self.signals.cancelled.emit()   # the DLL finished after cancel() was called
+        else:
+            self.signals.finished.emit(result)
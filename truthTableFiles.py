@@ -0,0 +1,270 @@
+import csv
+import variableNames
+from packedTruthTable import PackedTruthTable, MultiOutputTruthTable, DONT_CARE
+from SOP_QuineMcCluskey import expandCube
+
+"""
+Reading truth tables from files. Nothing in here touches the GUI, so it can be used by the Truth Table Editor and
+anything that loads tables in the background.
+
+Rows are placed by the value of their input columns rather than their position in the file, so the rows can be in any
+order. Every row has to appear exactly once - a missing or repeated row is almost always a mistake in whatever exported
+the file, so it's reported rather than guessed at.
+
+An output can be a don't care (X, x or - in a CSV, - in the output plane of a PLA file with the usual .type fd), for
+inputs that can never happen. A PLA file with .type r lists the rows that are 0 instead (how a product of sums is
+exported), so every row it doesn't cover is a 1.
+
+Input names in the file (the header row of a CSV, .ilb in a PLA) become the table's names if they can be used in an
+expression (see variableNames.py), otherwise the table keeps the default names A, B, C...
+"""
+
+PROGRESS_INTERVAL = 8192    # rows between calls to the progress callback
+CSV_DONT_CARES = (DONT_CARE, "x", "-")
+
+class TruthTableFileError(Exception):
+    # error code and message for the error dialog
+    def __init__(self, code: int, message: str):
+        super().__init__(code, message)
+        self.code = code
+        self.message = message
+
+def readCSVTruthTable(fileName: str, topRowIsHeaders: bool, maxVariables: int, progressCallback=None, noOutputs: int = 1):
+    # read a CSV where every row is the inputs followed by the output, e.g. "0,1,1" (A=0, B=1, Q=1). the output can
+    # also be a don't care, e.g. "0,1,X". with noOutputs > 1 the last noOutputs columns are outputs and the result is
+    # a MultiOutputTruthTable.
+    # progressCallback(rowsRead, totalRows) is called every PROGRESS_INTERVAL rows and can return False to cancel, in
+    # which case None is returned.
+    table = None    # the first output, the others are in outputs
+    outputs = None
+    seen = None     # rows that have been read so far, in the same packed format as the outputs
+    rowsRead = 0
+    headerRow = None
+
+    with open(fileName, newline = '') as csvFile:
+        for lineNo, row in enumerate(csv.reader(csvFile), 1):
+            if topRowIsHeaders and lineNo == 1:
+                # label row, the input columns are the variable names and the last ones are the outputs
+                headerRow = row
+                continue
+            if not row:
+                continue    # blank line, usually at the end of the file
+
+            if table is None:
+                # first row of actual data, the length of the row includes the output variables so subtract them
+                noVariables = len(row) - noOutputs
+                if noVariables < 1 or noVariables > maxVariables:
+                    raise TruthTableFileError(79, f"Truth Table Editor (CSV Loading): The file has {noVariables} input columns, between 1 and {maxVariables} are supported.")
+                outputs = [PackedTruthTable(noVariables, names=headerNames(headerRow, noVariables)) for _ in range(noOutputs)]
+                table = outputs[0]
+                seen = PackedTruthTable(noVariables)
+
+            if len(row) != table.noVars + noOutputs:
+                raise TruthTableFileError(38, f"Truth Table Editor (CSV Loading): Row length is not correct - too much or too little data on line {lineNo}.")
+
+            inputs = row[:table.noVars]
+            if inputs.count("0") + inputs.count("1") != table.noVars or any(value not in ("0", "1") + CSV_DONT_CARES for value in row[table.noVars:]):
+                # this row contains elements other than 1 or 0 (or X as an output)
+                raise TruthTableFileError(37, "Truth Table Editor (CSV Loading): Corrupted data!\nCharacters in the CSV are not 0 or 1 (or X for an output), or the header row was incorrectly disabled.")
+
+            # the inputs are the row's index in binary (A is the most significant bit)
+            index = int("".join(inputs), 2)
+            if seen.getOutput(index):
+                # find where it first appeared, only worth doing once we know there's a problem
+                firstLine = findLineOfRow(fileName, topRowIsHeaders, index, noOutputs)
+                raise TruthTableFileError(77, f"Truth Table Editor (CSV Loading): Line {lineNo} has the same inputs as line {firstLine}.")
+            seen.setOutput(index, 1)
+            for output, value in zip(outputs, row[table.noVars:]):
+                if value == "1":
+                    output.setOutput(index, 1)
+                elif value in CSV_DONT_CARES:
+                    output.setDontCare(index)
+
+            rowsRead += 1
+            if progressCallback and rowsRead % PROGRESS_INTERVAL == 0:
+                if progressCallback(rowsRead, table.noRows) is False:
+                    return None
+
+    if table is None:
+        raise TruthTableFileError(38, "Truth Table Editor (CSV Loading): The file doesn't contain any rows.")
+    if rowsRead != table.noRows:
+        missingRow = next(row for row in range(table.noRows) if not seen.getOutput(row))
+        raise TruthTableFileError(78, f"Truth Table Editor (CSV Loading): {table.noRows - rowsRead} rows are missing, e.g. inputs {bin(missingRow)[2:].rjust(table.noVars, "0")}.")
+    if noOutputs == 1:
+        return table
+    outputNames = headerNames(headerRow[table.noVars:], noOutputs) if headerRow is not None else None
+    return MultiOutputTruthTable(table.noVars, names=table.names, outputNames=outputNames, outputs=outputs)
+
+def headerNames(labels, noVars: int):
+    # names for the inputs from the labels in a file, or None (the default names) if they can't be used
+    if labels is None:
+        return None
+    names = [label.strip() for label in labels[:noVars]]
+    try:
+        variableNames.validateNames(names)
+    except ValueError:
+        return None
+    return names if len(names) == noVars else None
+
+def findLineOfRow(fileName: str, topRowIsHeaders: bool, index: int, noOutputs: int = 1) -> int:
+    # line number of the first row in the file with the given inputs
+    with open(fileName, newline = '') as csvFile:
+        for lineNo, row in enumerate(csv.reader(csvFile), 1):
+            if (topRowIsHeaders and lineNo == 1) or not row:
+                continue
+            try:
+                if int("".join(row[:-noOutputs]), 2) == index:
+                    return lineNo
+            except ValueError:
+                continue
+    return 0
+
+"""
+Berkeley PLA files, used by espresso, ABC, yosys etc. A PLA file lists cubes rather than rows:
+
+    .i 3            number of inputs
+    .o 1            number of outputs
+    .ilb A B C      input names (optional)
+    .ob Q           output names (optional)
+    .p 2            number of cubes (optional)
+    1-0 1           input plane then output plane, - means the input can be either value
+    --1 1
+    .e
+
+An input plane of 1-0 is the term AC#, the same (mask, value) pair used in SOP_QuineMcCluskey.
+"""
+
+def readPLATruthTable(fileName: str, maxVariables: int, progressCallback=None):
+    # read a PLA file into a truth table, every cube with a 1 in its output plane is set to 1. for the usual .type fd a
+    # - in the output plane is a don't care, anything else (0, ~, or - for the other types) leaves the rows as 0. a row
+    # in both a 1 cube and a don't care cube is a 1. for .type r the 1 cubes are the rows that are 0 and every other
+    # row is 1. for .type fr a 0 in the output plane is a row that is 0 and every row the file doesn't list as 0 or 1
+    # is a don't care. a file with more than 1 output gives a MultiOutputTruthTable.
+    # progressCallback works the same as in readCSVTruthTable but counts cubes, the total is 0 if the file has no .p
+    # line.
+    noInputs = None
+    noOutputs = 1
+    noCubes = 0
+    outputs = None
+    cubesRead = 0
+    inputLabels = None
+    outputLabels = None
+    plaType = "fd"
+    dontCareCubes = []      # (output, mask, value), applied at the end so a 1 wins whatever order the cubes are in
+    offRows = None          # for .type fr, the rows each output lists as 0 (bit m is row m)
+
+    with open(fileName, newline = '') as plaFile:
+        for lineNo, line in enumerate(plaFile, 1):
+            line = line.split("#", 1)[0].strip()   # comments start with #
+            if not line:
+                continue
+
+            if line.startswith("."):
+                keyword, *values = line.split()
+                if keyword in (".e", ".end"):
+                    break
+                try:
+                    if keyword == ".i":
+                        noInputs = int(values[0])
+                    elif keyword == ".o":
+                        noOutputs = int(values[0])
+                    elif keyword == ".p":
+                        noCubes = int(values[0])
+                    elif keyword == ".ilb":
+                        inputLabels = values
+                    elif keyword == ".ob":
+                        outputLabels = values
+                    elif keyword == ".type":
+                        if values[0] not in ("f", "fd", "fr", "r"):
+                            raise TruthTableFileError(80, f"Truth Table Editor (PLA Loading): .type {values[0]} on line {lineNo} is not supported.")
+                        plaType = values[0]
+                    # anything else doesn't change how the cubes are read
+                except (IndexError, ValueError):
+                    raise TruthTableFileError(80, f"Truth Table Editor (PLA Loading): {keyword} on line {lineNo} is missing its value.")
+                continue
+
+            if outputs is None:
+                # first cube, the size of the table is known now
+                if noInputs is None:
+                    raise TruthTableFileError(80, "Truth Table Editor (PLA Loading): The file has no .i line before its first cube.")
+                if noOutputs < 1:
+                    raise TruthTableFileError(80, f"Truth Table Editor (PLA Loading): The file has {noOutputs} outputs.")
+                if noInputs < 1 or noInputs > maxVariables:
+                    raise TruthTableFileError(79, f"Truth Table Editor (PLA Loading): The file has {noInputs} inputs, between 1 and {maxVariables} are supported.")
+                outputs = [PackedTruthTable(noInputs, names=headerNames(inputLabels, noInputs)) for _ in range(noOutputs)]
+                offRows = [PackedTruthTable(noInputs) for _ in range(noOutputs)]
+
+            # the planes can be written with or without a space between them
+            cube = line.replace(" ", "").replace("\t", "").replace("|", "")
+            inputPlane, outputPlane = cube[:noInputs], cube[noInputs:]
+            if len(inputPlane) != noInputs or len(outputPlane) != noOutputs or inputPlane.count("0") + inputPlane.count("1") + inputPlane.count("-") != noInputs:
+                raise TruthTableFileError(80, f"Truth Table Editor (PLA Loading): Line {lineNo} is not a valid cube for {noInputs} inputs and {noOutputs} outputs.")
+
+            mask = int(inputPlane.replace("1", "0").replace("-", "1"), 2)
+            value = int(inputPlane.replace("-", "0"), 2)
+            for output, outputOffRows, outputValue in zip(outputs, offRows, outputPlane):
+                if outputValue == "1":
+                    # every row the cube covers is 1
+                    for row in expandCube(mask, value):
+                        output.setOutput(row, 1)
+                elif outputValue == "-" and plaType == "fd":
+                    dontCareCubes.append((output, mask, value))
+                elif outputValue == "0" and plaType == "fr":
+                    for row in expandCube(mask, value):
+                        outputOffRows.setOutput(row, 1)
+
+            cubesRead += 1
+            if progressCallback and cubesRead % PROGRESS_INTERVAL == 0:
+                if progressCallback(cubesRead, noCubes) is False:
+                    return None
+
+    if outputs is None:
+        if noInputs is None:
+            raise TruthTableFileError(80, "Truth Table Editor (PLA Loading): The file has no .i line.")
+        # no cubes at all, every output is always 0
+        outputs = [PackedTruthTable(noInputs, names=headerNames(inputLabels, noInputs)) for _ in range(max(1, noOutputs))]
+        offRows = [PackedTruthTable(noInputs) for _ in outputs]
+    if plaType == "fr":
+        # rows that are neither 1 nor 0 are don't cares (a row listed as both is a 1)
+        for output, outputOffRows in zip(outputs, offRows):
+            dontCares = ~(output.asInt() | outputOffRows.asInt()) & ((1 << output.noRows) - 1)
+            output.dontCares[:] = dontCares.to_bytes(len(output.dontCares), "little")
+    for output, mask, value in dontCareCubes:
+        for row in expandCube(mask, value):
+            if not output.getOutput(row):
+                output.setDontCare(row)
+    if plaType == "r":
+        outputs = [output.complement() for output in outputs]
+    if len(outputs) == 1:
+        return outputs[0]
+    outputNames = headerNames(outputLabels, len(outputs)) if outputLabels is not None else None
+    return MultiOutputTruthTable(noInputs, names=outputs[0].names, outputNames=outputNames, outputs=outputs)
+
+def writePLACover(fileName: str, cover: list[tuple[int, int]], noVars: int, names: list[str] = None) -> None:
+    # write a cover ((mask, value) pairs, e.g. from SOP_QuineMcCluskey.parseSOPExpression) as a single output PLA file.
+    # the .ilb line uses the name table if there is one
+    writePLACovers(fileName, [cover], noVars, names)
+
+def writePLACovers(fileName: str, covers: list[list[tuple[int, int]]], noVars: int, names: list[str] = None, outputNames: list[str] = None, plaType: str = None) -> None:
+    # write the cover of every output of a table as one PLA file. a term used by several outputs is written once with a
+    # 1 for each of them in its output plane. plaType is written as a .type line if it's given, e.g. "r" when the
+    # covers are of the rows that are 0
+    names = names if names is not None else variableNames.defaultNames(noVars)
+    outputNames = outputNames if outputNames is not None else variableNames.defaultOutputNames(len(covers))
+    outputPlanes = {}   # cube -> outputs it's in, in the order the cubes are first used
+    for i, cover in enumerate(covers):
+        for cube in cover:
+            outputPlanes[cube] = outputPlanes.get(cube, 0) | 1 << i
+    with open(fileName, "w", newline = "\n") as plaFile:
+        plaFile.write(f".i {noVars}\n.o {len(covers)}\n.ilb {" ".join(names)}\n.ob {" ".join(outputNames)}\n")
+        if plaType:
+            plaFile.write(f".type {plaType}\n")
+        plaFile.write(f".p {len(outputPlanes)}\n")
+        for (mask, value), outputs in outputPlanes.items():
+            inputPlane = ""
+            for i in range(noVars):
+                bit = 1 << (noVars - 1 - i)
+                inputPlane += "-" if mask & bit else ("1" if value & bit else "0")
+            outputPlane = "".join("1" if outputs >> i & 1 else "0" for i in range(len(covers)))
+            plaFile.write(f"{inputPlane} {outputPlane}\n")
+        plaFile.write(".e\n")
@@ -0,0 +1,187 @@
+import re
+
+"""
+Variables are numbered internally (A is 0, B is 1, ...) and everything that simplifies or evaluates a function works
+with those numbers, e.g. the (mask, value) terms of SOP_QuineMcCluskey where variable 0 is the most significant bit.
+Names are only used to show or export an expression, and come from a name table: a list where names[i] is the name
+of variable i. A table of None means the default names.
+
+The default names are the letters A-Z, then V26, V27, ... up to MAX_VARIABLES. Expressions can be written in two ways:
+
+    compact     every name is one capital letter and a term is its literals written together, e.g. "AB#+C". This
+                is the form SOP.dll reads and writes, and what every expression with 26 or fewer default names uses.
+    separated   the literals in a term are separated by *, so names can be longer, e.g. "rst_n*clk#+en" or "A*V30#".
+
+Both use + between terms and # after a name for NOT. An expression containing a * (or anything else that can't be
+in a compact expression, e.g. the single name "rst_n") is read as separated.
+
+A truth table with several outputs gives one expression per output, which are written together with each output's
+name as "Q0 = AB+C; Q1 = AB+D". An expression with no = is a single output called Q.
+
+An expression can also be a product of sums (POS), where every sum (clause) is in brackets and the clauses are ANDed
+together, e.g. "(A+B#)(C)". The names in a clause are always separated by +, so the form of the names doesn't matter.
+A POS is made from the SOP of the complemented function (the rows that are 0) by De Morgan's law: every term becomes a
+clause with each of its literals inverted, so the SOP "AB#+C" of NOT Q is the POS "(A#+B)(C#)" of Q.
+"""
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+MAX_VARIABLES = 64              # variables fit in one 64 bit word, the limit for anything that doesn't store 2^n rows
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")
+_DEFAULT_INDEXED_NAME = re.compile(r"V([0-9]+)$")
+_NOT_COMPACT = re.compile(r"[^A-Z#+ ]")
+OUTPUT_NAME = "Q"               # name of the output of a single output table
+OUTPUT_SEPARATOR = "; "
+
+def defaultName(index: int) -> str:
+    return ALPHABET[index] if index < len(ALPHABET) else f"V{index}"
+
+def defaultNames(noVars: int) -> list[str]:
+    return [defaultName(i) for i in range(noVars)]
+
+def defaultIndex(name: str) -> int:
+    # variable number of a default name, raises ValueError for anything else
+    if len(name) == 1 and name in ALPHABET:
+        return ALPHABET.index(name)
+    match = _DEFAULT_INDEXED_NAME.match(name)
+    if match and len(ALPHABET) <= int(match.group(1)) < MAX_VARIABLES:
+        return int(match.group(1))
+    raise ValueError(f"|{name}| is not a variable name.")
+
+def validateNames(names: list[str]) -> None:
+    # raises ValueError if the names can't be used in an expression
+    if len(names) > MAX_VARIABLES:
+        raise ValueError(f"{len(names)} variables were given, the most that can be used is {MAX_VARIABLES}.")
+    for name in names:
+        if not NAME_PATTERN.match(name):
+            raise ValueError(f"|{name}| is not a valid variable name, names are letters, digits and _ and can't start with a digit.")
+    if len(set(names)) != len(names):
+        raise ValueError("Every variable needs a different name.")
+
+def isCompact(names: list[str]) -> bool:
+    # whether an expression using these names can be written in the compact form
+    return all(len(name) == 1 and name in ALPHABET for name in names)
+
+def isSeparated(exprIn: str) -> bool:
+    return _NOT_COMPACT.search(exprIn) is not None
+
+def splitTerms(exprIn: str, separated: bool = None) -> list[list[tuple[str, bool]]]:
+    # split an expression into terms of (name, is inverted) without looking the names up, e.g.
+    # "AB#+C" -> [[("A", False), ("B", True)], [("C", False)]]. raises ValueError if it isn't valid SOP. the form is
+    # worked out from the expression unless it's given
+    exprIn = exprIn.replace(" ", "")
+    if separated is None:
+        separated = isSeparated(exprIn)
+    terms = []
+    for term in exprIn.split("+"):
+        literals = []
+        for token in (term.split("*") if separated else re.findall(r"[^#]#?|#", term)):
+            name, isInverted = (token[:-1], True) if token.endswith("#") else (token, False)
+            if not name or not NAME_PATTERN.match(name) or (not separated and name not in ALPHABET):
+                # empty term or literal (e.g. "A++B" or "A**B"), ## or a character that can't be in a name
+                raise ValueError(f"Input string |{exprIn}| is not valid.")
+            literals.append((name, isInverted))
+        if not literals:
+            raise ValueError(f"Input string |{exprIn}| is not valid.")
+        terms.append(literals)
+    return terms
+
+def parseLiterals(exprIn: str, names: list[str] = None) -> list[list[tuple[int, bool]]]:
+    # splitTerms with the names turned into variable numbers, using the name table if there is one
+    lookup = {name: i for i, name in enumerate(names)} if names is not None else None
+    # names like "CLK" could be read as the compact C, L, K, so a name table that isn't all letters means separated
+    separated = True if names is not None and not isCompact(names) else None
+    try:
+        return [[(lookup[name] if lookup is not None else defaultIndex(name), isInverted) for name, isInverted in term]
+                for term in splitTerms(exprIn, separated)]
+    except (KeyError, ValueError):
+        raise ValueError(f"Input string |{exprIn}| is not valid.")
+
+def formatTerm(literals: list[tuple[int, bool]], noVars: int, names: list[str] = None) -> str:
+    # (variable, is inverted) pairs -> one term in whichever form suits the names
+    names = names if names is not None else defaultNames(noVars)
+    separator = "" if isCompact(names) else "*"
+    return separator.join(names[variable] + ("#" if isInverted else "") for variable, isInverted in literals)
+
+def renameExpression(exprIn: str, names: list[str] = None, oldNames: list[str] = None) -> str:
+    # rewrite an expression using oldNames (default names if None) with names instead, e.g. "AB#" with the names
+    # ["clk", "rst_n"] -> "clk*rst_n#". the constants 0 and 1 don't change
+    if exprIn.replace(" ", "") in ("0", "1") or names == oldNames:
+        return exprIn
+    if isProductOfSums(exprIn):
+        return toProductOfSums(renameExpression(complementOfProductOfSums(exprIn), names, oldNames))
+    terms = parseLiterals(exprIn, oldNames)
+    noVars = max(variable + 1 for term in terms for variable, _ in term)
+    if names is not None and noVars > len(names):
+        raise ValueError(f"Input string |{exprIn}| uses {noVars} variables but only {len(names)} names were given.")
+    return "+".join(formatTerm(term, noVars, names) for term in terms)
+
+def isProductOfSums(exprIn: str) -> bool:
+    return exprIn.strip().startswith("(")
+
+def splitClauses(exprIn: str) -> list[list[tuple[str, bool]]]:
+    # the same as splitTerms for a POS, e.g. "(A+B#)(C)" -> [[("A", False), ("B", True)], [("C", False)]]
+    exprIn = exprIn.replace(" ", "")
+    if not exprIn.startswith("(") or not exprIn.endswith(")"):
+        raise ValueError(f"Input string |{exprIn}| is not valid.")
+    clauses = []
+    for clause in exprIn[1:-1].split(")("):
+        literals = []
+        for token in clause.split("+"):
+            name, isInverted = (token[:-1], True) if token.endswith("#") else (token, False)
+            if not NAME_PATTERN.match(name):
+                # empty clause or literal (e.g. "()" or "(A++B)"), a bracket in the wrong place or ##
+                raise ValueError(f"Input string |{exprIn}| is not valid.")
+            literals.append((name, isInverted))
+        clauses.append(literals)
+    return clauses
+
+def literalGroups(exprIn: str) -> list[list[tuple[str, bool]]]:
+    # the terms of an SOP or the clauses of a POS, nothing for the constants 0 and 1
+    if exprIn.replace(" ", "") in ("0", "1"):
+        return []
+    return splitClauses(exprIn) if isProductOfSums(exprIn) else splitTerms(exprIn)
+
+def toProductOfSums(complementIn: str) -> str:
+    # the SOP of NOT Q -> the POS of Q, e.g. "AB#+C" -> "(A#+B)(C#)"
+    constant = complementIn.replace(" ", "")
+    if constant in ("0", "1"):
+        return "1" if constant == "0" else "0"
+    return "".join("(" + "+".join(name + ("" if isInverted else "#") for name, isInverted in term) + ")" for term in splitTerms(complementIn))
+
+def complementOfProductOfSums(exprIn: str) -> str:
+    # the other way round, the POS of Q -> the SOP of NOT Q, which anything that only reads SOP can use instead
+    clauses = splitClauses(exprIn)
+    separator = "" if isCompact([name for clause in clauses for name, _ in clause]) else "*"
+    return "+".join(separator.join(name + ("" if isInverted else "#") for name, isInverted in clause) for clause in clauses)
+
+def expressionCost(exprIn: str) -> int:
+    # literals + gates to build an SOP or POS as 2 levels of gates: one AND (OR for a POS) per term with more than 1
+    # literal, the OR (AND) joining the terms and one NOT per variable that is ever inverted. used to pick whichever of
+    # the two forms is cheaper
+    groups = literalGroups(exprIn)
+    literals = sum(len(group) for group in groups)
+    gates = sum(1 for group in groups if len(group) > 1) + (len(groups) > 1)
+    inverters = len({name for group in groups for name, isInverted in group if isInverted})
+    return literals + gates + inverters
+
+def defaultOutputNames(noOutputs: int) -> list[str]:
+    return [OUTPUT_NAME] if noOutputs == 1 else [f"{OUTPUT_NAME}{i}" for i in range(noOutputs)]
+
+def isMultiOutput(exprIn: str) -> bool:
+    return "=" in exprIn
+
+def joinOutputs(outputNames: list[str], exprs: list[str]) -> str:
+    # ["Q0", "Q1"], ["AB+C", "AB+D"] -> "Q0 = AB+C; Q1 = AB+D"
+    return OUTPUT_SEPARATOR.join(f"{name} = {expr}" for name, expr in zip(outputNames, exprs))
+
+def splitOutputs(exprIn: str) -> list[tuple[str, str]]:
+    # the other way round, a single expression is [("Q", exprIn)]
+    if not isMultiOutput(exprIn):
+        return [(OUTPUT_NAME, exprIn)]
+    outputs = []
+    for part in exprIn.split(OUTPUT_SEPARATOR.strip()):
+        name, separator, expr = part.partition("=")
+        if not separator or not NAME_PATTERN.match(name.strip()):
+            raise ValueError(f"Input string |{exprIn}| is not valid.")
+        outputs.append((name.strip(), expr.strip()))
+    return outputs